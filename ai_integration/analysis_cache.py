@@ -0,0 +1,173 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from image_processing.perceptual_hash import perceptual_hash, hamming_distance
+
+CACHE_PATH = "gpt_analysis_cache.json"
+
+
+def bucket_cycle_data(cycle_data, hours_bucket=12):
+    """
+    Context key for the cache: the cycle_data text with whitespace normalized
+    and the elapsed hours rounded down to `hours_bucket`, so consecutive
+    cycles of the same plate share a key.
+    """
+    def _bucket(match):
+        hours = float(match.group(2))
+        return f"{match.group(1)}{int(hours // hours_bucket) * hours_bucket}h-bucket"
+
+    text = re.sub(r"(Elapsed time:\s*)([\d.]+)\s*hours", _bucket, cycle_data)
+    return " ".join(text.split())
+
+
+def _entry_key(plate, context, image_hash):
+    return f"{plate}|{context}|{image_hash:016x}"
+
+
+class AnalysisCache:
+    """
+    Persistent cache of GPT answers keyed on (plate, bucketed context,
+    perceptual hash).
+
+    get() returns a stored answer when an entry of the same plate with the
+    same context has a hash within `max_distance` bits of the new snippet,
+    i.e. the plate has not visibly changed. Answers are never shared between
+    plates: near-empty plates of the same culture hash alike. Entries are
+    indexed by (plate, context), so a lookup only compares the hashes of
+    that plate, culture and hours bucket.
+
+    Entries expire after `ttl_seconds` and the least recently used are
+    dropped beyond `max_entries`. Hit/miss counters and the average latency
+    of real requests give the calls and time saved.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl_seconds=6 * 3600, max_entries=256, max_distance=4,
+                 hours_bucket=12):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.hours_bucket = hours_bucket
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._miss_seconds = 0.0
+        self._timed_misses = 0
+        # Entries in least recently used order, their keys per (plate, context)
+        # and in creation order, which is the order they expire in
+        self._entries = OrderedDict()
+        self._by_context = {}
+        self._created = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def key_for(self, image, cycle_data, plate):
+        """(plate, context, hash) for an image path/array of `plate` (e.g. "chamber/plate") and its cycle_data text."""
+        return plate, bucket_cycle_data(cycle_data, self.hours_bucket), perceptual_hash(image)
+
+    def get(self, key):
+        plate, context, image_hash = key
+        if image_hash is None:
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            best = None
+            for entry_key in self._by_context.get((plate, context), ()):
+                distance = hamming_distance(self._entries[entry_key]["hash"], image_hash)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, entry_key)
+
+            if best is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(best[1])
+            return self._entries[best[1]]["answer"]
+
+    def put(self, key, answer, latency=None):
+        """Store a fresh answer; latency (seconds) of the real request feeds the savings estimate."""
+        plate, context, image_hash = key
+        if image_hash is None:
+            return
+
+        with self._lock:
+            if latency is not None:
+                self._miss_seconds += latency
+                self._timed_misses += 1
+
+            self._add(_entry_key(plate, context, image_hash), {
+                "plate": plate,
+                "context": context,
+                "hash": image_hash,
+                "answer": answer,
+                "created": time.time(),
+            })
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            average = self._miss_seconds / self._timed_misses if self._timed_misses else 0.0
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "api_calls_saved": self.hits,
+                "seconds_saved": round(self.hits * average, 1),
+            }
+
+    def save(self):
+        with self._lock:
+            data = list(self._entries.values())
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in data:
+            # Entries written before answers were kept per plate could belong to any plate
+            if entry.get("plate") is None:
+                continue
+            self._add(_entry_key(entry["plate"], entry["context"], entry["hash"]), entry)
+        # The file holds the entries in use order
+        self._created = OrderedDict(sorted(self._created.items(), key=lambda item: item[1]))
+        self._expire(time.time())
+
+    def _add(self, entry_key, entry):
+        self._entries[entry_key] = entry
+        self._entries.move_to_end(entry_key)
+        self._by_context.setdefault((entry["plate"], entry["context"]), set()).add(entry_key)
+        self._created[entry_key] = entry["created"]
+        self._created.move_to_end(entry_key)
+
+    def _remove(self, entry_key):
+        entry = self._entries.pop(entry_key)
+        del self._created[entry_key]
+        keys = self._by_context[(entry["plate"], entry["context"])]
+        keys.discard(entry_key)
+        if not keys:
+            del self._by_context[(entry["plate"], entry["context"])]
+
+    def _expire(self, now):
+        while self._created:
+            entry_key, created = next(iter(self._created.items()))
+            if now - created <= self.ttl_seconds:
+                break
+            self._remove(entry_key)
@@ -4,6 +4,8 @@ from openai import OpenAI
 from dotenv import load_dotenv
 import os
 import base64
+import cv2
+import numpy as np
 
 load_dotenv()  # <-- REQUIRED HERE
 
@@ -11,11 +13,27 @@ client = OpenAI(
     api_key=os.getenv("OPENAI_API_KEY")
 )
 
-def analyze_plate(image_path: str, prompt: str) -> str:
-    with open(image_path, "rb") as f:
-        image_base64 = base64.b64encode(f.read()).decode()
+def encode_image_base64(image) -> str:
+    """Base64 PNG for a file path or an in-memory numpy array."""
+    if isinstance(image, np.ndarray):
+        ok, encoded = cv2.imencode(".png", image)
+        if not ok:
+            raise ValueError("Could not encode image as PNG")
+        return base64.b64encode(encoded.tobytes()).decode()
 
-    response = client.chat.completions.create(
+    with open(image, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+def analyze_plate(image_path, prompt: str, timeout=None) -> str:
+    """
+    image_path: path to a PNG, or the snippet array itself.
+    timeout: seconds before the request is abandoned (client default if None).
+    """
+    image_base64 = encode_image_base64(image_path)
+
+    request_client = client if timeout is None else client.with_options(timeout=timeout, max_retries=0)
+    response = request_client.chat.completions.create(
         model="gpt-4.1-mini",
         messages=[
             {
@@ -0,0 +1,111 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from core.metrics import get_metrics
+
+GPT_PLACEHOLDER = "Analysis unavailable for this cycle."
+
+
+def analyze_plates_concurrently(
+    images,
+    cycle_data_list,
+    max_concurrency=3,
+    timeout=60.0,
+    rate_limiter=None,
+    tokens_per_request=1000,
+    placeholder=GPT_PLACEHOLDER,
+    analyze=None,
+    cache=None,
+    plates=None,
+):
+    """
+    Send one GPT request per plate in parallel.
+
+    images: snippet paths or arrays, one per plate
+    cycle_data_list: per-plate context text, same order as images
+    max_concurrency: number of requests in flight at once
+    timeout: seconds for the whole batch; also passed to each request
+    rate_limiter: shared RateLimiter; each request takes one request and
+                  `tokens_per_request` tokens from it
+    analyze: function(image, cycle_data, timeout=...) -> str, defaults to chatgpt_client
+    cache: optional AnalysisCache; plates that have not visibly changed reuse
+           the cached answer and are not sent at all
+    plates: plate identifiers (e.g. "chamber/plate"), same order as images;
+            required with `cache`, answers are only reused for the same plate
+
+    Returns the answers in plate order. Plates that fail, time out or do not
+    get a rate-limit slot before the deadline get `placeholder` instead.
+    """
+    if analyze is None:
+        from ai_integration.chatgpt_client import chatgpt_client
+        analyze = chatgpt_client
+
+    if len(images) != len(cycle_data_list):
+        raise ValueError("images and cycle_data_list must have the same length.")
+    if cache is not None and (plates is None or len(plates) != len(images)):
+        raise ValueError("plates must name the plate of every image when a cache is used.")
+
+    deadline = time.monotonic() + timeout
+
+    results = [placeholder] * len(images)
+    keys = [None] * len(images)
+    pending = []
+    for index, (image, cycle_data) in enumerate(zip(images, cycle_data_list)):
+        if cache is not None:
+            keys[index] = cache.key_for(image, cycle_data, plates[index])
+            cached = cache.get(keys[index])
+            if cached is not None:
+                results[index] = cached
+                continue
+        pending.append(index)
+
+    metrics = get_metrics()
+    if cache is not None:
+        print(f"GPT cache: {len(images) - len(pending)} hit(s), {len(pending)} request(s) to send")
+        metrics.incr("gpt_cache_hits", len(images) - len(pending))
+        metrics.incr("gpt_cache_misses", len(pending))
+
+    def _run(index):
+        if rate_limiter is not None and not rate_limiter.acquire(tokens_per_request, deadline):
+            raise TimeoutError("rate limit budget not available before the deadline")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("deadline passed before the request was sent")
+        started = time.monotonic()
+        metrics.incr("api_calls", api="openai")
+        with metrics.span("gpt_request"):
+            answer = analyze(images[index], cycle_data_list[index], timeout=remaining)
+        return answer, time.monotonic() - started
+
+    if not pending:
+        return results
+
+    # Not used as a context manager: a hung request must not block the caller past the deadline
+    executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="gpt")
+    try:
+        futures = {executor.submit(_run, i): i for i in pending}
+        done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+
+        for future in done:
+            index = futures[future]
+            try:
+                answer, latency = future.result()
+            except Exception as e:
+                print(f"GPT analysis failed for plate #{index + 1}: {e}")
+                metrics.incr("gpt_failures")
+                continue
+            results[index] = answer
+            if cache is not None:
+                cache.put(keys[index], answer, latency)
+
+        for future in not_done:
+            future.cancel()
+            print(f"GPT analysis timed out for plate #{futures[future] + 1}")
+            metrics.incr("gpt_timeouts")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if cache is not None:
+        cache.save()
+
+    return results
@@ -8,6 +8,6 @@ Analyze agar plate images conservatively.
 Keep responses under 50 words.
 """
 
-def chatgpt_client(image_path: str, cycle_data: str) -> str:
+def chatgpt_client(image_path, cycle_data: str, timeout=None) -> str:
     prompt = BASE_PROMPT + "\n\n" + cycle_data
-    return analyze_plate(image_path, prompt)
\ No newline at end of file
+    return analyze_plate(image_path, prompt, timeout=timeout)
\ No newline at end of file
@@ -0,0 +1,59 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token-bucket budget for API calls: requests per minute and tokens per minute.
+    Either limit may be None (unlimited). Shared across threads and cycles, so
+    a burst at the start of one cycle is paid for before the next one.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute,
+                                 self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute,
+                               self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _wait_time(self, tokens):
+        wait = 0.0
+        if self.requests_per_minute and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+            if self._tokens < tokens:
+                wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+        return wait
+
+    def acquire(self, tokens=0, deadline=None):
+        """
+        Block until one request and `tokens` tokens are available and take them.
+        Returns False without taking anything if that would be after `deadline`
+        (a time.monotonic() value).
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    if self.requests_per_minute:
+                        self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= min(tokens, self.tokens_per_minute)
+                    return True
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
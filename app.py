@@ -1,101 +1,686 @@
-import time
+import argparse
+import os
+import threading
 from datetime import datetime, timedelta, timezone
 
-from ai_integration.chatgpt_client import chatgpt_client
-from core.capture_image import capture_image
+from ai_integration.analyze_plates_concurrently import GPT_PLACEHOLDER, analyze_plates_concurrently
+from ai_integration.rate_limiter import RateLimiter
+from ai_integration.analysis_cache import AnalysisCache
+from core.camera import create_camera
+from core.chambers import default_chamber_config, load_chamber_configs, stagger_offsets, chamber_path
+from core.metrics import Metrics, configure_metrics, get_metrics
+from core.plate_store import PlateMetricsStore, PlateSample, to_epoch
+from core.growth_analytics import GrowthTracker, snapshot_fields
+from core.scheduler import CycleScheduler
 from firebase_io.firebase_uploader import upload_snippet_to_firebase
-from image_processing.rotate_and_crop_image import rotate_and_crop_image
-from image_processing.cut_and_save_snippet import cut_and_save_snippet
+from image_processing.rotate_and_crop_image import crop_fits, rotate_and_crop_image
 from firebase_io.upload_raw_image import upload_raw_image
-from image_processing.calculate_mean_intensities import calculate_mean_intensities
-from image_processing.create_gif_from_images import create_gif_from_images
+from image_processing.update_gif_incrementally import update_gif_incrementally
+from image_processing.segmented_video import update_segmented_video
 from firebase_io.upload_gif_file import upload_gif_file
-from image_processing.calculate_green_object_area import calculate_green_object_area
-from image_processing.cut_and_save_circle_snippets import cut_and_save_circle_snippets
-from image_processing.calculate_contour import calculate_contour
-from image_processing.calculate_contour_areas_mm2 import calculate_contour_areas_mm2
+from firebase_io.firebase_session import get_firebase_session
+from firebase_io.upload_spool import UploadSpool, UploadWorker
+from image_processing.plate_metrics import compute_plate_metrics, mean_rgb_tuples
+from image_processing.cut_and_save_circle_snippets import save_circle_snippets
+from image_processing.plate_geometry import PlateGeometry
+from image_processing.calculate_contour import measurable_area_mm2
+from core.image_writer import flush_image_writes, wait_for_image
+from image_processing.frame_manifest import get_frame_manifest
+from image_processing.retention import apply_retention
+from image_processing.extract_datetime import extract_datetime
+from image_processing.plate_analysis_pool import PlateAnalysisPool
+from image_processing.plate_change_detector import PlateChangeDetector
 from config import (
-    CULTURE,
-    INTERVAL_SECONDS,
-    COORDINATES,
-    ROTATION_ANGLE,
-    CHAMBER,
-    PLATE_ID,
-    RAW_COORDINATES,
-    CIRCLE_COORDS,
-    PLATE_START_TIME,
     DIAMETER_MM,
-    DIAMETER_PX
+    UPLOAD_SPOOL_PATH,
+    UPLOAD_RETRY_BASE_SECONDS,
+    UPLOAD_RETRY_MAX_SECONDS,
+    UPLOAD_MAX_ATTEMPTS,
+    UPLOAD_SHUTDOWN_TIMEOUT_SECONDS,
+    GPT_MAX_CONCURRENCY,
+    GPT_TIMEOUT_SECONDS,
+    GPT_REQUESTS_PER_MINUTE,
+    GPT_TOKENS_PER_MINUTE,
+    GPT_TOKENS_PER_REQUEST,
+    GPT_CACHE_PATH,
+    GPT_CACHE_TTL_SECONDS,
+    GPT_CACHE_MAX_ENTRIES,
+    GPT_CACHE_MAX_DISTANCE,
+    GPT_CACHE_HOURS_BUCKET,
+    CHANGE_THRESHOLD,
+    CHANGE_REFRESH_SECONDS,
+    CHANGE_THUMBNAIL_SIZE,
+    ANALYSIS_WORKERS,
+    CHAMBERS_CONFIG_PATH,
+    PLATE_STORE_PATH,
+    VIDEO_ENABLED,
+    VIDEO_FPS,
+    VIDEO_SEGMENT_FRAMES,
+    VIDEO_FOURCC,
+    VIDEO_PLATE_WIDTH,
+    VIDEO_CHAMBER_WIDTH,
+    GROWTH_METRIC,
+    GROWTH_WINDOW_SAMPLES,
+    GROWTH_AREA_FLOOR_MM2,
+    GROWTH_MIN_RATE_PER_HOUR,
+    GROWTH_COVERAGE_FRACTION,
+    RETENTION_ENABLED,
+    RETENTION_KEEP_DAYS,
+    RETENTION_THIN_AFTER_DAYS,
+    RETENTION_THIN_INTERVAL_HOURS,
+    RETENTION_CHECK_HOURS,
+    RETENTION_MAX_DAYS_PER_PASS,
+    METRICS_ENABLED,
+    METRICS_JSONL_PATH,
+    METRICS_PROMETHEUS_PATH,
+    METRICS_MAX_BYTES,
+    METRICS_BACKUPS,
+    SCHEDULE_LATE_TOLERANCE_SECONDS,
+    SCHEDULE_DEGRADE_RATIO
 )
 
-def run_capture_loop():
-    while True:
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-        image_path = capture_image(timestamp)
+def build_upload_handlers(session, plate_store=None):
+    """
+    Upload spool job kinds -> functions doing the network work for them.
+    GPT answers are also written to `plate_store` when given.
+    """
+
+    # Shared across cycles so the OpenAI budget holds over time, not per batch
+    gpt_rate_limiter = RateLimiter(GPT_REQUESTS_PER_MINUTE, GPT_TOKENS_PER_MINUTE)
+    gpt_cache = AnalysisCache(
+        GPT_CACHE_PATH,
+        ttl_seconds=GPT_CACHE_TTL_SECONDS,
+        max_entries=GPT_CACHE_MAX_ENTRIES,
+        max_distance=GPT_CACHE_MAX_DISTANCE,
+        hours_bucket=GPT_CACHE_HOURS_BUCKET,
+    )
+    # Last real answer per (chamber, plate), reused while the change detector
+    # sees no change; placeholders of failed requests are never kept
+    last_gpt_answers = {}
+
+    def handle_raw_image(payload):
+        upload_raw_image(payload["image_path"], payload["chamber"], payload["timestamp"], session=session)
+        get_metrics().incr("upload_bytes", os.path.getsize(payload["image_path"]), kind="raw_image")
+
+    def handle_snippets(payload):
+        # GPT answers are kept in the payload, a retried upload does not ask again
+        chamber = payload["chamber"]
+        gpt_results = payload["gpt_results"]
+        changed_flags = payload.get("changed") or [True] * len(gpt_results)
+        for i, (plate, changed) in enumerate(zip(payload["plates"], changed_flags)):
+            if gpt_results[i] is None and not changed:
+                gpt_results[i] = last_gpt_answers.get((chamber, plate))
+        # A placeholder from a failed or timed out request (e.g. kept by an
+        # earlier attempt of this job) is asked again
+        missing = [i for i, result in enumerate(gpt_results) if result is None or result == GPT_PLACEHOLDER]
+        if missing:
+            answers = analyze_plates_concurrently(
+                [payload["snippet_paths"][i] for i in missing],
+                [payload["gpt_prompts"][i] for i in missing],
+                max_concurrency=GPT_MAX_CONCURRENCY,
+                timeout=GPT_TIMEOUT_SECONDS,
+                rate_limiter=gpt_rate_limiter,
+                tokens_per_request=GPT_TOKENS_PER_REQUEST,
+                cache=gpt_cache,
+                plates=[f"{chamber}/{payload['plates'][i]}" for i in missing],
+            )
+            for i, answer in zip(missing, answers):
+                gpt_results[i] = answer
+        last_gpt_answers.update(
+            ((chamber, plate), result)
+            for plate, result in zip(payload["plates"], gpt_results)
+            if result is not None and result != GPT_PLACEHOLDER
+        )
+        if plate_store is not None:
+            plate_store.set_gpt_results(chamber, payload["timestamp"], payload["plates"], gpt_results)
+
+        upload_snippet_to_firebase(
+            payload["snippet_paths"],
+            payload["plates"],
+            chamber,
+            payload["timestamp"],
+            payload["mean_intensities"],
+            payload["green_object_areas"],
+            payload["plate_start_times"],
+            payload["shapes_lists"],
+            payload["total_shapes_area_lists"],
+            gpt_results,
+            session=session,
+            changed_flags=changed_flags,
+            colony_stats_lists=payload.get("colony_stats_lists"),
+            # Jobs spooled before multi-chamber support fall back to config.py
+            cultures=payload.get("cultures"),
+            substrate=payload.get("substrate"),
+            growth_list=payload.get("growth"),
+            contour_storage=payload.get("contour_storage"),
+            contour_tolerances=payload.get("contour_tolerance_px"),
+        )
+        snippet_bytes = sum(os.path.getsize(path) for path in payload["snippet_paths"] if os.path.exists(path))
+        get_metrics().incr("upload_bytes", snippet_bytes, kind="snippets")
+
+    def handle_gif(payload):
+        if not upload_gif_file(payload["gif_path"], payload["chamber"], payload["plate"], session=session):
+            raise RuntimeError(f"GIF upload failed for plate {payload['plate']}")
+        get_metrics().incr("upload_bytes", os.path.getsize(payload["gif_path"]), kind="gif")
+
+    def timed(kind, handler):
+        def run(payload):
+            metrics = get_metrics()
+            # Attributed to the chamber of the job, like the chamber's own series
+            labels = {"kind": kind}
+            if payload.get("chamber"):
+                labels["chamber"] = payload["chamber"]
+            try:
+                with metrics.span("upload", **labels):
+                    handler(payload)
+            except Exception:
+                metrics.incr("upload_failures", **labels)
+                raise
+            else:
+                metrics.incr("uploads", **labels)
+            finally:
+                # The process-wide series only change on the upload worker (GPT
+                # calls included), so it is their only writer
+                if metrics.enabled and metrics.prometheus_path:
+                    metrics.write_prometheus()
+        return run
+
+    return {
+        "raw_image": timed("raw_image", handle_raw_image),
+        "snippets": timed("snippets", handle_snippets),
+        "gif": timed("gif", handle_gif),
+    }
+
+
+def open_camera(chamber_config):
+    """The chamber's camera backend, opened; falls back to rpicam-still without picamera2."""
+    options = dict(chamber_config.camera_options)
+    if chamber_config.camera_backend == "synthetic":
+        # Generated frames follow the chamber's own plate layout and crop
+        options.setdefault("circle_coords", chamber_config.circle_coords)
+        options.setdefault("rotation_angle", chamber_config.rotation_angle)
+        options.setdefault("raw_coordinates", chamber_config.raw_coordinates)
+    try:
+        return create_camera(chamber_config.camera_backend, **options).open()
+    except ImportError as e:
+        print(f"{e} Falling back to rpicam-still.")
+        camera_num = chamber_config.camera_options.get("camera_num")
+        extra_args = ["--camera", str(camera_num)] if camera_num is not None else None
+        return create_camera("rpicam-still", extra_args=extra_args).open()
+
+
+class ChamberPipeline:
+    """
+    Capture and processing of one chamber: its camera, plate layout, change
+    detector, last colonies, growth state and metrics. The upload spool, the analysis
+    pool and the plate metrics store are shared with the other chambers of
+    the process.
+    """
+
+    def __init__(self, chamber_config, enqueue_upload, upload_spool, analysis_pool, plate_store):
+        self.config = chamber_config
+        self.enqueue_upload = enqueue_upload
+        self.upload_spool = upload_spool
+        self.analysis_pool = analysis_pool
+        self.plate_store = plate_store
+
+        self.metrics = Metrics(
+            METRICS_ENABLED,
+            chamber_path(METRICS_JSONL_PATH, chamber_config.chamber),
+            chamber_path(METRICS_PROMETHEUS_PATH, chamber_config.chamber),
+            METRICS_MAX_BYTES,
+            METRICS_BACKUPS,
+            labels={"chamber": chamber_config.chamber},
+        )
+        self.change_detector = PlateChangeDetector(CHANGE_THRESHOLD, CHANGE_REFRESH_SECONDS, CHANGE_THUMBNAIL_SIZE)
+        # Colonies of the last changed snippet of each plate, reused while it looks the same
+        self.last_colonies = {}
+        # Growth rate, lag and coverage per plate, one O(1) update per cycle
+        self.growth = GrowthTracker(
+            window=GROWTH_WINDOW_SAMPLES,
+            area_floor=GROWTH_AREA_FLOOR_MM2,
+            min_rate=GROWTH_MIN_RATE_PER_HOUR,
+            measurable_area_mm2=measurable_area_mm2(DIAMETER_MM),
+            coverage_fraction=GROWTH_COVERAGE_FRACTION,
+        )
+        # Own instance rather than the shared cache: chambers with the same
+        # layout would otherwise hand out the same snippet buffers
+        self.geometry = None
+        self.camera = open_camera(chamber_config)
+        # Capture time of the last complete retention pass; None runs one on the first full cycle
+        self.last_retention = None
+
+    def plate_geometry(self, frame_shape):
+        if self.geometry is None or self.geometry.frame_shape != tuple(frame_shape[:2]):
+            self.geometry = PlateGeometry(self.config.circle_coords, frame_shape)
+        return self.geometry
+
+    def close(self):
+        self.camera.close()
+
+    def update_growth(self, timestamp, areas):
+        """GrowthSnapshot per plate after this cycle's GROWTH_METRIC areas."""
+        chamber = self.config.chamber
+        start_times = self.config.plate_start_times
+        if len(start_times) == 1:
+            start_times = start_times * len(self.config.plate_ids)
+
+        capture_time = to_epoch(timestamp)
+        snapshots = []
+        for plate, start_time, area in zip(self.config.plate_ids, start_times, areas):
+            start = to_epoch(start_time)
+            if (chamber, plate) not in self.growth:
+                # After a restart the running state is rebuilt from the local store once
+                ts, history = self.plate_store.series(chamber, plate, GROWTH_METRIC)
+                self.growth.prime(chamber, plate, (ts - start) / 3600, history)
+            snapshots.append(self.growth.update(chamber, plate, (capture_time - start) / 3600, area))
+        return snapshots
+
+    def apply_retention(self, timestamp):
+        """
+        Archive and thin the old captures of the chamber and its plates, at
+        most every RETENTION_CHECK_HOURS. Runs on the chamber's own thread,
+        so no manifest of the chamber is written meanwhile; a pass packs at
+        most RETENTION_MAX_DAYS_PER_PASS days so it never holds up the next
+        capture, and a backlog (e.g. the first pass over weeks of history)
+        continues on the following full cycles.
+        """
+        now = extract_datetime(timestamp)
+        if self.last_retention is not None and now - self.last_retention < timedelta(hours=RETENTION_CHECK_HOURS):
+            return
+
+        # Files of jobs still in the spool are read by the upload worker; a job
+        # is queued at most one interval after its capture
+        not_after = None
+        oldest_pending = self.upload_spool.oldest_pending_time()
+        if oldest_pending is not None:
+            not_after = (datetime.fromtimestamp(oldest_pending, timezone.utc).replace(tzinfo=None)
+                         - timedelta(seconds=self.config.interval_seconds))
+
+        chamber_folder = os.path.join("captured_images", self.config.chamber)
+        folders = [os.path.join(chamber_folder, plate) for plate in self.config.plate_ids] + [chamber_folder]
+        results = apply_retention(
+            folders, now, RETENTION_KEEP_DAYS, RETENTION_THIN_AFTER_DAYS, RETENTION_THIN_INTERVAL_HOURS, not_after,
+            max_days=RETENTION_MAX_DAYS_PER_PASS,
+        )
+        if not any(stats.days_pending for stats in results):
+            self.last_retention = now
+
+    def capture(self, cycle):
+        metrics = self.metrics
+        metrics.start_cycle(cycle.timestamp)
+        with metrics.span("capture"):
+            raw_frame = self.camera.capture()
+        if raw_frame is None:
+            print(f"Capture failed for chamber {self.config.chamber}, retrying next cycle.")
+            metrics.incr("capture_failures")
+            metrics.end_cycle()
+        return raw_frame
+
+    def process(self, cycle, raw_frame):
+        """Process a captured frame; the cycle's metrics are closed even if it fails."""
+        failed = True
+        try:
+            self.process_frame(cycle, raw_frame)
+            failed = False
+        finally:
+            self.metrics.end_cycle(
+                upload_queue=self.upload_spool.pending_count(),
+                lateness_seconds=round(cycle.lateness, 3),
+                degraded=cycle.degraded,
+                failed=failed,
+            )
 
-        rotate_and_crop_image(image_path, ROTATION_ANGLE, RAW_COORDINATES)
+    def process_frame(self, cycle, raw_frame):
+        chamber_config = self.config
+        chamber = chamber_config.chamber
+        plate_ids = chamber_config.plate_ids
+        metrics = self.metrics
+        timestamp = cycle.timestamp
+        if cycle.degraded:
+            print(f"Cycle {timestamp} of chamber {chamber} degraded: reusing colonies and skipping GIF updates.")
 
-        upload_raw_image(image_path, CHAMBER, timestamp)
+        # A frame smaller than the crop window (wrong sensor mode, truncated
+        # read) would give an undersized crop the plate circles do not fit in
+        if not crop_fits(raw_frame.shape, chamber_config.raw_coordinates):
+            height, width = raw_frame.shape[:2]
+            print(f"Capture {timestamp} of chamber {chamber} is {width}x{height}, smaller than the crop "
+                  f"{chamber_config.raw_coordinates}; skipping the cycle.")
+            metrics.incr("capture_failures")
+            return
 
-        # snippet_path = cut_and_save_snippet(image_path, COORDINATES, PLATE_ID, CHAMBER)
-        
-        snippet_paths = cut_and_save_circle_snippets(image_path, CIRCLE_COORDS, PLATE_ID, CHAMBER)
+        # The frame stays in memory from here on; only the rotated crop is
+        # written, in the background, as the raw image artifact
+        image_path = os.path.join("captured_images", chamber, f"captured_image_{timestamp}.png")
+        with metrics.span("rotate"):
+            frame = rotate_and_crop_image(
+                raw_frame, chamber_config.rotation_angle, chamber_config.raw_coordinates, output_path=image_path
+            )
+        if frame is None:
+            print(f"Rotating capture {timestamp} of chamber {chamber} failed; skipping the cycle.")
+            metrics.incr("capture_failures")
+            return
 
-        mean_intensities = calculate_mean_intensities(snippet_paths)
-        green_object_areas = calculate_green_object_area(snippet_paths)
+        # Circle masks, bounds and output buffers are built once per frame size
+        with metrics.span("snippets"):
+            snippets = self.plate_geometry(frame.shape).extract(frame)
+            snippet_paths = save_circle_snippets(snippets, plate_ids, chamber, os.path.basename(image_path))
 
-        shapes_lists = []
-        total_shapes_area_lists = []
+        with metrics.span("write_raw_image"):
+            try:
+                raw_info = wait_for_image(image_path)
+            except Exception as e:
+                print(f"Error writing image {image_path}: {e}")
+                raw_info = None
+        if raw_info is not None:
+            # Chamber-level manifest of the raw frames, read by the chamber timelapse
+            get_frame_manifest(os.path.dirname(image_path)).append(timestamp, image_path, raw_info.size, raw_info.crc32)
+            self.enqueue_upload("raw_image", {"image_path": image_path, "chamber": chamber, "timestamp": timestamp})
 
-        for snippet_path in snippet_paths:
-            shapes = calculate_contour(snippet_path)
-            shapes_area = calculate_contour_areas_mm2(shapes)
-            shapes_lists.append(shapes)
-            total_shapes_area_lists.append(shapes_area)
+        # Every plate reduced over its own ROI, masked to the circle
+        with metrics.span("plate_metrics"):
+            plate_metrics = compute_plate_metrics(frame, chamber_config.circle_coords)
+        if plate_metrics is None:
+            mean_intensities = [None] * len(plate_ids)
+            green_object_areas = [None] * len(plate_ids)
+        else:
+            mean_intensities = mean_rgb_tuples(plate_metrics)
+            green_object_areas = plate_metrics["green_pixels"].tolist()
+
+        with metrics.span("change_detection"):
+            changed_flags = [
+                self.change_detector.check(plate, snippet) for plate, snippet in zip(plate_ids, snippets)
+            ]
+        unchanged = [plate for plate, changed in zip(plate_ids, changed_flags) if not changed]
+        if unchanged:
+            print(f"No visible change, reusing previous results for: {', '.join(unchanged)}")
+            metrics.incr("plates_unchanged", len(unchanged))
+
+        # A degraded cycle only analyzes plates it has no colonies for yet
+        to_analyze = [
+            i for i, (plate, changed) in enumerate(zip(plate_ids, changed_flags))
+            if (changed and not cycle.degraded) or plate not in self.last_colonies
+        ]
+        with metrics.span("contours"):
+            analyzed = self.analysis_pool.analyze(frame, chamber_config.circle_coords, to_analyze)
+            for i, colonies in zip(to_analyze, analyzed):
+                self.last_colonies[plate_ids[i]] = colonies
+        colony_sets = [self.last_colonies[plate] for plate in plate_ids]
+        metrics.incr("plates_analyzed", len(to_analyze))
+
+        total_shapes_area_lists = [colonies.total_area_mm2() for colonies in colony_sets]
+        if GROWTH_METRIC == "covered_area_mm2":
+            growth_areas = [colonies.covered_area_mm2() for colonies in colony_sets]
+        else:
+            growth_areas = total_shapes_area_lists
+
+        with metrics.span("growth"):
+            growth_snapshots = self.update_growth(timestamp, growth_areas)
+
+        cultures = chamber_config.cultures
+        if len(cultures) == 1:
+            cultures = cultures * len(plate_ids)
+        plate_start_times = chamber_config.plate_start_times
+        if len(plate_start_times) == 1:
+            plate_start_times = plate_start_times * len(plate_ids)
+        contour_tolerances = chamber_config.contour_tolerance_px
+        if len(contour_tolerances) == 1:
+            contour_tolerances = contour_tolerances * len(plate_ids)
 
         elapsed_hours_list = []
         LOCAL_TZ = timezone(timedelta(hours=-5))
         now = datetime.now(LOCAL_TZ)
-        for plate_start_time in PLATE_START_TIME:
+        for plate_start_time in plate_start_times:
             start = datetime.fromisoformat(plate_start_time.replace("Z", "+00:00"))
             elapsed_hours = round((now - start).total_seconds() / 3600, 1)
             elapsed_hours_list.append(elapsed_hours)
-            
-        # get ChatGPT analysis for each plate
-        gpt_results = []
-        for plate, elapsed_hours, culture, snippet_path in zip(PLATE_ID, elapsed_hours_list, CULTURE, snippet_paths):
+
+        # ChatGPT prompts for each plate; the analysis itself runs on the upload worker
+        gpt_prompts = []
+        for plate, elapsed_hours, culture in zip(plate_ids, elapsed_hours_list, cultures):
             cycle_data = f"""
             Culture: {culture}
             Elapsed time: {elapsed_hours:.2f} hours since inoculation.
-            Plate diameter: {DIAMETER_MM} mm 
+            Plate diameter: {DIAMETER_MM} mm
             """
-            gpt_result = chatgpt_client(snippet_path, cycle_data)
-            gpt_results.append(gpt_result)
+            gpt_prompts.append(cycle_data)
 
-        upload_snippet_to_firebase(
-            snippet_paths,
-            PLATE_ID,
-            CHAMBER,
-            timestamp,
-            mean_intensities,
-            green_object_areas,
-            PLATE_START_TIME,
-            shapes_lists,
-            total_shapes_area_lists,
-            gpt_results
-        )
-        
-        # Create and upload GIFs for each plate in the config list
-        for plate in PLATE_ID:
-            gif_path = create_gif_from_images(f"captured_images/{CHAMBER}/{plate}", f"{plate}.gif", 200, 0.1, 10)
-            # Only attempt upload if GIF creation succeeded
+        # The upload worker and the GIFs read the PNGs back from disk. Only
+        # this chamber's snippets are waited for, not other chambers' writes
+        written = {}
+        with metrics.span("write_snippets"):
+            for snippet_path in snippet_paths:
+                try:
+                    written[snippet_path] = wait_for_image(snippet_path)
+                except Exception as e:
+                    print(f"Error writing image {snippet_path}: {e}")
+                    written[snippet_path] = None
+
+        # Record each new snippet in its plate manifest
+        with metrics.span("manifest"):
+            for snippet_path, intensity, object_area, shapes_area, colonies in zip(
+                snippet_paths, mean_intensities, green_object_areas, total_shapes_area_lists, colony_sets
+            ):
+                info = written.get(snippet_path)
+                if info is None:
+                    continue
+                get_frame_manifest(os.path.dirname(snippet_path)).append(
+                    timestamp, snippet_path, info.size, info.crc32, {
+                        "mean_rgb": list(intensity) if intensity else None,
+                        "green_object_area": object_area,
+                        "total_shape_area_mm2": shapes_area,
+                        "covered_area_mm2": colonies.covered_area_mm2(),
+                        "colony_count": len(colonies),
+                    }
+                )
+
+        # The local copy of the metrics is written before anything is uploaded
+        with metrics.span("store"):
+            self.plate_store.append(
+                PlateSample(
+                    chamber=chamber,
+                    plate=plate,
+                    ts=None,
+                    timestamp=timestamp,
+                    elapsed_hours=elapsed_hours,
+                    mean_red=intensity[0] if intensity else None,
+                    mean_green=intensity[1] if intensity else None,
+                    mean_blue=intensity[2] if intensity else None,
+                    green_object_area=object_area,
+                    green_fraction=float(plate_metrics["green_fraction"][i]) if plate_metrics is not None else None,
+                    total_shape_area_mm2=shapes_area,
+                    covered_area_mm2=colonies.covered_area_mm2(),
+                    colony_count=len(colonies),
+                    changed=changed,
+                    culture=culture,
+                    substrate=chamber_config.substrate,
+                    snippet_path=snippet_path,
+                    hue_hist=plate_metrics["hue_hist"][i] if plate_metrics is not None else None,
+                    gpt_result=None,
+                )
+                for i, (plate, snippet_path, elapsed_hours, intensity, object_area, shapes_area, colonies, changed, culture)
+                in enumerate(zip(
+                    plate_ids, snippet_paths, elapsed_hours_list, mean_intensities, green_object_areas,
+                    total_shapes_area_lists, colony_sets, changed_flags, cultures
+                ))
+            )
+
+        # Plates whose snippet could not be written are left out of the
+        # upload, it would only fail on the missing file
+        uploadable = [i for i, snippet_path in enumerate(snippet_paths) if written.get(snippet_path) is not None]
+
+        def pick(values):
+            return [values[i] for i in uploadable]
+
+        if uploadable:
+            self.enqueue_upload("snippets", {
+                "snippet_paths": pick(snippet_paths),
+                "plates": pick(plate_ids),
+                "chamber": chamber,
+                "timestamp": timestamp,
+                "mean_intensities": pick([list(i) if i else None for i in mean_intensities]),
+                "green_object_areas": pick(green_object_areas),
+                "plate_start_times": pick(plate_start_times),
+                "cultures": pick(cultures),
+                "substrate": chamber_config.substrate,
+                "shapes_lists": pick([colonies.coordinates() for colonies in colony_sets]),
+                "colony_stats_lists": pick([colonies.stats() for colonies in colony_sets]),
+                "total_shapes_area_lists": pick(total_shapes_area_lists),
+                "gpt_prompts": pick(gpt_prompts),
+                "gpt_results": [None] * len(uploadable),
+                "changed": pick(changed_flags),
+                "growth": pick([snapshot_fields(snapshot) for snapshot in growth_snapshots]),
+                "contour_storage": chamber_config.contour_storage,
+                "contour_tolerance_px": pick(contour_tolerances),
+            })
+
+        # Create GIFs for each plate of the chamber and queue their upload;
+        # unchanged plates (and all plates in a degraded cycle) catch up on
+        # their next full cycle
+        for plate, changed in zip(plate_ids, changed_flags):
+            if not changed or cycle.degraded:
+                continue
+            with metrics.span("gif", plate=plate):
+                gif_path = update_gif_incrementally(f"captured_images/{chamber}/{plate}", f"{plate}.gif", 200, 0.1, 10)
+            # Only attempt upload if GIF creation succeeded; a newer GIF
+            # replaces the plate's upload still waiting in the spool
             if gif_path:
-                upload_gif_file(gif_path, CHAMBER, plate)
+                self.enqueue_upload("gif", {"gif_path": gif_path, "chamber": chamber, "plate": plate}, gif_path)
             else:
                 print(f"Skipping upload for plate {plate}: GIF not created.")
 
-        time.sleep(INTERVAL_SECONDS)
+        # Timelapse videos only encode the frames added since their last
+        # update, so a degraded cycle can leave them to the next one
+        if VIDEO_ENABLED and not cycle.degraded:
+            video_settings = {"fps": VIDEO_FPS, "segment_frames": VIDEO_SEGMENT_FRAMES, "fourcc": VIDEO_FOURCC}
+            with metrics.span("video"):
+                for plate in plate_ids:
+                    update_segmented_video(
+                        f"captured_images/{chamber}/{plate}", plate, width=VIDEO_PLATE_WIDTH, **video_settings
+                    )
+                update_segmented_video(
+                    os.path.dirname(image_path), chamber, width=VIDEO_CHAMBER_WIDTH, **video_settings
+                )
+
+        # Old captures are packed after the timelapses have encoded them
+        if RETENTION_ENABLED and not cycle.degraded:
+            with metrics.span("retention"):
+                try:
+                    self.apply_retention(timestamp)
+                except OSError as e:
+                    # Nothing is deleted before its archive is written; retry next time
+                    print(f"Retention failed for chamber {chamber}: {e}")
+
+
+def run_chambers(chamber_configs):
+    """
+    Run every chamber of `chamber_configs` from this process, each on its own
+    scheduling thread, until interrupted.
+    """
+    # One Firebase app/bucket/Firestore client for the lifetime of the loop
+    firebase_session = get_firebase_session()
+
+    # Local copy of every plate metric, shared by the chambers
+    plate_store = PlateMetricsStore(PLATE_STORE_PATH)
+
+    # Network work is queued on disk and drained by a background worker, so a
+    # slow or dead uplink never delays the next capture
+    upload_spool = UploadSpool(UPLOAD_SPOOL_PATH)
+    upload_worker = UploadWorker(
+        upload_spool,
+        build_upload_handlers(firebase_session, plate_store),
+        base_delay=UPLOAD_RETRY_BASE_SECONDS,
+        max_delay=UPLOAD_RETRY_MAX_SECONDS,
+        max_attempts=UPLOAD_MAX_ATTEMPTS,
+    )
+    upload_worker.start()
+
+    def enqueue_upload(kind, payload, coalesce_key=None):
+        upload_spool.enqueue(kind, payload, coalesce_key)
+        upload_worker.notify()
+
+    # Uploads and GPT calls report here, cycles to their chamber's metrics.
+    # Both export a "chamber" label: the job's chamber for uploads, "shared"
+    # for the rest
+    configure_metrics(
+        METRICS_ENABLED, None, METRICS_PROMETHEUS_PATH, METRICS_MAX_BYTES, METRICS_BACKUPS, labels={"chamber": "shared"}
+    )
+
+    # Colony detection fans out over worker processes that stay up across cycles
+    analysis_pool = PlateAnalysisPool(ANALYSIS_WORKERS)
+
+    pipelines = []
+    schedulers = []
+    threads = []
+    try:
+        offsets = stagger_offsets(chamber_configs)
+        for chamber_config in chamber_configs:
+            pipeline = ChamberPipeline(chamber_config, enqueue_upload, upload_spool, analysis_pool, plate_store)
+            pipelines.append(pipeline)
+
+            # Captures on a fixed wall-clock grid, shifted per chamber so the
+            # chambers' capture and upload peaks do not coincide
+            scheduler = CycleScheduler(
+                chamber_config.interval_seconds,
+                anchor=offsets[chamber_config.chamber],
+                late_tolerance=SCHEDULE_LATE_TOLERANCE_SECONDS,
+                degrade_ratio=SCHEDULE_DEGRADE_RATIO,
+                metrics=pipeline.metrics,
+            )
+            schedulers.append(scheduler)
+            threads.append(threading.Thread(
+                target=scheduler.run,
+                args=(pipeline.capture, pipeline.process),
+                name=f"chamber-{chamber_config.chamber}",
+                daemon=True,
+            ))
+
+        for thread in threads:
+            thread.start()
+        # join() with a timeout keeps the main thread responsive to Ctrl-C
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1.0)
+    finally:
+        for scheduler in schedulers:
+            scheduler.stop()
+        for thread in threads:
+            if thread.is_alive():
+                thread.join()
+        # Writes of a cycle that failed before waiting for them are finished
+        # rather than cut off with the process
+        flush_image_writes()
+        for pipeline in pipelines:
+            pipeline.close()
+        analysis_pool.close()
+
+        # The spool, the plate store and the Firebase session are still in
+        # use while the worker is busy; a job cut off here is retried on the
+        # next start
+        upload_worker.stop(timeout=UPLOAD_SHUTDOWN_TIMEOUT_SECONDS)
+        if upload_worker.is_alive():
+            print(f"Upload worker still busy after {UPLOAD_SHUTDOWN_TIMEOUT_SECONDS}s, leaving its job in the spool.")
+        else:
+            upload_spool.close()
+            plate_store.close()
+            firebase_session.close()
+
+
+def run_capture_loop():
+    """The single chamber described by config.py."""
+    run_chambers([default_chamber_config()])
 
 
 if __name__ == "__main__":
-    run_capture_loop()
+    parser = argparse.ArgumentParser(description="Capture, analyze and upload plate images.")
+    parser.add_argument(
+        "--chambers",
+        default=CHAMBERS_CONFIG_PATH,
+        help="JSON list of chamber configs to run from this process (default: the chamber in config.py)",
+    )
+    args = parser.parse_args()
+
+    if args.chambers:
+        run_chambers(load_chamber_configs(args.chambers))
+    else:
+        run_capture_loop()
@@ -0,0 +1,44 @@
+"""
+Full-frame rotate-then-crop vs. warping straight into the crop window, on a
+synthetic 12MP (4056x3040) frame with the configured angle and crop.
+
+Run from the repository root: python benchmarks/rotate_and_crop_benchmark.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import ROTATION_ANGLE, RAW_COORDINATES
+from image_processing.rotate_and_crop_image import rotate_and_crop_image
+
+REPEATS = 10
+
+
+def best_time(func):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (3040, 4056, 3), dtype=np.uint8)
+
+    full = rotate_and_crop_image(frame, ROTATION_ANGLE, RAW_COORDINATES, roi_only=False)
+    roi = rotate_and_crop_image(frame, ROTATION_ANGLE, RAW_COORDINATES)
+    diff = np.abs(full.astype(np.int16) - roi).max()
+
+    full_time = best_time(lambda: rotate_and_crop_image(frame, ROTATION_ANGLE, RAW_COORDINATES, roi_only=False))
+    roi_time = best_time(lambda: rotate_and_crop_image(frame, ROTATION_ANGLE, RAW_COORDINATES))
+
+    print(f"frame 4056x3040, angle {ROTATION_ANGLE}, crop {RAW_COORDINATES}")
+    print(f"full frame warp + crop: {full_time * 1000:.1f} ms")
+    print(f"ROI-only warp:          {roi_time * 1000:.1f} ms ({full_time / roi_time:.1f}x)")
+    print(f"max pixel difference:   {diff}")
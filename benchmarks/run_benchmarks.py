@@ -0,0 +1,216 @@
+"""
+Stage-level benchmarks on synthetic frames.
+
+Times every pipeline stage across frame sizes and, for the GIF stages,
+across history lengths, and writes the timings to a JSON file named after
+the current commit so runs can be compared:
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 2100x1450 --history 50 --repeats 3
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/benchmark_<old>.json
+
+Run from the repository root. No camera, network or Firebase needed.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import cv2
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic_plates import plate_layout, synthetic_frame, sensor_frame
+from config import ROTATION_ANGLE
+from image_processing.rotate_and_crop_image import rotate_and_crop_image
+from image_processing.cut_and_save_circle_snippets import cut_circle_snippets, cut_and_save_circle_snippets
+from image_processing.calculate_mean_intensities import calculate_mean_intensities
+from image_processing.calculate_green_object_area import calculate_green_object_area
+from image_processing.plate_metrics import compute_plate_metrics
+from image_processing.calculate_contour import calculate_contour, detect_colonies
+from image_processing.plate_geometry import get_plate_geometry
+from image_processing.create_gif_from_images import create_gif_from_images
+from image_processing.update_gif_incrementally import update_gif_incrementally
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# Real setup: 2100x1450 crop at (630, 520) of a 4056x3040 sensor frame
+REFERENCE_CROP = (630, 520, 2100, 1450)
+REFERENCE_SENSOR = (4056, 3040)
+
+START = datetime(2025, 12, 1, 8, 0, 0, tzinfo=timezone.utc)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def timed(func, repeats):
+    """Best and median wall time of `repeats` calls, in ms; the stage's own prints are swallowed."""
+    timings = []
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+    return {"best_ms": round(min(timings), 3), "median_ms": round(statistics.median(timings), 3), "repeats": repeats}
+
+
+def capture_name(index):
+    ts = (START + timedelta(minutes=30 * index)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return f"captured_image_{ts}.png"
+
+
+def frame_stages(width, height, repeats, workdir):
+    scale = width / REFERENCE_CROP[2]
+    sensor_size = (int(REFERENCE_SENSOR[0] * scale), int(REFERENCE_SENSOR[1] * scale))
+    crop = [int(REFERENCE_CROP[0] * scale), int(REFERENCE_CROP[1] * scale), width, height]
+
+    circles = plate_layout(width, height)
+    frame = synthetic_frame(width, height, circles, colonies=40, contamination=0.5, seed=1)
+    sensor = sensor_frame(frame, ROTATION_ANGLE, crop, sensor_size)
+    snippets = [s.copy() for s in cut_circle_snippets(frame, circles)]
+    geometry = get_plate_geometry(circles, frame.shape)
+
+    params = {"width": width, "height": height, "plates": len(circles), "plate_radius": circles[0][2]}
+    stages = {
+        "rotate_and_crop_image[full_frame]":
+            lambda: rotate_and_crop_image(sensor, ROTATION_ANGLE, crop, roi_only=False),
+        "rotate_and_crop_image[roi_only]":
+            lambda: rotate_and_crop_image(sensor, ROTATION_ANGLE, crop),
+        "cut_circle_snippets":
+            lambda: cut_circle_snippets(frame, circles),
+        "cut_and_save_circle_snippets":
+            lambda: cut_and_save_circle_snippets(frame, circles, [f"P{i}" for i in range(len(circles))],
+                                                 "BENCH", "captured_image_bench.png"),
+        "calculate_mean_intensities":
+            lambda: calculate_mean_intensities(snippets),
+        "calculate_green_object_area":
+            lambda: calculate_green_object_area(snippets),
+        "compute_plate_metrics":
+            lambda: compute_plate_metrics(frame, circles),
+        "calculate_contour":
+            lambda: [calculate_contour(s) for s in snippets],
+        "detect_colonies[geometry]":
+            lambda: [detect_colonies(s, geometry=roi) for s, roi in zip(snippets, geometry)],
+    }
+
+    cwd = os.getcwd()
+    os.chdir(workdir)  # cut_and_save_circle_snippets writes under ./captured_images
+    try:
+        return [{"stage": name, "params": params, **timed(func, repeats)} for name, func in stages.items()]
+    finally:
+        os.chdir(cwd)
+
+
+def gif_stages(history, repeats, workdir):
+    folder = os.path.join(workdir, f"history_{history}", "captured_images", "BENCH", "P1")
+    os.makedirs(folder)
+    for i in range(history):
+        plate = synthetic_frame(500, 500, [(250, 250, 250)], colonies=5 + i // 4, noise=0, seed=i)
+        cv2.imwrite(os.path.join(folder, capture_name(i)), plate)
+
+    params = {"history": history, "width": 200, "skip": 1}
+    results = [{
+        "stage": "create_gif_from_images",
+        "params": params,
+        **timed(lambda: create_gif_from_images(folder, "full.gif", 200, 0.1, 1), repeats),
+    }]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        update_gif_incrementally(folder, "incremental.gif", 200, 0.1, 1)
+
+    # One new capture per call, like the capture loop
+    counter = iter(range(history, history + repeats))
+
+    def append_one():
+        i = next(counter)
+        plate = synthetic_frame(500, 500, [(250, 250, 250)], colonies=5 + i // 4, noise=0, seed=i)
+        cv2.imwrite(os.path.join(folder, capture_name(i)), plate)
+        update_gif_incrementally(folder, "incremental.gif", 200, 0.1, 1)
+
+    results.append({"stage": "update_gif_incrementally[append]", "params": params, **timed(append_one, repeats)})
+    return results
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {(r["stage"], json.dumps(r["params"], sort_keys=True)): r for r in baseline["results"]}
+
+    print(f"\nvs {baseline.get('commit', '?')} ({baseline_path}):")
+    for r in current["results"]:
+        old = before.get((r["stage"], json.dumps(r["params"], sort_keys=True)))
+        if old is None:
+            continue
+        ratio = r["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        print(f"  {r['stage']:<38} {old['median_ms']:>10.2f} -> {r['median_ms']:>10.2f} ms  ({ratio:.2f}x)")
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="2100x1450,4200x2900", help="comma-separated crop sizes WxH")
+    parser.add_argument("--history", default="50,200", help="comma-separated GIF history lengths")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="result file, default benchmarks/results/benchmark_<commit>.json")
+    parser.add_argument("--compare", help="earlier result file to print ratios against")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": [],
+    }
+
+    workdir = tempfile.mkdtemp(prefix="spore_bench_")
+    try:
+        for size in args.sizes.split(","):
+            width, height = parse_size(size)
+            report["results"] += frame_stages(width, height, args.repeats, workdir)
+        for history in args.history.split(","):
+            report["results"] += gif_stages(int(history), args.repeats, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for r in report["results"]:
+        print(f"{r['stage']:<38} {json.dumps(r['params'], sort_keys=True):<70} "
+              f"best {r['best_ms']:>10.2f} ms  median {r['median_ms']:>10.2f} ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Synthetic chamber frames for benchmarks and tests: bright agar plates on a
+dark background, with dark colonies of controllable count and size and
+optional green contamination patches.
+"""
+import cv2
+import numpy as np
+
+
+def plate_layout(width, height, rows=2, cols=3, fill=0.9):
+    """CIRCLE_COORDS-style (cx, cy, r) list for a rows x cols grid of plates filling the frame."""
+    cell_w, cell_h = width / cols, height / rows
+    r = int(min(cell_w, cell_h) * fill / 2)
+    return [
+        (int(cell_w * (col + 0.5)), int(cell_h * (row + 0.5)), r)
+        for row in range(rows)
+        for col in range(cols)
+    ]
+
+
+def synthetic_frame(width, height, circles=None, colonies=40, colony_radius=(6, 30),
+                    contamination=0.0, noise=8, seed=0):
+    """
+    BGR frame of `width` x `height` with one agar plate per circle.
+
+    colonies: dark colonies per plate
+    colony_radius: (min, max) colony radius in pixels, scaled to the plate size
+                   relative to the 500 px plates of the real setup
+    contamination: fraction of plates that get a green mould patch
+    noise: amplitude of per-pixel sensor noise
+    """
+    rng = np.random.default_rng(seed)
+    if circles is None:
+        circles = plate_layout(width, height)
+
+    frame = np.full((height, width, 3), 35, dtype=np.uint8)
+    for index, (cx, cy, r) in enumerate(circles):
+        agar = tuple(int(v) for v in rng.integers(175, 215, 3))
+        cv2.circle(frame, (cx, cy), r, agar, -1)
+        # Slightly darker rim, like the plate wall
+        cv2.circle(frame, (cx, cy), r, tuple(max(v - 40, 0) for v in agar), max(2, r // 60))
+
+        scale = r / 250
+        for _ in range(colonies):
+            radius = int(rng.integers(colony_radius[0], colony_radius[1] + 1) * scale) + 1
+            angle = rng.uniform(0, 2 * np.pi)
+            distance = rng.uniform(0, 0.85) * (r - radius)
+            center = (int(cx + distance * np.cos(angle)), int(cy + distance * np.sin(angle)))
+            axes = (radius, max(1, int(radius * rng.uniform(0.6, 1.0))))
+            shade = int(rng.integers(25, 110))
+            cv2.ellipse(frame, center, axes, float(rng.uniform(0, 180)), 0, 360, (shade, shade + 8, shade), -1)
+
+        if rng.random() < contamination:
+            radius = int(rng.integers(20, 60) * scale) + 1
+            center = (int(cx + rng.uniform(-0.5, 0.5) * r), int(cy + rng.uniform(-0.5, 0.5) * r))
+            cv2.circle(frame, center, radius, (40, 190, 60), -1)
+
+    if noise:
+        frame = cv2.add(frame, rng.integers(0, noise, frame.shape, dtype=np.uint8))
+    return frame
+
+
+def sensor_frame(crop_frame, angle, raw_coordinates, sensor_size=(4056, 3040)):
+    """
+    Embed a cropped frame into a full sensor-sized frame, rotated so that
+    rotate_and_crop_image(sensor, angle, raw_coordinates) gives it back.
+    """
+    width, height = sensor_size
+    x, y, w, h = raw_coordinates
+    sensor = np.full((height, width, 3), 35, dtype=np.uint8)
+    sensor[y:y + h, x:x + w] = crop_frame[:h, :w]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1)
+    return cv2.warpAffine(sensor, matrix, (width, height))
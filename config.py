@@ -13,6 +13,161 @@ CIRCLE_COORDS = [
         (1640, 1000, 250),
     ]
 
+# --- Upload Settings ---
+# Firestore batch limits (hard limits are 500 writes / 10 MiB per commit)
+FIRESTORE_BATCH_WRITES = 400
+FIRESTORE_BATCH_BYTES = 8 * 1024 * 1024
+
+# Durable upload queue drained by a background worker
+UPLOAD_SPOOL_PATH = "upload_spool.sqlite3"
+UPLOAD_RETRY_BASE_SECONDS = 5
+UPLOAD_RETRY_MAX_SECONDS = 10 * 60
+UPLOAD_MAX_ATTEMPTS = 50
+# On shutdown the worker finishes the job in hand for at most this long;
+# unfinished jobs stay in the spool for the next start
+UPLOAD_SHUTDOWN_TIMEOUT_SECONDS = 30
+
+# --- GPT Analysis ---
+GPT_MAX_CONCURRENCY = 3
+GPT_TIMEOUT_SECONDS = 90
+GPT_REQUESTS_PER_MINUTE = 20
+GPT_TOKENS_PER_MINUTE = 60000
+# Rough per-request cost (image + prompt + answer) charged against the token budget
+GPT_TOKENS_PER_REQUEST = 1500
+
+# Reuse the previous answer while a plate looks the same (perceptual hash
+# within GPT_CACHE_MAX_DISTANCE bits, same culture and elapsed-hours bucket)
+GPT_CACHE_PATH = "gpt_analysis_cache.json"
+GPT_CACHE_TTL_SECONDS = 6 * 60 * 60
+GPT_CACHE_MAX_ENTRIES = 256
+GPT_CACHE_MAX_DISTANCE = 4
+GPT_CACHE_HOURS_BUCKET = 12
+
+# --- Change Detection ---
+# A plate whose snippet differs from its last processed one by less than
+# CHANGE_THRESHOLD gray levels (mean over a CHANGE_THUMBNAIL_SIZE² thumbnail)
+# skips contours, shape upload, GPT and the GIF append, at most for
+# CHANGE_REFRESH_SECONDS at a time
+CHANGE_THRESHOLD = 3.0
+CHANGE_REFRESH_SECONDS = 6 * 60 * 60
+CHANGE_THUMBNAIL_SIZE = 64
+
+# --- Camera ---
+# "picamera2": one camera session kept open across captures
+# "rpicam-still": one rpicam-still process per capture (old behaviour)
+# "replay": plays back the images in CAMERA_REPLAY_FOLDER, no camera needed
+# "synthetic": generated plates in the chamber's layout, for tests and benchmarks
+CAMERA_BACKEND = "picamera2"
+# picamera2 capture size; None uses the sensor's full resolution, as
+# rpicam-still does, which RAW_COORDINATES and CIRCLE_COORDS are measured in
+CAMERA_RESOLUTION = None
+CAMERA_WARMUP_SECONDS = 2.0
+# picamera2 only: freeze exposure and white balance after the warm-up so
+# frames are comparable, re-converging every CAMERA_RELOCK_EVERY captures
+# (None: never). Off by default, the lighting of a chamber can drift.
+CAMERA_LOCK_EXPOSURE = False
+CAMERA_RELOCK_EVERY = 12
+CAMERA_REPLAY_FOLDER = "replay_images"
+
+# --- Scheduling ---
+# Captures run on a grid of INTERVAL_SECONDS aligned to the epoch (on the hour
+# and half hour with 30 minutes). A slot missed by more than
+# SCHEDULE_LATE_TOLERANCE_SECONDS is skipped; after a cycle that used more than
+# SCHEDULE_DEGRADE_RATIO of the interval the next one reuses colonies and
+# skips GIF updates
+SCHEDULE_LATE_TOLERANCE_SECONDS = 5
+SCHEDULE_DEGRADE_RATIO = 0.8
+
+# --- Instrumentation ---
+# Per-stage timings and counters: one JSON line per cycle (rolled over at
+# METRICS_MAX_BYTES, METRICS_BACKUPS old files kept) and a Prometheus
+# text-format file for node_exporter's textfile collector
+METRICS_ENABLED = True
+METRICS_JSONL_PATH = "metrics/cycles.jsonl"
+METRICS_PROMETHEUS_PATH = "metrics/sporescope.prom"
+METRICS_MAX_BYTES = 5 * 1024 * 1024
+METRICS_BACKUPS = 3
+
+# --- Timelapse Video ---
+# Segmented timelapses encoded as captures arrive (image_processing.segmented_video):
+# one per plate (snippets, VIDEO_PLATE_WIDTH px wide, None = as captured) and
+# one per chamber from the raw frames, downscaled to VIDEO_CHAMBER_WIDTH px.
+# A segment is closed and added to the .ffconcat playlist every
+# VIDEO_SEGMENT_FRAMES frames (48 = one day at 30 minute intervals)
+VIDEO_ENABLED = True
+VIDEO_FPS = 10
+VIDEO_SEGMENT_FRAMES = 48
+VIDEO_FOURCC = "XVID"
+VIDEO_PLATE_WIDTH = None
+VIDEO_CHAMBER_WIDTH = 1024
+
+# --- Retention ---
+# Captures older than RETENTION_KEEP_DAYS are packed into one archive per
+# folder per day (image_processing.retention, read back transparently by the
+# GIF/video builders and replay); days older than RETENTION_THIN_AFTER_DAYS
+# keep one frame every RETENTION_THIN_INTERVAL_HOURS (None keeps them all).
+# Each chamber checks every RETENTION_CHECK_HOURS; captures still waiting to
+# be uploaded are never archived. A check packs at most
+# RETENTION_MAX_DAYS_PER_PASS folder-days inside the capture cycle; a longer
+# backlog is spread over the next full cycles
+RETENTION_ENABLED = True
+RETENTION_KEEP_DAYS = 7
+RETENTION_THIN_AFTER_DAYS = 60
+RETENTION_THIN_INTERVAL_HOURS = 6
+RETENTION_CHECK_HOURS = 24
+RETENTION_MAX_DAYS_PER_PASS = 4
+
+# --- Local Metrics Store ---
+# Every per-plate metric of every cycle is kept in this SQLite file
+# (core.plate_store); Firestore is a replica fed by the upload worker
+PLATE_STORE_PATH = "plate_metrics.sqlite3"
+
+# --- Growth Analytics ---
+# Growth follows GROWTH_METRIC, a column of the local metrics store:
+# "total_shape_area_mm2" (default) sums the colony contours, which come from
+# a local threshold and so do not depend on the exposure, but stop at about a
+# quarter of the plate each. "covered_area_mm2" counts the pixels of a
+# plate's safe circle whose blurred gray level is below COVERED_GRAY_LEVEL
+# (bare agar is ~175-215) and keeps rising until the plate is full; the level
+# is absolute, so only opt in with CAMERA_LOCK_EXPOSURE and tune it to the
+# chamber's lighting. The growth rate is the slope of
+# ln(area + GROWTH_AREA_FLOOR_MM2)
+# over the last GROWTH_WINDOW_SAMPLES cycles; rates below
+# GROWTH_MIN_RATE_PER_HOUR count as no growth (no doubling time / lag yet).
+# Time to coverage is when the smoothed area first covers
+# GROWTH_COVERAGE_FRACTION of the measurable (safe circle) area of a
+# DIAMETER_MM plate
+GROWTH_METRIC = "total_shape_area_mm2"
+COVERED_GRAY_LEVEL = 140
+GROWTH_WINDOW_SAMPLES = 6
+GROWTH_AREA_FLOOR_MM2 = 1.0
+GROWTH_MIN_RATE_PER_HOUR = 0.01
+GROWTH_COVERAGE_FRACTION = 0.95
+
+# --- Chambers ---
+# JSON list of chambers to run from this process (fields of
+# core.chambers.ChamberConfig, missing ones default to the values in this
+# file); None runs the single chamber configured here. Chambers share one
+# upload worker and analysis pool, their captures are staggered so no two
+# chambers capture at once (also with different interval_seconds) and each
+# writes its own metrics files (METRICS_*_PATH + _<chamber>)
+CHAMBERS_CONFIG_PATH = None
+
+# --- Plate Analysis ---
+# Worker processes for per-plate colony detection (0 = run in the capture loop);
+# leave a core free for capture and uploads
+ANALYSIS_WORKERS = 3
+
+# --- Contour Storage ---
+# "shapes": one Firestore doc per shape with {x, y} maps (what the web viewer reads today)
+# "encoded": one bytes field per snippet (contour_codec), no shape docs
+# "both": write both
+CONTOUR_STORAGE = "both"
+# Simplification tolerance in pixels for the encoded contours, 0 = lossless;
+# one value for every plate or one per PLATE_ID. Both are defaults of the
+# chamber configs (contour_storage / contour_tolerance_px fields)
+CONTOUR_TOLERANCE_PX = [1.0]
+
 # --- Experiment Metadata ---
 SUBSTRATE = "Agar plate 58mm diameter"
 DIAMETER_PX = 500
@@ -0,0 +1,251 @@
+import os
+import subprocess
+import tempfile
+import time
+
+import cv2
+
+from image_processing.frame_archive import archived_frames, load_frame
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+class CameraBackend:
+    """
+    Source of full-resolution BGR frames. open() prepares the camera,
+    capture() returns one frame as an array (None on failure), close()
+    releases it. Usable as a context manager.
+    """
+
+    name = "base"
+
+    def open(self):
+        return self
+
+    def capture(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RpicamStillCamera(CameraBackend):
+    """One rpicam-still process per frame, as core.capture_image does. Slow but dependency-free."""
+
+    name = "rpicam-still"
+
+    def __init__(self, extra_args=None):
+        self.extra_args = list(extra_args or [])
+
+    def capture(self):
+        fd, path = tempfile.mkstemp(suffix=".png", prefix="rpicam_")
+        os.close(fd)
+        try:
+            subprocess.run(
+                ["rpicam-still", "-o", path, "-n", "--encoding", "png", *self.extra_args],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True
+            )
+            return cv2.imread(path, cv2.IMREAD_COLOR)
+        except Exception as e:
+            print(f"Error capturing image: {e}")
+            return None
+        finally:
+            os.remove(path)
+
+
+class Picamera2Camera(CameraBackend):
+    """
+    Keeps one configured Picamera2 session open across captures, so sensor
+    start-up and auto-exposure convergence are paid once instead of per frame.
+    Frames come straight from the ISP as arrays, without a PNG round trip.
+
+    resolution: (width, height) to capture at; None takes the sensor's full
+                resolution, like rpicam-still, so RAW_COORDINATES and
+                CIRCLE_COORDS keep pointing at the same pixels
+    lock_exposure: after the warm-up, freeze exposure and gains at their
+                   converged values so consecutive frames are comparable.
+                   Off by default: a lock taken at night or under a warming
+                   lamp would stay wrong for the whole run.
+    relock_every: with lock_exposure, let auto-exposure converge again and
+                  re-lock every this many captures (None: lock once)
+    camera_num: which camera to open on boards with several
+
+    A capture that fails closes the session; the next capture reopens it.
+    """
+
+    name = "picamera2"
+
+    def __init__(self, resolution=None, warmup_seconds=2.0, lock_exposure=False, relock_every=None,
+                 controls=None, camera_num=0):
+        self.camera_num = camera_num
+        self.resolution = tuple(resolution) if resolution else None
+        self.warmup_seconds = warmup_seconds
+        self.lock_exposure = lock_exposure
+        self.relock_every = relock_every
+        self.controls = dict(controls or {})
+        self._camera = None
+        self._captures_since_lock = 0
+
+    def open(self):
+        if self._camera is not None:
+            return self
+
+        try:
+            from picamera2 import Picamera2
+        except ImportError as e:
+            raise ImportError("The picamera2 backend needs the picamera2 package (apt install python3-picamera2).") from e
+
+        camera = Picamera2(self.camera_num)
+        # "RGB888" is BGR byte order in memory, what OpenCV expects
+        size = self.resolution or tuple(camera.sensor_resolution)
+        config = camera.create_still_configuration(main={"size": size, "format": "RGB888"})
+        camera.configure(config)
+        if self.controls:
+            camera.set_controls(self.controls)
+        camera.start()
+        time.sleep(self.warmup_seconds)
+
+        if self.lock_exposure:
+            self._lock(camera)
+
+        self._camera = camera
+        return self
+
+    def _lock(self, camera):
+        """Freeze exposure and gains at the values auto-exposure converged to."""
+        metadata = camera.capture_metadata()
+        camera.set_controls({
+            "AeEnable": False,
+            "AwbEnable": False,
+            "ExposureTime": metadata["ExposureTime"],
+            "AnalogueGain": metadata["AnalogueGain"],
+            "ColourGains": metadata["ColourGains"],
+        })
+        self._captures_since_lock = 0
+
+    def _relock(self):
+        """Hand exposure back to the auto algorithms for a warm-up, then lock again."""
+        self._camera.set_controls({"AeEnable": True, "AwbEnable": True})
+        time.sleep(self.warmup_seconds)
+        self._lock(self._camera)
+
+    def capture(self):
+        try:
+            self.open()
+            if self.lock_exposure and self.relock_every and self._captures_since_lock >= self.relock_every:
+                self._relock()
+            frame = self._camera.capture_array("main")
+            self._captures_since_lock += 1
+            return frame
+        except ImportError:
+            raise
+        except Exception as e:
+            print(f"Error capturing image: {e}")
+            # A failed session is reopened on the next capture
+            self.close()
+            return None
+
+    def close(self):
+        camera, self._camera = self._camera, None
+        if camera is None:
+            return
+        try:
+            camera.stop()
+            camera.close()
+        except Exception as e:
+            print(f"Error closing camera: {e}")
+
+
+class FileReplayCamera(CameraBackend):
+    """
+    Replays the images of a folder in name order (timestamped captures sort
+    chronologically), so the pipeline can run without a camera. Captures
+    compacted into the folder's day archives are replayed too.
+    """
+
+    name = "replay"
+
+    def __init__(self, folder, loop=True):
+        self.folder = folder
+        self.loop = loop
+        self._paths = None
+        self._next = 0
+
+    def open(self):
+        if self._paths is None:
+            names = {name for name in os.listdir(self.folder) if name.lower().endswith(IMAGE_EXTENSIONS)}
+            names.update(frame.filename for frame in archived_frames(self.folder))
+            self._paths = sorted(os.path.join(self.folder, name) for name in names)
+            if not self._paths:
+                raise FileNotFoundError(f"No images to replay in {self.folder}")
+        return self
+
+    def capture(self):
+        self.open()
+        if self._next >= len(self._paths):
+            if not self.loop:
+                return None
+            self._next = 0
+
+        path = self._paths[self._next]
+        self._next += 1
+        frame = load_frame(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            print(f"Error capturing image: cannot read {path}")
+        return frame
+
+
+class SyntheticCamera(CameraBackend):
+    """
+    Generated chamber frames (benchmarks.synthetic_plates) in the layout of
+    the chamber, rotated into a sensor-sized frame like a real capture, so
+    the whole pipeline can run and be benchmarked without a camera or a
+    folder of recorded images. Colonies grow by `growth` per capture.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, circle_coords, rotation_angle=0, raw_coordinates=None, sensor_size=(4056, 3040),
+                 colonies=10, growth=2, seed=0):
+        self.circle_coords = [tuple(c) for c in circle_coords]
+        self.rotation_angle = rotation_angle
+        self.raw_coordinates = list(raw_coordinates) if raw_coordinates else [0, 0, *sensor_size]
+        self.sensor_size = tuple(sensor_size)
+        self.colonies = colonies
+        self.growth = growth
+        self.seed = seed
+        self._captures = 0
+
+    def capture(self):
+        from benchmarks.synthetic_plates import sensor_frame, synthetic_frame
+
+        _, _, width, height = self.raw_coordinates
+        colonies = self.colonies + self.growth * self._captures
+        self._captures += 1
+        crop = synthetic_frame(width, height, self.circle_coords, colonies=colonies, seed=self.seed)
+        return sensor_frame(crop, self.rotation_angle, self.raw_coordinates, self.sensor_size)
+
+
+CAMERA_BACKENDS = {
+    RpicamStillCamera.name: RpicamStillCamera,
+    Picamera2Camera.name: Picamera2Camera,
+    FileReplayCamera.name: FileReplayCamera,
+    SyntheticCamera.name: SyntheticCamera,
+}
+
+
+def create_camera(backend, **options):
+    """Camera backend by name ("rpicam-still", "picamera2", "replay" or "synthetic")."""
+    try:
+        camera_class = CAMERA_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown camera backend {backend!r}, expected one of {sorted(CAMERA_BACKENDS)}") from None
+    return camera_class(**options)
@@ -0,0 +1,123 @@
+import json
+import math
+import os
+from collections import namedtuple
+
+import config
+
+ChamberConfig = namedtuple("ChamberConfig", [
+    "chamber",
+    "plate_ids",
+    "circle_coords",
+    "raw_coordinates",
+    "rotation_angle",
+    "cultures",
+    "plate_start_times",
+    "substrate",
+    "interval_seconds",
+    "camera_backend",
+    "camera_options",
+    "contour_storage",
+    "contour_tolerance_px",
+])
+
+CONTOUR_STORAGE_MODES = ("shapes", "encoded", "both")
+
+
+def default_chamber_config():
+    """The single chamber described by the constants in config.py."""
+    camera_options = {
+        "picamera2": {
+            "resolution": config.CAMERA_RESOLUTION,
+            "warmup_seconds": config.CAMERA_WARMUP_SECONDS,
+            "lock_exposure": config.CAMERA_LOCK_EXPOSURE,
+            "relock_every": config.CAMERA_RELOCK_EVERY,
+        },
+        "replay": {"folder": config.CAMERA_REPLAY_FOLDER},
+    }.get(config.CAMERA_BACKEND, {})
+    tolerances = config.CONTOUR_TOLERANCE_PX
+
+    return ChamberConfig(
+        chamber=config.CHAMBER,
+        plate_ids=list(config.PLATE_ID),
+        circle_coords=[tuple(c) for c in config.CIRCLE_COORDS],
+        raw_coordinates=list(config.RAW_COORDINATES),
+        rotation_angle=config.ROTATION_ANGLE,
+        cultures=list(config.CULTURE),
+        plate_start_times=list(config.PLATE_START_TIME),
+        substrate=config.SUBSTRATE,
+        interval_seconds=config.INTERVAL_SECONDS,
+        camera_backend=config.CAMERA_BACKEND,
+        camera_options=camera_options,
+        contour_storage=config.CONTOUR_STORAGE,
+        contour_tolerance_px=list(tolerances) if isinstance(tolerances, list) else [tolerances],
+    )
+
+
+def load_chamber_configs(path):
+    """
+    Chamber configs from a JSON file holding a list of objects with the
+    ChamberConfig fields. Fields left out take the config.py value, so a
+    chamber only needs what differs, e.g.
+
+        [{"chamber": "CHA-1", "camera_options": {"camera_num": 0}},
+         {"chamber": "CHA-2", "camera_options": {"camera_num": 1},
+          "plate_ids": ["PLT-7", "PLT-8"], "circle_coords": [[505, 455, 250], [1065, 450, 250]]}]
+    """
+    with open(path) as f:
+        entries = json.load(f)
+
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path} must hold a non-empty list of chamber objects.")
+
+    defaults = default_chamber_config()._asdict()
+    chambers = []
+    for entry in entries:
+        unknown = set(entry) - set(ChamberConfig._fields)
+        if unknown:
+            raise ValueError(f"Unknown chamber config field(s) in {path}: {', '.join(sorted(unknown))}")
+
+        fields = {**defaults, **entry}
+        if fields["camera_backend"] == defaults["camera_backend"]:
+            # e.g. only camera_num given: keep the configured resolution/warm-up
+            fields["camera_options"] = {**defaults["camera_options"], **entry.get("camera_options", {})}
+        fields["circle_coords"] = [tuple(c) for c in fields["circle_coords"]]
+        chamber = ChamberConfig(**fields)
+
+        if len(chamber.circle_coords) != len(chamber.plate_ids):
+            raise ValueError(f"Chamber {chamber.chamber}: circle_coords and plate_ids must have the same length.")
+        if not isinstance(chamber.contour_tolerance_px, list):
+            chamber = chamber._replace(contour_tolerance_px=[chamber.contour_tolerance_px])
+        for field in ("cultures", "plate_start_times", "contour_tolerance_px"):
+            if len(getattr(chamber, field)) not in (1, len(chamber.plate_ids)):
+                raise ValueError(f"Chamber {chamber.chamber}: {field} must have 1 entry or one per plate.")
+        if chamber.contour_storage not in CONTOUR_STORAGE_MODES:
+            raise ValueError(f"Chamber {chamber.chamber}: contour_storage must be one of {CONTOUR_STORAGE_MODES}.")
+        chambers.append(chamber)
+
+    names = [c.chamber for c in chambers]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate chamber ids in {path}.")
+    return chambers
+
+
+def stagger_offsets(chambers):
+    """
+    Schedule anchor per chamber: all chambers are spread evenly across the
+    greatest common divisor of their intervals (the smallest interval if
+    they are not whole seconds). Every capture time of a chamber then falls
+    at its own offset within that period, so no two chambers ever capture
+    or upload at the same moment, whatever their intervals.
+    """
+    intervals = [chamber.interval_seconds for chamber in chambers]
+    if all(float(interval).is_integer() for interval in intervals):
+        period = math.gcd(*(int(interval) for interval in intervals))
+    else:
+        period = min(intervals)
+    return {chamber.chamber: period * i / len(chambers) for i, chamber in enumerate(chambers)}
+
+
+def chamber_path(path, chamber):
+    """Per-chamber variant of a file path: metrics/cycles.jsonl -> metrics/cycles_<chamber>.jsonl."""
+    root, ext = os.path.splitext(path)
+    return f"{root}_{chamber}{ext}"
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+
+import math
+import sys
+from collections import deque, namedtuple
+
+import numpy as np
+
+LN2 = math.log(2)
+
+# Per-sample growth values; None (NaN in recompute_growth arrays) while unknown.
+# growth_rate_per_hour: specific growth rate, slope of ln(area) over the window
+# lag_hours: end of the lag phase, where the tangent at the fastest growth so
+#            far crosses the starting area (the classic lag-time construction)
+# time_to_coverage_hours: first time the smoothed area covers
+#                         `coverage_fraction` of the measurable area
+GrowthSnapshot = namedtuple("GrowthSnapshot", [
+    "elapsed_hours",
+    "area_mm2",
+    "smoothed_area_mm2",
+    "growth_rate_per_hour",
+    "doubling_time_hours",
+    "lag_hours",
+    "coverage_fraction",
+    "time_to_coverage_hours",
+    "samples",
+])
+
+GROWTH_DTYPE = np.dtype([(name, np.float64) for name in GrowthSnapshot._fields])
+
+
+def _slope(n, m2x, cxy):
+    # Guards against a window of (nearly) identical times
+    if n < 2 or m2x <= 1e-12:
+        return None
+    return cxy / m2x
+
+
+def _crossing(x0, c0, x1, c1, target):
+    """Time at which coverage reached `target` between two samples (linear)."""
+    if x0 is None or c0 is None or c1 == c0:
+        return x1
+    return x0 + (target - c0) / (c1 - c0) * (x1 - x0)
+
+
+class PlateGrowth:
+    """
+    Running growth state of one plate, updated in O(1) per sample.
+
+    ln(area + area_floor) is fitted against elapsed hours over the last
+    `window` samples by least squares. The window's means and centered
+    sums of squares are updated in place (Welford-style: the new sample
+    added, the one leaving the window removed), so an update never looks at
+    the history and precision does not drift over months of samples. The
+    fitted value at the newest sample is the smoothed area. Only full
+    windows compete for the fastest growth rate, so the noisy first samples
+    cannot set the lag phase.
+
+    measurable_area_mm2 is the most the area can reach (the plate's safe
+    circle, calculate_contour.measurable_area_mm2); coverage is relative to it.
+    """
+
+    def __init__(self, window=6, area_floor=1.0, min_rate=0.01, measurable_area_mm2=None, coverage_fraction=0.95):
+        if window < 2:
+            raise ValueError("window must hold at least 2 samples.")
+        self.window = window
+        self.area_floor = area_floor
+        self.min_rate = min_rate
+        self.measurable_area_mm2 = measurable_area_mm2
+        self.coverage_fraction = coverage_fraction
+
+        self.samples = 0
+        self.snapshot = None
+        self._points = deque()
+        # Window means, sum of squared x deviations, sum of x*y co-deviations
+        self._mx = self._my = self._m2x = self._cxy = 0.0
+        self._x0 = self._y0 = None
+        self._best_rate = -math.inf
+        self._best_center = None
+        self._last_x = None
+        self._last_coverage = None
+        self._time_to_coverage = None
+
+    def update(self, elapsed_hours, area_mm2):
+        """Add one sample and return the GrowthSnapshot; samples not newer than the last are ignored."""
+        if area_mm2 is None or (self._last_x is not None and elapsed_hours <= self._last_x):
+            return self.snapshot
+
+        x = float(elapsed_hours)
+        y = math.log(max(float(area_mm2), 0.0) + self.area_floor)
+        if self._x0 is None:
+            self._x0, self._y0 = x, y
+
+        self._points.append((x, y))
+        n = len(self._points)
+        dx = x - self._mx
+        self._mx += dx / n
+        self._my += (y - self._my) / n
+        self._m2x += dx * (x - self._mx)
+        self._cxy += dx * (y - self._my)
+        if n > self.window:
+            old_x, old_y = self._points.popleft()
+            n -= 1
+            mx_before = self._mx
+            self._mx -= (old_x - self._mx) / n
+            self._m2x -= (old_x - self._mx) * (old_x - mx_before)
+            self._cxy -= (old_x - self._mx) * (old_y - self._my)
+            self._my -= (old_y - self._my) / n
+        self.samples += 1
+
+        x_mean = self._mx
+        y_mean = self._my
+        rate = _slope(n, self._m2x, self._cxy)
+        fitted = y_mean if rate is None else y_mean + rate * (x - x_mean)
+        smoothed = max(math.exp(fitted) - self.area_floor, 0.0)
+
+        if rate is not None and n == self.window and rate > self._best_rate:
+            self._best_rate = rate
+            self._best_center = (x_mean, y_mean)
+
+        lag = None
+        if self._best_center is not None and self._best_rate > self.min_rate:
+            center_x, center_y = self._best_center
+            lag = max(center_x - (center_y - self._y0) / self._best_rate, self._x0)
+
+        coverage = None
+        if self.measurable_area_mm2:
+            coverage = smoothed / self.measurable_area_mm2
+            if self._time_to_coverage is None and coverage >= self.coverage_fraction:
+                self._time_to_coverage = _crossing(
+                    self._last_x, self._last_coverage, x, coverage, self.coverage_fraction
+                )
+        self._last_x = x
+        self._last_coverage = coverage
+
+        self.snapshot = GrowthSnapshot(
+            elapsed_hours=x,
+            area_mm2=float(area_mm2),
+            smoothed_area_mm2=smoothed,
+            growth_rate_per_hour=rate,
+            doubling_time_hours=LN2 / rate if rate is not None and rate > self.min_rate else None,
+            lag_hours=lag,
+            coverage_fraction=coverage,
+            time_to_coverage_hours=self._time_to_coverage,
+            samples=self.samples,
+        )
+        return self.snapshot
+
+
+class GrowthTracker:
+    """PlateGrowth per (chamber, plate), all with the same settings."""
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self._plates = {}
+
+    def __contains__(self, key):
+        return key in self._plates
+
+    def plate(self, chamber, plate):
+        key = (chamber, plate)
+        growth = self._plates.get(key)
+        if growth is None:
+            growth = self._plates[key] = PlateGrowth(**self.settings)
+        return growth
+
+    def update(self, chamber, plate, elapsed_hours, area_mm2):
+        return self.plate(chamber, plate).update(elapsed_hours, area_mm2)
+
+    def prime(self, chamber, plate, elapsed_hours, areas):
+        """Rebuild a plate's state from its history (e.g. from the PlateMetricsStore after a restart)."""
+        growth = self.plate(chamber, plate)
+        for x, area in zip(elapsed_hours, areas):
+            if not math.isnan(area):
+                growth.update(x, area)
+        return growth.snapshot
+
+
+def _windows(values, window):
+    """Row k: the `window` samples ending at k, NaN-padded at the start."""
+    padded = np.concatenate((np.full(window - 1, np.nan), values))
+    return np.lib.stride_tricks.sliding_window_view(padded, window)
+
+
+def recompute_growth(elapsed_hours, areas, window=6, area_floor=1.0, min_rate=0.01, measurable_area_mm2=None,
+                     coverage_fraction=0.95):
+    """
+    Growth values after every sample of a plate's whole history, vectorized:
+    the same numbers PlateGrowth.update() gives sample by sample, for
+    reprocessing an archive. Samples must be in time order; NaN areas are
+    dropped. Returns a structured array (GROWTH_DTYPE), NaN where unknown.
+    """
+    x = np.asarray(elapsed_hours, dtype=np.float64)
+    areas = np.asarray(areas, dtype=np.float64)
+    keep = ~np.isnan(areas)
+    x, areas = x[keep], areas[keep]
+    # Same rule as update(): a sample must be newer than every previous one
+    if len(x):
+        newer = np.concatenate(([True], x[1:] > np.maximum.accumulate(x)[:-1]))
+        x, areas = x[newer], areas[newer]
+
+    out = np.full(len(x), np.nan, dtype=GROWTH_DTYPE)
+    if not len(x):
+        return out
+
+    y = np.log(np.maximum(areas, 0.0) + area_floor)
+    # One row per sample, its regression window along the row; O(n * window)
+    x_windows = _windows(x, window)
+    y_windows = _windows(y, window)
+    n = np.minimum(np.arange(1, len(x) + 1), window)
+    x_mean = np.nanmean(x_windows, axis=1)
+    y_mean = np.nanmean(y_windows, axis=1)
+    dx = x_windows - x_mean[:, None]
+    m2x = np.nansum(dx * dx, axis=1)
+    cxy = np.nansum(dx * (y_windows - y_mean[:, None]), axis=1)
+
+    valid = (n >= 2) & (m2x > 1e-12)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(valid, cxy / m2x, np.nan)
+    fitted = np.where(valid, y_mean + rate * (x - x_mean), y_mean)
+    smoothed = np.maximum(np.exp(fitted) - area_floor, 0.0)
+
+    # Fastest full-window rate so far, and where it was reached
+    full_rate = np.where(valid & (n == window), rate, -np.inf)
+    best_rate = np.maximum.accumulate(full_rate)
+    previous_best = np.concatenate(([-np.inf], best_rate[:-1]))
+    index = np.arange(len(x))
+    best_at = np.maximum.accumulate(np.where(full_rate > previous_best, index, 0))
+    has_lag = best_rate > min_rate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lag = np.maximum(x_mean[best_at] - (y_mean[best_at] - y[0]) / best_rate, x[0])
+
+    out["elapsed_hours"] = x
+    out["area_mm2"] = areas
+    out["smoothed_area_mm2"] = smoothed
+    out["growth_rate_per_hour"] = rate
+    with np.errstate(divide="ignore"):
+        out["doubling_time_hours"] = np.where(valid & (rate > min_rate), LN2 / rate, np.nan)
+    out["lag_hours"] = np.where(has_lag, lag, np.nan)
+    out["samples"] = index + 1
+
+    if measurable_area_mm2:
+        coverage = smoothed / measurable_area_mm2
+        out["coverage_fraction"] = coverage
+        covered = np.flatnonzero(coverage >= coverage_fraction)
+        if len(covered):
+            k = covered[0]
+            crossing = _crossing(
+                x[k - 1] if k else None, coverage[k - 1] if k else None, x[k], coverage[k], coverage_fraction
+            )
+            out["time_to_coverage_hours"][k:] = crossing
+
+    return out
+
+
+def snapshot_fields(snapshot):
+    """GrowthSnapshot as a dict of plain floats/None, for Firestore or JSON."""
+    if snapshot is None:
+        return None
+    return {
+        name: (None if value is None else round(float(value), 6))
+        for name, value in snapshot._asdict().items()
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 4) or sys.argv[1] in ("-h", "--help"):
+        print("Usage: python -m core.growth_analytics plate_metrics.sqlite3 [chamber plate]")
+        sys.exit(1)
+
+    import config
+    from core.plate_store import PlateMetricsStore
+    from image_processing.calculate_contour import measurable_area_mm2
+
+    store = PlateMetricsStore(sys.argv[1])
+    plates = [tuple(sys.argv[2:4])] if len(sys.argv) == 4 else store.plates()
+    measurable_area = measurable_area_mm2(config.DIAMETER_MM)
+    for chamber, plate in plates:
+        # elapsed_hours is stored rounded; the capture times give the spacing exactly
+        ts, hours = store.series(chamber, plate, "elapsed_hours")
+        _, areas = store.series(chamber, plate, config.GROWTH_METRIC)
+        if len(ts):
+            hours = hours[0] + (ts - ts[0]) / 3600
+        growth = recompute_growth(
+            hours, areas, config.GROWTH_WINDOW_SAMPLES, config.GROWTH_AREA_FLOOR_MM2,
+            config.GROWTH_MIN_RATE_PER_HOUR, measurable_area, config.GROWTH_COVERAGE_FRACTION,
+        )
+        if not len(growth):
+            continue
+        last = growth[-1]
+        print(
+            f"{chamber}/{plate}: {int(last['samples'])} samples, area {last['smoothed_area_mm2']:.1f} mm2, "
+            f"rate {last['growth_rate_per_hour']:.4f}/h, doubling {last['doubling_time_hours']:.1f} h, "
+            f"lag {last['lag_hours']:.1f} h, coverage at {last['time_to_coverage_hours']:.1f} h"
+        )
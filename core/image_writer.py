@@ -0,0 +1,77 @@
+import os
+import threading
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+# Result of a finished background write
+WrittenImage = namedtuple("WrittenImage", ["path", "size", "crc32"])
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-writer")
+_pending = {}
+_lock = threading.Lock()
+
+
+def _encode_and_write(path, image):
+    ext = os.path.splitext(path)[1] or ".png"
+    ok, encoded = cv2.imencode(ext, image)
+    if not ok:
+        raise IOError(f"Could not encode image for {path}")
+
+    data = encoded.tobytes()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Write to a temp file first so readers never see a half-written PNG
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    return WrittenImage(path, len(data), zlib.crc32(data))
+
+
+def write_image_async(path, image):
+    """
+    Encode and write an image array to disk on the background writer thread.
+    The array must not be modified until the returned future has finished.
+    Returns a Future resolving to a WrittenImage(path, size, crc32).
+    """
+    future = _executor.submit(_encode_and_write, path, image)
+    with _lock:
+        _pending[path] = future
+    return future
+
+
+def wait_for_image(path, timeout=None):
+    """
+    Block until the queued write for `path` is on disk.
+    Returns the WrittenImage, or None if no write was queued for that path
+    (or it was already claimed by a previous wait/flush).
+    """
+    with _lock:
+        future = _pending.pop(path, None)
+    if future is None:
+        return None
+    return future.result(timeout=timeout)
+
+
+def flush_image_writes(timeout=None):
+    """
+    Block until every queued write has finished.
+    Returns {path: WrittenImage} for the writes that succeeded; errors are printed, not raised.
+    """
+    with _lock:
+        futures = dict(_pending)
+        _pending.clear()
+
+    written = {}
+    for path, future in futures.items():
+        try:
+            written[path] = future.result(timeout=timeout)
+        except Exception as e:
+            print(f"Error writing image {path}: {e}")
+    return written
@@ -0,0 +1,267 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+PROMETHEUS_PREFIX = "sporescope"
+
+# Label names of every stage series, in the chamber files and the
+# process-wide file alike (unset ones are exported empty)
+STAGE_LABEL_NAMES = ("chamber", "stage", "plate", "kind")
+
+
+class _NullSpan:
+    """Shared do-nothing span handed out while metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_metrics", "_key", "_started")
+
+    def __init__(self, metrics, key):
+        self._metrics = metrics
+        self._key = key
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics._record(self._key, time.perf_counter() - self._started)
+        return False
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items()))) if labels else (name, ())
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _family_label_texts(series_labels, names=()):
+    """
+    Label texts of the series of one metric family, all with the same label
+    names (`names` and any other label a series sets): a label a series does
+    not set is exported empty.
+    """
+    names = sorted(set(names).union(*series_labels))
+    return [_label_text(tuple((name, labels.get(name, "")) for name in names)) for labels in series_labels]
+
+
+def _key_text(key):
+    name, labels = key
+    return name + "".join(f"[{k}={v}]" for k, v in labels)
+
+
+class Metrics:
+    """
+    Stage timings and counters for the capture loop.
+
+    with metrics.span("rotate"): ...            time a stage
+    with metrics.span("gif", plate="P1"): ...   per-plate stages take labels
+    metrics.incr("uploads", kind="gif")         count events
+    metrics.incr("upload_bytes", n)
+
+    end_cycle() appends the cycle's spans and counters as one line to a
+    rolling JSON-lines file and rewrites a Prometheus text-format file with
+    the totals since start (for node_exporter's textfile collector). When
+    disabled, span() returns a shared no-op object and incr() returns at once.
+
+    Every series of a metric family is exported with the same label names,
+    the constant `labels` included; a label passed to span()/incr() overrides
+    a constant label of the same name.
+    """
+
+    def __init__(self, enabled=True, jsonl_path=None, prometheus_path=None, max_bytes=5 * 1024 * 1024,
+                 backups=3, labels=None):
+        self.enabled = enabled
+        # Constant labels (e.g. chamber) added to every exported series and record
+        self.labels = tuple(sorted((labels or {}).items()))
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        # Serializes write_prometheus(), which goes through one temporary file
+        self._write_lock = threading.Lock()
+        # Totals since start: key -> [count, sum, max] for spans, key -> value for counters
+        self._span_totals = {}
+        self._counter_totals = {}
+        # Current cycle only
+        self._cycle_spans = {}
+        self._cycle_counters = {}
+        self._cycle_started = None
+        self._cycle_timestamp = None
+
+    def span(self, name, **labels):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, _key(name, labels))
+
+    def incr(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counter_totals[key] = self._counter_totals.get(key, 0) + value
+            self._cycle_counters[key] = self._cycle_counters.get(key, 0) + value
+
+    def _record(self, key, seconds):
+        with self._lock:
+            totals = self._span_totals.get(key)
+            if totals is None:
+                self._span_totals[key] = [1, seconds, seconds]
+            else:
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] = max(totals[2], seconds)
+            self._cycle_spans[key] = self._cycle_spans.get(key, 0.0) + seconds
+
+    def start_cycle(self, timestamp=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._cycle_spans = {}
+            self._cycle_counters = {}
+            self._cycle_started = time.perf_counter()
+            self._cycle_timestamp = timestamp or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def end_cycle(self, **fields):
+        """Close the cycle, export it and return its record (None when disabled)."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            duration = time.perf_counter() - self._cycle_started if self._cycle_started else None
+            record = {
+                "timestamp": self._cycle_timestamp,
+                "cycle_seconds": round(duration, 4) if duration is not None else None,
+                "spans": {_key_text(k): round(v, 4) for k, v in self._cycle_spans.items()},
+                "counters": {_key_text(k): v for k, v in self._cycle_counters.items()},
+                **dict(self.labels),
+                **fields,
+            }
+            if duration is not None:
+                key = _key("cycle", {})
+                totals = self._span_totals.setdefault(key, [0, 0.0, 0.0])
+                totals[0] += 1
+                totals[1] += duration
+                totals[2] = max(totals[2], duration)
+
+        if self.jsonl_path:
+            self._append_jsonl(record)
+        if self.prometheus_path:
+            self.write_prometheus()
+        return record
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "spans": {_key_text(k): {"count": c, "sum": round(s, 4), "max": round(m, 4)}
+                          for k, (c, s, m) in self._span_totals.items()},
+                "counters": {_key_text(k): v for k, v in self._counter_totals.items()},
+            }
+
+    def prometheus_text(self):
+        with self._lock:
+            spans = sorted(self._span_totals.items())
+            counters = sorted(self._counter_totals.items())
+
+        constant = dict(self.labels)
+        stage = f"{PROMETHEUS_PREFIX}_stage_seconds"
+        stage_labels = _family_label_texts(
+            [{**constant, "stage": name, **dict(labels)} for (name, labels), _ in spans], STAGE_LABEL_NAMES
+        )
+        lines = [
+            f"# HELP {stage} Time spent in each capture loop stage.",
+            f"# TYPE {stage} summary",
+        ]
+        for label_text, (_, (count, total, _)) in zip(stage_labels, spans):
+            lines.append(f"{stage}_sum{label_text} {total:.6f}")
+            lines.append(f"{stage}_count{label_text} {count}")
+
+        lines += [
+            f"# HELP {stage}_max Longest single run of each stage since start.",
+            f"# TYPE {stage}_max gauge",
+        ]
+        for label_text, (_, (_, _, longest)) in zip(stage_labels, spans):
+            lines.append(f"{stage}_max{label_text} {longest:.6f}")
+
+        families = {}
+        for (name, labels), value in counters:
+            families.setdefault(f"{PROMETHEUS_PREFIX}_{name}_total", []).append(({**constant, **dict(labels)}, value))
+        for metric, series in families.items():
+            lines.append(f"# TYPE {metric} counter")
+            label_texts = _family_label_texts([labels for labels, _ in series])
+            for label_text, (_, value) in zip(label_texts, series):
+                lines.append(f"{metric}{label_text} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self):
+        directory = os.path.dirname(self.prometheus_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written whole and renamed, a scraper never sees half a file
+        tmp_path = f"{self.prometheus_path}.tmp"
+        with self._write_lock:
+            with open(tmp_path, "w") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, self.prometheus_path)
+
+    def _append_jsonl(self, record):
+        directory = os.path.dirname(self.jsonl_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        try:
+            if os.path.getsize(self.jsonl_path) >= self.max_bytes:
+                self._rotate()
+        except OSError:
+            pass
+
+        with open(self.jsonl_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _rotate(self):
+        # cycles.jsonl -> cycles.jsonl.1 -> ... -> cycles.jsonl.<backups>, oldest dropped
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.jsonl_path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.jsonl_path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.jsonl_path, f"{self.jsonl_path}.1")
+        else:
+            os.remove(self.jsonl_path)
+
+
+_metrics = Metrics(enabled=False)
+
+
+def configure_metrics(enabled=True, jsonl_path=None, prometheus_path=None, max_bytes=5 * 1024 * 1024,
+                      backups=3, labels=None):
+    """Replace the process-wide Metrics; modules pick it up through get_metrics()."""
+    global _metrics
+    _metrics = Metrics(enabled, jsonl_path, prometheus_path, max_bytes, backups, labels)
+    return _metrics
+
+
+def get_metrics():
+    """The process-wide Metrics, disabled until configure_metrics() is called."""
+    return _metrics
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+
+import csv
+import sqlite3
+import sys
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+STORE_PATH = "plate_metrics.sqlite3"
+
+# One row per plate per cycle. ts: capture time in epoch seconds (the index
+# key), timestamp: the same as the capture timestamp string, hue_hist: the
+# plate's hue histogram (plate_metrics HUE_BINS counts), covered_area_mm2:
+# mycelium-covered area of the safe circle (ColonySet.covered_area_mm2)
+PlateSample = namedtuple("PlateSample", [
+    "chamber",
+    "plate",
+    "ts",
+    "timestamp",
+    "elapsed_hours",
+    "mean_red",
+    "mean_green",
+    "mean_blue",
+    "green_object_area",
+    "green_fraction",
+    "total_shape_area_mm2",
+    "covered_area_mm2",
+    "colony_count",
+    "changed",
+    "culture",
+    "substrate",
+    "snippet_path",
+    "hue_hist",
+    "gpt_result",
+])
+
+# Columns that series() can return as a float array
+NUMERIC_COLUMNS = (
+    "elapsed_hours", "mean_red", "mean_green", "mean_blue", "green_object_area",
+    "green_fraction", "total_shape_area_mm2", "covered_area_mm2", "colony_count",
+)
+
+# Columns added after the first release, created on older stores when opened
+_ADDED_COLUMNS = {"covered_area_mm2": "REAL"}
+
+
+def to_epoch(value):
+    """Epoch seconds from a capture timestamp string, a datetime (naive = UTC) or a number."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _row_to_sample(row):
+    sample = PlateSample(*row)
+    if sample.hue_hist is not None:
+        sample = sample._replace(hue_hist=np.frombuffer(sample.hue_hist, dtype=np.int32))
+    return sample
+
+
+class PlateMetricsStore:
+    """
+    Local copy of every per-plate metric, in SQLite, so growth curves can
+    be read without paging through Firestore. Firestore stays a replica fed
+    by the upload worker.
+
+    Rows are keyed (chamber, plate, ts) in a WITHOUT ROWID table, so the
+    samples of one plate are stored together in time order and a range
+    query is one index seek plus a sequential scan. Appending a cycle is a
+    single transaction; appending it again (e.g. a replayed cycle) replaces
+    the rows instead of duplicating them.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS samples (
+                chamber TEXT NOT NULL,
+                plate TEXT NOT NULL,
+                ts REAL NOT NULL,
+                timestamp TEXT NOT NULL,
+                elapsed_hours REAL,
+                mean_red REAL,
+                mean_green REAL,
+                mean_blue REAL,
+                green_object_area INTEGER,
+                green_fraction REAL,
+                total_shape_area_mm2 REAL,
+                covered_area_mm2 REAL,
+                colony_count INTEGER,
+                changed INTEGER,
+                culture TEXT,
+                substrate TEXT,
+                snippet_path TEXT,
+                hue_hist BLOB,
+                gpt_result TEXT,
+                PRIMARY KEY (chamber, plate, ts)
+            ) WITHOUT ROWID
+        """)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(samples)")}
+        for column, kind in _ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE samples ADD COLUMN {column} {kind}")
+        # Cross-plate time windows (e.g. everything from the last day)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts)")
+
+    def append(self, samples):
+        """Store PlateSamples (one cycle's plates) in one transaction."""
+        rows = []
+        for sample in samples:
+            if sample.hue_hist is not None:
+                sample = sample._replace(hue_hist=np.asarray(sample.hue_hist, dtype=np.int32).tobytes())
+            if sample.ts is None:
+                sample = sample._replace(ts=to_epoch(sample.timestamp))
+            rows.append(tuple(sample))
+
+        placeholders = ", ".join("?" * len(PlateSample._fields))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                # The GPT answer arrives later from the upload worker; a
+                # replayed cycle keeps the one already stored
+                self._conn.executemany(
+                    f"INSERT INTO samples ({', '.join(PlateSample._fields)}) VALUES ({placeholders}) "
+                    "ON CONFLICT (chamber, plate, ts) DO UPDATE SET "
+                    + ", ".join(f"{f} = excluded.{f}" for f in PlateSample._fields[3:-1])
+                    + ", gpt_result = COALESCE(excluded.gpt_result, gpt_result)",
+                    rows,
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def set_gpt_results(self, chamber, timestamp, plates, gpt_results):
+        """Attach the GPT answers of one cycle once the upload worker has them."""
+        ts = to_epoch(timestamp)
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE samples SET gpt_result = ? WHERE chamber = ? AND plate = ? AND ts = ?",
+                [(result, chamber, plate, ts) for plate, result in zip(plates, gpt_results)],
+            )
+
+    def _where(self, chamber, plate, start, end):
+        clauses, params = [], []
+        if chamber is not None:
+            clauses.append("chamber = ?")
+            params.append(chamber)
+        if plate is not None:
+            clauses.append("plate = ?")
+            params.append(plate)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(to_epoch(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(to_epoch(end))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, chamber=None, plate=None, start=None, end=None):
+        """PlateSamples with start <= time < end, by chamber, plate and time (any filter may be None)."""
+        where, params = self._where(chamber, plate, start, end)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(PlateSample._fields)} FROM samples{where} ORDER BY chamber, plate, ts",
+                params,
+            ).fetchall()
+        return [_row_to_sample(row) for row in rows]
+
+    def series(self, chamber, plate, column="total_shape_area_mm2", start=None, end=None):
+        """
+        One metric of one plate as arrays: (ts, values), float64, oldest
+        first; missing values are NaN.
+        """
+        if column not in NUMERIC_COLUMNS:
+            raise ValueError(f"Unknown numeric column {column!r}, expected one of {NUMERIC_COLUMNS}")
+        where, params = self._where(chamber, plate, start, end)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT ts, {column} FROM samples{where} ORDER BY ts", params).fetchall()
+        data = np.array(rows, dtype=np.float64).reshape(-1, 2)
+        return data[:, 0].copy(), data[:, 1].copy()
+
+    def plates(self):
+        """(chamber, plate) pairs with at least one sample."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT DISTINCT chamber, plate FROM samples ORDER BY chamber, plate"
+            ).fetchall()
+
+    def export_csv(self, path, chamber=None, plate=None, start=None, end=None):
+        """Write the matching samples to a CSV file (hue_hist space-separated). Returns the row count."""
+        where, params = self._where(chamber, plate, start, end)
+        count = 0
+        with self._lock, open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(PlateSample._fields)
+            cursor = self._conn.execute(
+                f"SELECT {', '.join(PlateSample._fields)} FROM samples{where} ORDER BY chamber, plate, ts",
+                params,
+            )
+            # Streamed from the cursor, the whole history is never held in memory
+            for row in cursor:
+                sample = _row_to_sample(row)
+                if sample.hue_hist is not None:
+                    sample = sample._replace(hue_hist=" ".join(str(v) for v in sample.hue_hist))
+                writer.writerow(sample)
+                count += 1
+        return count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in range(3, 8) or sys.argv[1] in ("-h", "--help"):
+        print("Usage: plate_store.py store.sqlite3 out.csv [chamber] [plate] [start] [end]   (ISO timestamps, - = any)")
+        sys.exit(1)
+
+    filters = [None if arg == "-" else arg for arg in sys.argv[3:]] + [None] * (7 - len(sys.argv))
+    store = PlateMetricsStore(sys.argv[1])
+    print(f"Exported {store.export_csv(sys.argv[2], *filters)} sample(s) to {sys.argv[2]}")
@@ -0,0 +1,139 @@
+import math
+import threading
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from core.metrics import get_metrics
+
+# slot: scheduled wall-clock time (epoch seconds); lateness: capture start - slot;
+# degraded: the scheduler asks the cycle to skip optional stages
+Cycle = namedtuple("Cycle", ["index", "slot", "timestamp", "lateness", "degraded"])
+
+
+def slot_timestamp(slot):
+    return datetime.fromtimestamp(slot, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class CycleScheduler:
+    """
+    Runs capture cycles on a fixed wall-clock grid (anchor + k * interval,
+    epoch-aligned by default), so the period does not stretch by the
+    processing time and timestamps do not drift.
+
+    capture(cycle) runs on the scheduling thread right at the slot and
+    returns the captured data (None to drop the cycle). process(cycle, data)
+    runs on a background thread, so the analysis and uploads of cycle N
+    overlap the wait for cycle N+1.
+
+    Backpressure:
+      - a slot that comes while `max_in_flight` cycles are still processing
+        is skipped and reported as an overrun
+      - a slot missed by more than `late_tolerance` seconds (e.g. after a
+        long capture) is skipped, the scheduler never bursts to catch up
+      - after an overrun, or a cycle that used more than `degrade_ratio` of
+        the interval, the next cycle is flagged degraded so it can skip
+        optional stages
+
+    Overruns are counted on `metrics` (default: the process-wide Metrics).
+    """
+
+    def __init__(self, interval, anchor=0.0, max_in_flight=1, late_tolerance=5.0, degrade_ratio=0.8,
+                 metrics=None):
+        if interval <= 0:
+            raise ValueError("interval must be positive.")
+        self.interval = interval
+        self.anchor = anchor
+        self.max_in_flight = max(1, max_in_flight)
+        self.late_tolerance = late_tolerance
+        self.degrade_ratio = degrade_ratio
+        self.metrics = metrics
+        self.overruns = 0
+        self.skipped_slots = 0
+        self._stop = threading.Event()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._degrade_next = False
+
+    def next_slot(self, now, after=None):
+        """First grid time >= now (and > `after`, the previous slot)."""
+        k = math.ceil((now - self.anchor) / self.interval)
+        slot = self.anchor + k * self.interval
+        if after is not None and slot <= after:
+            slot = after + self.interval
+        return slot
+
+    def _metrics(self):
+        return self.metrics or get_metrics()
+
+    def stop(self):
+        self._stop.set()
+
+    def _report_overrun(self, slot, reason):
+        self.overruns += 1
+        self.skipped_slots += 1
+        self._degrade_next = True
+        metrics = self._metrics()
+        metrics.incr("overruns", reason=reason)
+        metrics.incr("skipped_slots")
+        print(f"Overrun: skipping the {slot_timestamp(slot)} slot ({reason}).")
+
+    def _process(self, process, cycle, data):
+        try:
+            process(cycle, data)
+        except Exception:
+            self._metrics().incr("cycle_errors")
+            print(f"Cycle {cycle.timestamp} failed:\n{traceback.format_exc()}")
+        finally:
+            elapsed = time.time() - cycle.slot
+            with self._lock:
+                self._in_flight -= 1
+                if elapsed > self.interval * self.degrade_ratio:
+                    self._degrade_next = True
+            if elapsed > self.interval:
+                self._metrics().incr("overruns", reason="slow_cycle")
+                print(f"Cycle {cycle.timestamp} took {elapsed:.1f}s, longer than the {self.interval}s interval.")
+
+    def run(self, capture, process, max_cycles=None):
+        """Schedule cycles until stop() is called (or `max_cycles` slots have passed)."""
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="cycle")
+        slot = None
+        index = 0
+        try:
+            while not self._stop.is_set() and (max_cycles is None or index < max_cycles):
+                slot = self.next_slot(time.time(), after=slot)
+                if self._stop.wait(max(0.0, slot - time.time())):
+                    break
+                index += 1
+
+                lateness = time.time() - slot
+                if lateness > self.late_tolerance:
+                    self._report_overrun(slot, "late")
+                    continue
+
+                with self._lock:
+                    busy = self._in_flight >= self.max_in_flight
+                    if not busy:
+                        self._in_flight += 1
+                        degraded, self._degrade_next = self._degrade_next, False
+                if busy:
+                    self._report_overrun(slot, "busy")
+                    continue
+
+                cycle = Cycle(index, slot, slot_timestamp(slot), lateness, degraded)
+                try:
+                    data = capture(cycle)
+                except Exception:
+                    data = None
+                    print(f"Capture for {cycle.timestamp} failed:\n{traceback.format_exc()}")
+
+                if data is None:
+                    with self._lock:
+                        self._in_flight -= 1
+                    continue
+
+                executor.submit(self._process, process, cycle, data)
+        finally:
+            executor.shutdown(wait=True)
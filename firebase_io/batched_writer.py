@@ -0,0 +1,59 @@
+# Firestore rejects batches with more than 500 writes or a request over 10 MiB
+FIRESTORE_MAX_WRITES = 500
+FIRESTORE_MAX_BYTES = 10 * 1024 * 1024
+
+
+class BatchedWriter:
+    """
+    Collects Firestore writes and commits them as WriteBatches.
+
+    A batch is committed as soon as adding the next write would go over
+    `max_writes` or (roughly) `max_bytes`, and whatever is left is committed
+    by flush(). Writes are committed in the order they were added, so
+    dependent documents (e.g. the plate pointing at a new snippet) should be
+    added last.
+    """
+
+    def __init__(self, db, max_writes=400, max_bytes=8 * 1024 * 1024):
+        self.db = db
+        self.max_writes = min(max_writes, FIRESTORE_MAX_WRITES)
+        self.max_bytes = min(max_bytes, FIRESTORE_MAX_BYTES)
+        self.commits = 0
+        self.writes = 0
+        self._batch = None
+        self._batch_writes = 0
+        self._batch_bytes = 0
+
+    def set(self, doc_ref, data, merge=False, size_hint=1024):
+        """Queue doc_ref.set(data, merge=merge). size_hint is the estimated encoded size in bytes."""
+        if self._batch is not None and (
+            self._batch_writes + 1 > self.max_writes
+            or self._batch_bytes + size_hint > self.max_bytes
+        ):
+            self.flush()
+
+        if self._batch is None:
+            self._batch = self.db.batch()
+
+        self._batch.set(doc_ref, data, merge=merge)
+        self._batch_writes += 1
+        self._batch_bytes += size_hint
+        self.writes += 1
+
+    def flush(self):
+        """Commit the pending batch, if any."""
+        if self._batch is None:
+            return
+        self._batch.commit()
+        self.commits += 1
+        self._batch = None
+        self._batch_writes = 0
+        self._batch_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Only commit the tail if the caller finished without an error
+        if exc_type is None:
+            self.flush()
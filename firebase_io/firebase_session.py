@@ -0,0 +1,105 @@
+import threading
+import time
+
+import firebase_admin
+from firebase_admin import credentials, storage, firestore
+
+CREDENTIALS_PATH = "firebase-adminsdk.json"
+STORAGE_BUCKET = "sporescope.firebasestorage.app"
+
+
+class FirebaseSession:
+    """
+    One Firebase app, storage bucket and Firestore client for the whole process.
+
+    The credentials are parsed and the clients (with their tokens and gRPC/HTTP
+    channels) are created on first use and then kept warm between cycles
+    instead of being torn down by every uploader. call() runs an upload step
+    and, if it fails, rebuilds the clients and tries again.
+    """
+
+    def __init__(self, credentials_path=CREDENTIALS_PATH, storage_bucket=STORAGE_BUCKET,
+                 retries=1, retry_delay=2.0):
+        self.credentials_path = credentials_path
+        self.storage_bucket = storage_bucket
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._app = None
+        self._bucket = None
+        self._db = None
+        self._lock = threading.RLock()
+
+    def connect(self):
+        with self._lock:
+            if self._app is not None:
+                return
+            if firebase_admin._apps:
+                # Someone else (a script, a test) already initialized the default app
+                self._app = firebase_admin.get_app()
+            else:
+                cred = credentials.Certificate(self.credentials_path)
+                self._app = firebase_admin.initialize_app(cred, {
+                    'storageBucket': self.storage_bucket
+                })
+            self._bucket = storage.bucket(app=self._app)
+            self._db = firestore.client(app=self._app)
+
+    def close(self):
+        with self._lock:
+            if self._app is not None:
+                try:
+                    firebase_admin.delete_app(self._app)
+                except Exception as e:
+                    print(f"Error shutting down Firebase app: {e}")
+            self._app = None
+            self._bucket = None
+            self._db = None
+
+    def reconnect(self):
+        with self._lock:
+            self.close()
+            self.connect()
+
+    @property
+    def bucket(self):
+        self.connect()
+        return self._bucket
+
+    @property
+    def db(self):
+        self.connect()
+        return self._db
+
+    def call(self, func, *args, **kwargs):
+        """
+        Run func(session, *args, **kwargs). On error the clients are rebuilt and
+        the call is retried up to `retries` times; the last error is re-raised.
+        func should be safe to repeat (fixed storage paths / document ids).
+        """
+        attempt = 0
+        while True:
+            try:
+                return func(self, *args, **kwargs)
+            except Exception as e:
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                print(f"Firebase call failed ({e}), reconnecting (retry {attempt}/{self.retries})")
+                time.sleep(self.retry_delay)
+                try:
+                    self.reconnect()
+                except Exception as reconnect_error:
+                    print(f"Error reconnecting to Firebase: {reconnect_error}")
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_firebase_session():
+    """The process-wide session used by the uploaders when none is passed in."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = FirebaseSession()
+        return _session
@@ -1,7 +1,11 @@
-import firebase_admin
-from firebase_admin import credentials, storage, firestore
 import os
+import uuid
+import numpy as np
 import config
+from core.metrics import get_metrics
+from firebase_io.batched_writer import BatchedWriter
+from image_processing.contour_codec import encode_contours, CONTOUR_ENCODING
+from firebase_io.firebase_session import get_firebase_session
 
 def upload_snippet_to_firebase(
     snippet_paths,
@@ -13,7 +17,15 @@ def upload_snippet_to_firebase(
     plate_start_times,
     shapes_lists,
     total_shapes_area_lists,
-    gpt_results
+    gpt_results,
+    session=None,
+    changed_flags=None,
+    colony_stats_lists=None,
+    cultures=None,
+    substrate=None,
+    growth_list=None,
+    contour_storage=None,
+    contour_tolerances=None
 ):
     """
     snippet_paths: list of local image paths (one per plate)
@@ -21,11 +33,30 @@ def upload_snippet_to_firebase(
     chamber: chamber ID string
     timestamp: ISO timestamp string (capture time)
     mean_intensities: list of (mean_red, mean_green, mean_blue) or single tuple
-    green_object_areas: list of numeric areas or single value
+    green_object_areas: list of green pixel counts (plate_metrics green_pixels) or
+                        single value, stored as green_pixel_count
     plate_start_times: ISO timestamp string or list of strings
                        (when plate/control was installed), aligned with plates
     shapes_lists: list where each element corresponds to one snippet and contains
                   a list of shapes; each shape is a list of coordinate pairs
+    session: FirebaseSession to use, defaults to the shared process-wide one
+    changed_flags: optional list of bools from the change detector; unchanged
+                   plates reuse their last shapes, so no shape docs are written
+                   for them. The plate doc's most_recent_snippet_in_firestore_path
+                   always points at the newest snippet; the added
+                   most_recent_shapes_snippet_path points at the newest one
+                   with shapes, which is where a viewer reads the shapes
+                   of a snippet with changed == False
+    colony_stats_lists: optional per-plate list of ColonySet.stats() dicts,
+                        aligned with shapes_lists; stored on each shape doc
+    cultures, substrate: the chamber's plate cultures (1 or one per plate) and
+                         substrate, default config.CULTURE / config.SUBSTRATE
+    growth_list: optional per-plate dict of growth values
+                 (growth_analytics.snapshot_fields), stored on the snippet
+                 and the plate doc
+    contour_storage, contour_tolerances: the chamber's contour storage mode
+                 and tolerance (1 or one per plate), default
+                 config.CONTOUR_STORAGE / config.CONTOUR_TOLERANCE_PX
     """
 
     # Normalize inputs to lists
@@ -48,7 +79,10 @@ def upload_snippet_to_firebase(
         raise ValueError("green_object_areas must match length of snippet_paths.")
 
     # --- CULTURE handling ---
-    cultures = config.CULTURE
+    if cultures is None:
+        cultures = config.CULTURE
+    if substrate is None:
+        substrate = config.SUBSTRATE
 
     if isinstance(cultures, str):
         cultures = [cultures]
@@ -57,7 +91,7 @@ def upload_snippet_to_firebase(
         cultures = cultures * len(snippet_paths)
     elif len(cultures) != len(snippet_paths):
         raise ValueError(
-            "Length of config.CULTURE must be 1 or equal to number of snippet_paths."
+            "Length of cultures (config.CULTURE) must be 1 or equal to number of snippet_paths."
         )
 
     # --- PLATE START TIME handling ---
@@ -71,38 +105,53 @@ def upload_snippet_to_firebase(
             "Length of plate_start_times must be 1 or equal to number of snippet_paths."
         )
 
-    # --- Init Firebase app once ---
-    try:
-        if not firebase_admin._apps:
-            cred = credentials.Certificate("firebase-adminsdk.json")
-            firebase_admin.initialize_app(cred, {
-                'storageBucket': 'sporescope.firebasestorage.app'
-            })
-    except Exception as e:
-        print(f"Error initializing Firebase: {e}")
-        return
+    if changed_flags is None:
+        changed_flags = [True] * len(snippet_paths)
 
-    bucket = storage.bucket()
-    db = firestore.client()
+    if colony_stats_lists is None:
+        colony_stats_lists = [[] for _ in snippet_paths]
 
-    # --- Chamber document ---
-    sporescope_collection = db.collection('sporescope')
-    chamber_doc_ref = sporescope_collection.document(chamber)
+    if growth_list is None:
+        growth_list = [None] * len(snippet_paths)
+
+    # --- CONTOUR STORAGE handling ---
+    storage = config.CONTOUR_STORAGE if contour_storage is None else contour_storage
+    if storage not in ("shapes", "encoded", "both"):
+        raise ValueError(f"Unknown contour storage: {storage!r}")
+
+    tolerances = config.CONTOUR_TOLERANCE_PX if contour_tolerances is None else contour_tolerances
+    if not isinstance(tolerances, list):
+        tolerances = [tolerances]
+
+    if len(tolerances) == 1 and len(snippet_paths) > 1:
+        tolerances = tolerances * len(snippet_paths)
+    elif len(tolerances) != len(snippet_paths):
+        raise ValueError(
+            "Length of the contour tolerances must be 1 or equal to number of snippet_paths."
+        )
 
+    # --- Shared Firebase clients, initialized once per process ---
+    if session is None:
+        session = get_firebase_session()
+
+    # --- Chamber document ---
     chamber_fields = {
         "chamber": chamber,
         "last_update": timestamp,
     }
 
-    chamber_doc = chamber_doc_ref.get()
+    def _chamber_doc_ref(session):
+        return session.db.collection('sporescope').document(chamber)
+
+    chamber_doc = session.call(lambda session: _chamber_doc_ref(session).get())
     if not chamber_doc.exists:
         chamber_fields["creation_date"] = timestamp
 
-    chamber_doc_ref.set(chamber_fields, merge=True)
+    session.call(lambda session: _chamber_doc_ref(session).set(chamber_fields, merge=True))
 
     # --- MAIN LOOP ---
-    for snippet_path, plate, intensity, object_area, culture, plate_start_time, shapes_list, total_shapes_area, gpt_result in zip(
-        snippet_paths, plates, mean_intensities, green_object_areas, cultures, plate_start_times, shapes_lists, total_shapes_area_lists, gpt_results
+    for snippet_path, plate, intensity, object_area, culture, plate_start_time, shapes_list, total_shapes_area, gpt_result, changed, colony_stats, tolerance, growth in zip(
+        snippet_paths, plates, mean_intensities, green_object_areas, cultures, plate_start_times, shapes_lists, total_shapes_area_lists, gpt_results, changed_flags, colony_stats_lists, tolerances, growth_list
     ):
         if intensity is None:
             print(f"Skipping plate {plate}: mean_intensities is None for {snippet_path}")
@@ -119,10 +168,6 @@ def upload_snippet_to_firebase(
 
         firebase_snippet_path = f"{chamber}/{plate}/{filename}"
 
-        blob = bucket.blob(firebase_snippet_path)
-        blob.upload_from_filename(local_path, content_type="image/jpeg")
-        print(f"Image uploaded to Firebase Storage at '{firebase_snippet_path}' for plate {plate}")
-
         gif_path = f"output_gif_folder/{plate}.gif"
 
         # Snippet-level fields
@@ -132,66 +177,98 @@ def upload_snippet_to_firebase(
             "mean_red_intensity": mean_red,
             "mean_green_intensity": mean_green,
             "mean_blue_intensity": mean_blue,
-            "object_area": object_area,
+            # Green pixels inside the plate circle; object_area held the
+            # summed area of green contours and is no longer written
+            "green_pixel_count": object_area,
             "plate": plate,
             "chamber": chamber,
             "culture": culture,
             "plate_start_time": plate_start_time,
-            "total_shape_area_mm2": total_shapes_area
+            "total_shape_area_mm2": total_shapes_area,
+            "changed": changed
         }
+        if growth:
+            snippet_fields["growth"] = growth
+
+        # --- SHAPES ---
+        # Encoded: every contour of the snippet in one bytes field, with the
+        # colony stats alongside since there are no shape docs to carry them
+        if changed and storage in ("encoded", "both"):
+            snippet_fields["contours"] = encode_contours(shapes_list, tolerance)
+            snippet_fields["contour_encoding"] = CONTOUR_ENCODING
+            snippet_fields["contour_tolerance_px"] = tolerance
+            if storage == "encoded":
+                snippet_fields["colonies"] = colony_stats
+
+        shape_docs = []
+        for shape_num, contour in enumerate(shapes_list if changed and storage != "encoded" else []):
+            # Already [[x, y], ...] when it comes from a ColonySet
+            coords = contour if isinstance(contour, list) else np.asarray(contour).reshape(-1, 2).tolist()
+            shape_doc = {"coordinates": [{"x": int(x), "y": int(y)} for x, y in coords]}
+            if shape_num < len(colony_stats):
+                shape_doc.update(colony_stats[shape_num])
+            shape_docs.append(shape_doc)
 
-        # Plate document reference
-        plate_doc_ref = chamber_doc_ref.collection('plates').document(plate)
-        plate_doc_ref.set({
-            "last_update": timestamp
-        }, merge=True)
-
-        # Snippets subcollection
-        snippets_collection_ref = plate_doc_ref.collection('snippets')
-
-        # --- CREATE SNIPPET DOCUMENT FIRST ---
-        snippet_doc_ref = snippets_collection_ref.add(snippet_fields)[1]
-
-        # --- SHAPES SUBCOLLECTION ---
-        shapes_collection = snippet_doc_ref.collection("shapes")
-
-        for shape_num, contour in enumerate(shapes_list, start=1):
-            if hasattr(contour, "squeeze"):
-                coords = contour.squeeze().tolist()
-            else:
-                coords = contour
-
-            cleaned_coords = []
-            for p in coords:
-                if isinstance(p, (list, tuple)) and len(p) == 1:
-                    p = p[0]
-                cleaned_coords.append({"x": int(p[0]), "y": int(p[1])})
-
-            shapes_collection.document(f"shape_{shape_num}").set({
-                "coordinates": cleaned_coords
-            })
-
-        # --- NOW UPDATE PLATE FIELDS BECAUSE snippet_doc_ref EXISTS ---
         plate_fields = {
             "last_update": timestamp,
             "plate": plate,
-            "substrate": config.SUBSTRATE,
+            "substrate": substrate,
             "culture": culture,
             "plate_start_time": plate_start_time,
             "gif_path": gif_path,
             "most_recent_snippet_path": firebase_snippet_path,
-            "most_recent_snippet_in_firestore_path": snippet_doc_ref.path,
             "total_shape_area_mm2": total_shapes_area,
             "gpt_analysis": gpt_result
         }
-
-        plate_doc_ref.set(plate_fields, merge=True)
-
-        print(f"Document added successfully for plate {plate}.")
-
-    # --- CLEANUP ---
-    try:
-        if firebase_admin._apps:
-            firebase_admin.delete_app(firebase_admin.get_app())
-    except Exception as e:
-        print(f"Error shutting down Firebase app: {e}")
+        if growth:
+            plate_fields["growth"] = growth
+
+        # Snippet id is derived locally from the capture: the snippet, its shapes
+        # and the plate update go out in the same batches, and a retry (even a
+        # later one from the upload spool) rewrites the same docs
+        snippet_id = uuid.uuid5(uuid.NAMESPACE_URL, f"{chamber}/{plate}/{timestamp}").hex[:20]
+
+        def _upload_plate(session):
+            blob = session.bucket.blob(firebase_snippet_path)
+            blob.upload_from_filename(local_path, content_type="image/jpeg")
+            print(f"Image uploaded to Firebase Storage at '{firebase_snippet_path}' for plate {plate}")
+
+            plate_doc_ref = _chamber_doc_ref(session).collection('plates').document(plate)
+            snippet_doc_ref = plate_doc_ref.collection('snippets').document(snippet_id)
+            shapes_collection = snippet_doc_ref.collection("shapes")
+
+            writer = BatchedWriter(
+                session.db,
+                max_writes=config.FIRESTORE_BATCH_WRITES,
+                max_bytes=config.FIRESTORE_BATCH_BYTES,
+            )
+            writer.set(snippet_doc_ref, snippet_fields,
+                       size_hint=1024 + len(snippet_fields.get("contours", b"")))
+
+            for shape_num, shape_doc in enumerate(shape_docs, start=1):
+                # ~24 bytes per encoded {x, y} map
+                writer.set(
+                    shapes_collection.document(f"shape_{shape_num}"),
+                    shape_doc,
+                    size_hint=256 + 24 * len(shape_doc["coordinates"]),
+                )
+
+            # Plate fields last, they point at the snippet written above.
+            # most_recent_snippet_in_firestore_path follows every snippet,
+            # most_recent_shapes_snippet_path only the snippets that carry
+            # shapes (see the docstring)
+            latest_paths = {"most_recent_snippet_in_firestore_path": snippet_doc_ref.path}
+            if changed:
+                latest_paths["most_recent_shapes_snippet_path"] = snippet_doc_ref.path
+            writer.set(plate_doc_ref, {**plate_fields, **latest_paths}, merge=True)
+            writer.flush()
+            return writer
+
+        writer = session.call(_upload_plate)
+
+        metrics = get_metrics()
+        metrics.incr("api_calls", writer.commits, api="firestore_commit")
+        metrics.incr("firestore_writes", writer.writes)
+
+        print(f"Document added successfully for plate {plate} "
+              f"({writer.writes} writes in {writer.commits} batch commit(s)).")
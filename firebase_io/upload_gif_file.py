@@ -1,30 +1,23 @@
 import os
-import firebase_admin
-from firebase_admin import credentials, storage, firestore
 
+from firebase_io.firebase_session import get_firebase_session
 
-def upload_gif_file(gif_path, chamber, plate):
+
+def upload_gif_file(gif_path, chamber, plate, session=None):
     """Upload a GIF to Firebase Storage and set the plate's gif_path in Firestore.
 
     This function is defensive:
     - verifies the local file exists
-    - initializes the Firebase app only if not already initialized
+    - uses the shared Firebase session (initialized once per process) unless one is passed in
     - uses set(..., merge=True) to avoid errors if the plate doc does not exist
-    - only deletes the app if it initialized it here
+    Returns True on success, False otherwise.
     """
     if not os.path.exists(gif_path):
         print(f"Error: GIF file not found: {gif_path}")
-        return
+        return False
 
-    created_app = False
-    try:
-        if not firebase_admin._apps:
-            cred = credentials.Certificate("firebase-adminsdk.json")
-            firebase_admin.initialize_app(cred, {"storageBucket": "sporescope.firebasestorage.app"})
-            created_app = True
-    except Exception as e:
-        print(f"Error initializing Firebase Admin SDK: {e}")
-        return
+    if session is None:
+        session = get_firebase_session()
 
     try:
         # Extract the file name from the gif_path
@@ -34,31 +27,25 @@ def upload_gif_file(gif_path, chamber, plate):
         category = "output_gif_folder"
         firebase_gif_path = f"{category}/{file_name}"
 
-        # Reference to the Firebase Storage bucket
-        bucket = storage.bucket()
+        def _upload(session):
+            # Upload the GIF to Firebase Storage
+            blob = session.bucket.blob(firebase_gif_path.replace("\\", "/"))
+            blob.upload_from_filename(gif_path.replace("\\", "/"), content_type="image/gif")
 
-        # Upload the GIF to Firebase Storage
-        blob = bucket.blob(firebase_gif_path.replace("\\", "/"))
-        blob.upload_from_filename(gif_path.replace("\\", "/"), content_type="image/gif")
+        session.call(_upload)
 
         print(f"GIF uploaded to Firebase Storage at '{firebase_gif_path}'")
 
-        # Create a Firestore client
-        db = firestore.client()
+        def _update_plate(session):
+            # Add/update the gif_path field on the plate document (merge to avoid overwriting)
+            plate_doc_ref = session.db.collection('sporescope').document(chamber).collection('plates').document(plate)
+            plate_doc_ref.set({'gif_path': firebase_gif_path}, merge=True)
 
-        # Add/update the gif_path field on the plate document (merge to avoid overwriting)
-        plate_doc_ref = db.collection('sporescope').document(chamber).collection('plates').document(plate)
-        plate_doc_ref.set({'gif_path': firebase_gif_path}, merge=True)
+        session.call(_update_plate)
 
         print("Document updated successfully.")
+        return True
 
     except Exception as e:
         print(f"Error uploading GIF or updating Firestore: {e}")
-
-    finally:
-        # Clean up only if we created the app here
-        try:
-            if created_app and firebase_admin._apps:
-                firebase_admin.delete_app(firebase_admin.get_app())
-        except Exception:
-            pass
+        return False
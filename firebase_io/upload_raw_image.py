@@ -1,16 +1,11 @@
 import os
-import firebase_admin
-from firebase_admin import credentials, storage, firestore
-
-def upload_raw_image(image_path, chamber, timestamp):
-    # Initialize Firebase Admin SDK only if not already initialized
-    if not firebase_admin._apps:
-        cred = credentials.Certificate("firebase-adminsdk.json")
-        firebase_admin.initialize_app(cred, {
-            'storageBucket': 'sporescope.firebasestorage.app'
-        })
 
-    bucket = storage.bucket()
+from firebase_io.firebase_session import get_firebase_session
+
+def upload_raw_image(image_path, chamber, timestamp, session=None):
+    # Shared, long-lived Firebase clients (see firebase_io/firebase_session.py)
+    if session is None:
+        session = get_firebase_session()
 
     # Ensure proper filename/path
     image_path = image_path.replace("\\", "/")
@@ -24,20 +19,23 @@ def upload_raw_image(image_path, chamber, timestamp):
     category = f"{chamber}/Raw images"
     firebase_image_path = f"{category}/{file_name}"
 
-    # Upload image as PNG
-    blob = bucket.blob(firebase_image_path)
-    blob.upload_from_filename(image_path, content_type="image/png")
+    def _upload(session):
+        # Upload image as PNG
+        blob = session.bucket.blob(firebase_image_path)
+        blob.upload_from_filename(image_path, content_type="image/png")
 
+    session.call(_upload)
     print(f"Image uploaded to Firebase Storage at '{firebase_image_path}'")
 
-    # Firestore write
-    db = firestore.client()
-    db.collection('sporescope').document(chamber).collection('Raw images').add({
-        "creation date": timestamp,
-        "path": firebase_image_path
-    })
+    # Firestore write; a fixed document id keeps a retry from adding a duplicate
+    doc_id = file_name.rsplit(".", 1)[0]
 
-    print("Document added successfully.")
+    def _record(session):
+        session.db.collection('sporescope').document(chamber).collection('Raw images').document(doc_id).set({
+            "creation date": timestamp,
+            "path": firebase_image_path
+        })
+
+    session.call(_record)
 
-    # Shut down Firebase for short-lived scripts
-    firebase_admin.delete_app(firebase_admin.get_app())
+    print("Document added successfully.")
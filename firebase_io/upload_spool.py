@@ -0,0 +1,218 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+SPOOL_PATH = "upload_spool.sqlite3"
+
+SpoolJob = namedtuple("SpoolJob", ["id", "kind", "payload", "attempts", "next_attempt_at"])
+
+# Errors a retry cannot fix (a file that is gone, a malformed payload or
+# config); the job is parked at once instead of holding up the queue
+PERMANENT_ERRORS = (FileNotFoundError, ValueError, KeyError)
+
+# Columns added after the first release, created on older spools when opened
+_ADDED_COLUMNS = {"coalesce_key": "TEXT"}
+
+
+class UploadSpool:
+    """
+    Durable FIFO of pending upload jobs, stored in SQLite.
+
+    enqueue() commits before returning, so a job survives a crash or power
+    cut as soon as the capture loop has handed it over. Jobs are consumed
+    strictly in insertion order by an UploadWorker. A job that keeps failing
+    for `max_attempts` tries is parked as 'dead' so it cannot block the
+    queue forever. A job enqueued with a coalesce_key replaces the pending
+    jobs of the same kind and key, e.g. uploads of a file rewritten since.
+    """
+
+    def __init__(self, path=SPOOL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                coalesce_key TEXT
+            )
+        """)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in _ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_id ON jobs (status, id)")
+
+    def enqueue(self, kind, payload, coalesce_key=None):
+        """
+        Store a job; payload must be JSON serializable. Returns the job id.
+        With a coalesce_key, pending jobs of the same kind and key are dropped
+        in the same transaction. The one the worker may be running meanwhile
+        then completes or fails as a no-op.
+        """
+        data = json.dumps(payload)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if coalesce_key is not None:
+                    self._conn.execute(
+                        "DELETE FROM jobs WHERE status = 'pending' AND kind = ? AND coalesce_key = ?",
+                        (kind, coalesce_key),
+                    )
+                cur = self._conn.execute(
+                    "INSERT INTO jobs (kind, payload, created_at, coalesce_key) VALUES (?, ?, ?, ?)",
+                    (kind, data, time.time(), coalesce_key),
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return cur.lastrowid
+
+    def peek(self):
+        """Oldest pending job, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, payload, attempts, next_attempt_at FROM jobs "
+                "WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        return SpoolJob(row[0], row[1], json.loads(row[2]), row[3], row[4])
+
+    def complete(self, job_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def fail(self, job_id, error, retry_at, payload=None, dead=False):
+        """Record a failed attempt. An updated payload keeps partial results for the retry."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?, "
+                "status = ?, payload = COALESCE(?, payload) WHERE id = ?",
+                (retry_at, str(error), "dead" if dead else "pending",
+                 None if payload is None else json.dumps(payload), job_id),
+            )
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'pending'"
+            ).fetchone()[0]
+
+    def oldest_pending_time(self):
+        """Epoch seconds at which the oldest pending job was queued, or None."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MIN(created_at) FROM jobs WHERE status = 'pending'"
+            ).fetchone()[0]
+
+    def dead_jobs(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, attempts, last_error FROM jobs WHERE status = 'dead' ORDER BY id"
+            ).fetchall()
+        return rows
+
+    def requeue_dead(self):
+        """Give parked jobs another chance, e.g. after fixing credentials."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, next_attempt_at = 0 "
+                "WHERE status = 'dead'"
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class UploadWorker(threading.Thread):
+    """
+    Background thread draining an UploadSpool in order.
+
+    handlers maps a job kind to a function taking the payload dict. The
+    handler may store partial results in the payload (e.g. a finished GPT
+    analysis); they are saved with the failed attempt and handed back on the
+    retry. Failures back off exponentially (with jitter) from `base_delay`
+    up to `max_delay` seconds; later jobs wait so everything is replayed in
+    capture order once the uplink is back. A job failing with one of
+    `permanent_errors` is parked as 'dead' right away.
+    """
+
+    def __init__(self, spool, handlers, base_delay=5.0, max_delay=600.0, max_attempts=50,
+                 poll_interval=5.0, permanent_errors=PERMANENT_ERRORS):
+        super().__init__(name="upload-worker", daemon=True)
+        self.spool = spool
+        self.handlers = handlers
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.permanent_errors = permanent_errors
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def notify(self):
+        """Wake the worker after enqueueing a job."""
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wake.set()
+        self.join(timeout)
+
+    def run_pending(self):
+        """Try the head of the queue once. Returns seconds to wait before the next try, or None if empty."""
+        job = self.spool.peek()
+        if job is None:
+            return None
+
+        wait = job.next_attempt_at - time.time()
+        if wait > 0:
+            return wait
+
+        handler = self.handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise KeyError(f"No upload handler for job kind '{job.kind}'")
+            handler(job.payload)
+        except Exception as e:
+            attempts = job.attempts + 1
+            dead = attempts >= self.max_attempts or isinstance(e, self.permanent_errors)
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+            delay *= random.uniform(0.8, 1.2)
+            self.spool.fail(job.id, e, time.time() + delay, payload=job.payload, dead=dead)
+            if dead:
+                print(f"Upload job {job.id} ({job.kind}) parked after {attempts} attempt(s): {e!r}")
+            else:
+                print(f"Upload job {job.id} ({job.kind}) failed, retry {attempts} in {delay:.0f}s: {e}")
+            return 0 if dead else delay
+
+        self.spool.complete(job.id)
+        return 0
+
+    def run(self):
+        while not self._stopping.is_set():
+            # Cleared before looking at the queue so a notify() during the try is not lost
+            self._wake.clear()
+            try:
+                wait = self.run_pending()
+            except Exception as e:
+                print(f"Upload worker error: {e}")
+                wait = self.poll_interval
+
+            if wait == 0:
+                continue
+            self._wake.wait(self.poll_interval if wait is None else min(wait, self.max_delay))
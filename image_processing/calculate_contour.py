@@ -1,20 +1,69 @@
+import math
+
 import cv2
 import numpy as np
 
+from config import COVERED_GRAY_LEVEL
+from image_processing.colony_set import ColonySet
+from image_processing.load_image import load_image, describe_image
+
+# Only the inner part of the plate is measured; its rim and wall reflections are not
+SAFE_RADIUS_RATIO = 0.87
+
+
+def measurable_area_mm2(diameter_mm, safe_radius_ratio=SAFE_RADIUS_RATIO):
+    """Area of the safe circle of a plate, the most colonies or coverage can ever report."""
+    return math.pi * (diameter_mm * safe_radius_ratio / 2) ** 2
 
-def calculate_contour(image_path, min_area=300, safe_radius_ratio=0.87, bbox_margin=10):
+
+def calculate_contour(image_path, min_area=300, safe_radius_ratio=SAFE_RADIUS_RATIO, bbox_margin=10, geometry=None):
     """
     Detect dark mycelium blobs on a bright agar plate.
+    image_path may be a file path or an already decoded (BGR/BGRA) array.
     Filters out detections near edges/corners using:
       - circular safe-radius exclusion
       - point-distance filtering
       - bounding-box margin filtering
+    geometry: optional PlateROI of this snippet; its precomputed center,
+              radius and distance map replace the per-call ones
+
+    Returns the kept OpenCV contours; detect_colonies returns them with
+    their stats as a ColonySet.
+    """
+    filtered, _, _, _ = _find_colonies(
+        image_path, min_area, safe_radius_ratio, bbox_margin, geometry, COVERED_GRAY_LEVEL
+    )
+    return filtered
+
+
+def detect_colonies(image_path, min_area=300, safe_radius_ratio=SAFE_RADIUS_RATIO, bbox_margin=10, geometry=None,
+                    mm_per_px=None, covered_gray_level=COVERED_GRAY_LEVEL):
     """
+    Same detection as calculate_contour, returned as a ColonySet holding
+    each colony's area, centroid, bbox, perimeter and circularity, plus the
+    pixels of the safe circle whose blurred gray level is below
+    covered_gray_level.
+
+    The colony contours come from a local (adaptive) threshold and are
+    capped in size, so they vanish once mycelium covers most of the plate;
+    the covered pixels use a global level and keep growing up to the whole
+    safe circle, but depend on the exposure (see config.GROWTH_METRIC).
+    mm_per_px defaults to DIAMETER_MM / DIAMETER_PX.
+    """
+    filtered, stats, kept, coverage = _find_colonies(
+        image_path, min_area, safe_radius_ratio, bbox_margin, geometry, covered_gray_level
+    )
+    colonies = ColonySet.from_stats(filtered, stats, kept, mm_per_px)
+    colonies.covered_px, colonies.measurable_px = coverage
+    return colonies
+
+
+def _find_colonies(image_path, min_area, safe_radius_ratio, bbox_margin, geometry, covered_gray_level):
 
     # Load with alpha channel
-    img = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+    img = load_image(image_path, cv2.IMREAD_UNCHANGED)
     if img is None:
-        raise FileNotFoundError(f"Cannot load image: {image_path}")
+        raise FileNotFoundError(f"Cannot load image: {describe_image(image_path)}")
 
     # Split channels
     if img.shape[2] == 4:
@@ -61,62 +110,127 @@ def calculate_contour(image_path, min_area=300, safe_radius_ratio=0.87, bbox_mar
     # -------------------------------------------------
     # Circular edge/corner suppression
     # -------------------------------------------------
-    cx, cy = w // 2, h // 2
-    plate_radius = min(cx, cy)
+    if geometry is not None and geometry.shape == (h, w):
+        (cx, cy), plate_radius = geometry.center, geometry.r
+        distance = geometry.distance
+    else:
+        cx, cy = w // 2, h // 2
+        plate_radius = min(cx, cy)
+        distance = None
     safe_radius = int(plate_radius * safe_radius_ratio)
 
-    filtered = []
-    for c in contours:
-        area = cv2.contourArea(c)
-        if area < min_area:
-            continue
-        if area > 0.25 * h * w:
-            continue
-
-        # centroid
-        M = cv2.moments(c)
-        if M["m00"] == 0:
-            continue
-
-        cx_c = int(M["m10"] / M["m00"])
-        cy_c = int(M["m01"] / M["m00"])
+    # Covered pixels of the safe circle, by a global level on the blurred gray
+    if distance is not None:
+        center_distance = distance
+    else:
+        ys, xs = np.ogrid[:h, :w]
+        center_distance = np.sqrt((xs - cx) ** 2 + (ys - cy) ** 2)
+    measurable = valid_mask & (center_distance <= safe_radius)
+    coverage = (
+        int(np.count_nonzero(measurable & (blur < covered_gray_level))),
+        int(np.count_nonzero(measurable)),
+    )
 
-        # Distance from image center (main safe-circle filter)
-        d = np.sqrt((cx_c - cx) ** 2 + (cy_c - cy) ** 2)
-        if d > safe_radius:
-            continue
+    filtered, stats, kept = [], None, np.zeros(0, dtype=np.intp)
+    if contours:
+        stats = _contour_stats(contours)
+        points = stats["points"]
+
+        # Area range, same values as cv2.contourArea
+        keep = (stats["area"] >= min_area) & (stats["area"] <= 0.25 * h * w)
+        keep &= stats["m00"] != 0
+
+        # Centroid distance from image center (main safe-circle filter)
+        m00 = np.where(keep, stats["m00"], 1.0)
+        cx_c = (stats["m10"] / m00).astype(np.int64)
+        cy_c = (stats["m01"] / m00).astype(np.int64)
+        if distance is not None:
+            d = distance[np.clip(cy_c, 0, h - 1), np.clip(cx_c, 0, w - 1)]
+        else:
+            d = np.sqrt((cx_c - cx) ** 2 + (cy_c - cy) ** 2)
+        keep &= d <= safe_radius
 
         # ------------------------------------------------------------------
         # (1) Point-distance filter: if ANY contour point is outside safeRadius → reject
         # ------------------------------------------------------------------
-        pts = c.reshape(-1, 2)
-        dists = np.sqrt((pts[:, 0] - cx) ** 2 + (pts[:, 1] - cy) ** 2)
-        if np.any(dists > safe_radius):
-            continue
+        if distance is not None:
+            dists = distance[points[:, 1], points[:, 0]]
+        else:
+            dists = np.sqrt((points[:, 0] - cx) ** 2 + (points[:, 1] - cy) ** 2)
+        keep &= np.maximum.reduceat(dists, stats["starts"]) <= safe_radius
 
         # ------------------------------------------------------------------
         # (2) Bounding-box margin filter: reject contours too close to edge
         # ------------------------------------------------------------------
-        x, y, bw, bh = cv2.boundingRect(c)
-        if (x < bbox_margin or
-            y < bbox_margin or
-            x + bw > w - bbox_margin or
-            y + bh > h - bbox_margin):
-            continue
-
-        filtered.append(c)
+        x, y, bw, bh = stats["bbox"].T
+        keep &= ((x >= bbox_margin) &
+                 (y >= bbox_margin) &
+                 (x + bw <= w - bbox_margin) &
+                 (y + bh <= h - bbox_margin))
 
-    # --- Draw result ---
-    result = bgr.copy()
-
-    # Optional: visualize safe circle
-    cv2.circle(result, (cx, cy), safe_radius, (255, 0, 0), 1)
-
-    cv2.drawContours(result, filtered, -1, (0, 255, 0), 2)
+        kept = np.flatnonzero(keep)
+        filtered = [contours[i] for i in kept]
 
     # # --- Display ---
+    # result = bgr.copy()
+    # cv2.circle(result, (cx, cy), safe_radius, (255, 0, 0), 1)
+    # cv2.drawContours(result, filtered, -1, (0, 255, 0), 2)
     # cv2.imshow("Detected mycelium (enhanced edge filtering)", result)
     # cv2.waitKey(0)
     # cv2.destroyAllWindows()
 
-    return filtered
+    return filtered, stats, kept, coverage
+
+
+def _contour_stats(contours):
+    """
+    Area, first-order moments, bounding box and perimeter of every contour at once,
+    computed from the concatenated points the way cv2.contourArea,
+    cv2.moments and cv2.boundingRect do for integer contours.
+    """
+    lengths = np.fromiter((len(c) for c in contours), dtype=np.intp, count=len(contours))
+    starts = np.zeros(len(contours), dtype=np.intp)
+    np.cumsum(lengths[:-1], out=starts[1:])
+
+    points = np.concatenate([c.reshape(-1, 2) for c in contours]).astype(np.int64)
+    x, y = points[:, 0], points[:, 1]
+
+    # Previous point of each point, wrapping around within its contour
+    prev = np.arange(len(points)) - 1
+    prev[starts] = starts + lengths - 1
+    xp, yp = x[prev], y[prev]
+
+    # Green's theorem terms; integer sums are exact, like OpenCV's doubles
+    cross = xp * y - x * yp
+    a00 = np.add.reduceat(cross, starts).astype(np.float64)
+    a10 = np.add.reduceat(cross * (xp + x), starts).astype(np.float64)
+    a01 = np.add.reduceat(cross * (yp + y), starts).astype(np.float64)
+
+    # cv2.moments orientation handling and constants
+    sign = np.where(a00 > 0, 1.0, -1.0)
+    valid = np.abs(a00) > np.finfo(np.float32).eps
+    m00 = np.where(valid, a00 * (sign * 0.5), 0.0)
+    m10 = np.where(valid, a10 * (sign * 0.16666666666666666666666666666667), 0.0)
+    m01 = np.where(valid, a01 * (sign * 0.16666666666666666666666666666667), 0.0)
+
+    perimeter = np.add.reduceat(np.hypot(x - xp, y - yp), starts)
+
+    x_min = np.minimum.reduceat(x, starts)
+    y_min = np.minimum.reduceat(y, starts)
+    bbox = np.stack([
+        x_min,
+        y_min,
+        np.maximum.reduceat(x, starts) - x_min + 1,
+        np.maximum.reduceat(y, starts) - y_min + 1,
+    ], axis=1)
+
+    return {
+        "points": points,
+        "starts": starts,
+        "area": np.abs(a00 * 0.5),
+        "m00": m00,
+        "m10": m10,
+        "m01": m01,
+        "bbox": bbox,
+        "perimeter": perimeter,
+    }
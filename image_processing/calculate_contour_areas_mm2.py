@@ -1,11 +1,15 @@
 import cv2
 
-def calculate_contour_areas_mm2(contours, image_height_px=500, image_height_mm=58.0):
+from image_processing.colony_set import ColonySet
+from config import DIAMETER_PX, DIAMETER_MM
+
+def calculate_contour_areas_mm2(contours, image_height_px=DIAMETER_PX, image_height_mm=DIAMETER_MM):
     """
     Calculate TOTAL contour area in mm².
 
     Args:
-        contours (list[np.ndarray]): OpenCV contours
+        contours (list[np.ndarray] | ColonySet): OpenCV contours, or a
+            ColonySet whose precomputed areas are used as is
         image_height_px (int): image height in pixels
         image_height_mm (float): real image height in mm
 
@@ -13,6 +17,9 @@ def calculate_contour_areas_mm2(contours, image_height_px=500, image_height_mm=5
         float: total area of all contours in mm²
     """
 
+    if isinstance(contours, ColonySet):
+        return contours.total_area_mm2()
+
     if not contours:
         return 0.0
 
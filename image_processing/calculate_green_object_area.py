@@ -1,16 +1,18 @@
 import cv2
 import numpy as np
 
+from image_processing.load_image import load_image, describe_image
+
 def calculate_green_object_area(image_paths):
     """
-    Accepts either a single image path (string) or a list of image paths.
+    Accepts either a single image (path string or numpy array) or a list of them.
     Returns a single area value (int) if one path,
     or a list of area values if multiple paths.
     """
     
     # Normalize to list
     single_input = False
-    if isinstance(image_paths, str):
+    if isinstance(image_paths, (str, np.ndarray)):
         single_input = True
         image_paths = [image_paths]
 
@@ -18,9 +20,9 @@ def calculate_green_object_area(image_paths):
 
     for path in image_paths:
         try:
-            image = cv2.imread(path)
+            image = load_image(path)
             if image is None:
-                print(f"⚠️ Unable to load image: {path}")
+                print(f"⚠️ Unable to load image: {describe_image(path)}")
                 results.append(None)
                 continue
 
@@ -39,7 +41,7 @@ def calculate_green_object_area(image_paths):
             results.append(total_area)
 
         except Exception as e:
-            print(f"⚠️ Error processing {path}: {str(e)}")
+            print(f"⚠️ Error processing {describe_image(path)}: {str(e)}")
             results.append(None)
 
     # Return single value instead of list if input was single
@@ -1,16 +1,17 @@
-import cv2
 import numpy as np
 
+from image_processing.load_image import load_image, describe_image
+
 def calculate_mean_intensities(image_paths):
     """
-    Accepts either a single image path (string) or a list of image paths.
+    Accepts either a single image (path string or numpy array) or a list of them.
     Returns a single (r, g, b) tuple if one path,
     or a list of (r, g, b) tuples if multiple paths.
     """
 
     # Normalize to list
     single_input = False
-    if isinstance(image_paths, str):
+    if isinstance(image_paths, (str, np.ndarray)):
         single_input = True
         image_paths = [image_paths]
 
@@ -18,10 +19,10 @@ def calculate_mean_intensities(image_paths):
 
     for path in image_paths:
         try:
-            image = cv2.imread(path)
+            image = load_image(path)
 
             if image is None:
-                print(f"⚠️ Unable to load image: {path}")
+                print(f"⚠️ Unable to load image: {describe_image(path)}")
                 results.append(None)
                 continue
 
@@ -32,7 +33,7 @@ def calculate_mean_intensities(image_paths):
             results.append((mean_red, mean_green, mean_blue))
 
         except Exception as e:
-            print(f"⚠️ Error processing {path}: {str(e)}")
+            print(f"⚠️ Error processing {describe_image(path)}: {str(e)}")
             results.append(None)
 
     # Return single result instead of list if only 1 input
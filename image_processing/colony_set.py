@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+
+from config import DIAMETER_MM, DIAMETER_PX
+
+COLONY_DTYPE = np.dtype([
+    ("area_px", np.float64),
+    ("area_mm2", np.float64),
+    ("centroid_x", np.float64),
+    ("centroid_y", np.float64),
+    ("bbox_x", np.int32),
+    ("bbox_y", np.int32),
+    ("bbox_w", np.int32),
+    ("bbox_h", np.int32),
+    ("perimeter_px", np.float64),
+    ("circularity", np.float64),
+])
+
+
+def default_mm_per_px():
+    return DIAMETER_MM / DIAMETER_PX
+
+
+class ColonySet:
+    """
+    Colonies found on one snippet: a COLONY_DTYPE record per colony, computed
+    once during segmentation, next to the OpenCV contours they came from.
+    Coordinates are snippet pixels. covered_px / measurable_px: pixels of
+    the plate's safe circle covered by mycelium, and all of them.
+    """
+
+    __slots__ = ("records", "contours", "mm_per_px", "covered_px", "measurable_px")
+
+    def __init__(self, records, contours, mm_per_px=None, covered_px=0, measurable_px=0):
+        self.records = records
+        self.contours = contours
+        self.mm_per_px = default_mm_per_px() if mm_per_px is None else mm_per_px
+        self.covered_px = covered_px
+        self.measurable_px = measurable_px
+
+    @classmethod
+    def empty(cls, mm_per_px=None):
+        return cls(np.zeros(0, dtype=COLONY_DTYPE), [], mm_per_px)
+
+    @classmethod
+    def from_stats(cls, contours, stats, kept, mm_per_px=None):
+        """Build from calculate_contour's per-contour stats and the kept indices."""
+        colonies = cls.empty(mm_per_px)
+        if stats is None or len(kept) == 0:
+            return colonies
+
+        records = np.zeros(len(kept), dtype=COLONY_DTYPE)
+        area = stats["area"][kept]
+        perimeter = stats["perimeter"][kept]
+        bbox = stats["bbox"][kept]
+
+        records["area_px"] = area
+        records["area_mm2"] = area * colonies.mm_per_px ** 2
+        records["centroid_x"] = stats["m10"][kept] / stats["m00"][kept]
+        records["centroid_y"] = stats["m01"][kept] / stats["m00"][kept]
+        records["bbox_x"], records["bbox_y"], records["bbox_w"], records["bbox_h"] = bbox.T
+        records["perimeter_px"] = perimeter
+        np.divide(4 * math.pi * area, perimeter ** 2, out=records["circularity"], where=perimeter > 0)
+
+        colonies.records = records
+        colonies.contours = list(contours)
+        return colonies
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.contours)
+
+    def total_area_mm2(self):
+        """Same value calculate_contour_areas_mm2 gives for these contours."""
+        return round(float(self.records["area_mm2"].sum()), 2)
+
+    def covered_area_mm2(self):
+        """Area of the safe circle covered by mycelium, whether or not it was split into colonies."""
+        return round(self.covered_px * self.mm_per_px ** 2, 2)
+
+    def coordinates(self):
+        """Contour points as [[x, y], ...] per colony, ready for JSON."""
+        return [c.reshape(-1, 2).tolist() for c in self.contours]
+
+    def stats(self):
+        """Per-colony stats as plain dicts (mm and px), ready for JSON/Firestore."""
+        return [
+            {
+                "area_px": round(float(r["area_px"]), 1),
+                "area_mm2": round(float(r["area_mm2"]), 3),
+                "centroid": {"x": round(float(r["centroid_x"]), 1), "y": round(float(r["centroid_y"]), 1)},
+                "bbox": {"x": int(r["bbox_x"]), "y": int(r["bbox_y"]), "w": int(r["bbox_w"]), "h": int(r["bbox_h"])},
+                "perimeter_px": round(float(r["perimeter_px"]), 1),
+                "circularity": round(float(r["circularity"]), 3),
+            }
+            for r in self.records
+        ]
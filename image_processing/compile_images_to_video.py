@@ -2,27 +2,40 @@ import cv2
 import os
 import datetime
 
-def compile_images_into_video(image_directory, output_video_path, frame_rate):
-    image_files = [f for f in os.listdir(image_directory) if f.endswith('.png')]
-    image_files.sort()  # Ensure filenames are sorted in numerical order
+from image_processing.frame_manifest import get_frame_manifest
+from image_processing.segmented_video import fit_frame, read_frame
 
-    if len(image_files) == 0:
+def compile_images_into_video(image_directory, output_video_path, frame_rate, start=None, end=None):
+    # Frames in capture order, optionally limited to start <= timestamp < end
+    image_paths = [entry.path for entry in get_frame_manifest(image_directory).query(start, end)]
+
+    if len(image_paths) == 0:
         print("No image files found in the directory.")
         return
 
-    first_image = cv2.imread(os.path.join(image_directory, image_files[0]))
-    height, width, _ = first_image.shape
-
-    fourcc = cv2.VideoWriter_fourcc(*'XVID')
-    video_writer = cv2.VideoWriter(output_video_path, fourcc, frame_rate, (width, height))
-
-    for image_file in image_files:
-        image_path = os.path.join(image_directory, image_file)
-        frame = cv2.imread(image_path)
-        video_writer.write(frame)
+    video_writer = None
+    frame_size = None
+    skipped = 0
+    for image_path in image_paths:
+        frame = read_frame(image_path)
+        if frame is None:
+            skipped += 1
+            continue
+
+        # Sized from the first readable frame; odd-sized ones are letterboxed to it
+        if video_writer is None:
+            height, width = frame.shape[:2]
+            frame_size = (width // 2 * 2, height // 2 * 2)
+            fourcc = cv2.VideoWriter_fourcc(*'XVID')
+            video_writer = cv2.VideoWriter(output_video_path, fourcc, frame_rate, frame_size)
+        video_writer.write(fit_frame(frame, frame_size))
+
+    if video_writer is None:
+        print("No readable image files found in the directory.")
+        return
 
     video_writer.release()
-    print(f"Video saved at {output_video_path}")
+    print(f"Video saved at {output_video_path}" + (f" ({skipped} unreadable frame(s) skipped)" if skipped else ""))
 
 def create_and_compile_video_folder(input_image_directory, output_folder='compiled_videos', frame_rate=10):
     if not os.path.exists(output_folder):
@@ -0,0 +1,95 @@
+import cv2
+import numpy as np
+
+# Stored next to the bytes so readers can tell the format apart
+CONTOUR_ENCODING = "zigzag-delta-varint-v1"
+
+
+def simplify_contour(contour, tolerance):
+    """
+    Douglas-Peucker simplification of a closed contour (OpenCV array or
+    [[x, y], ...]) with a maximum deviation of `tolerance` pixels.
+    A tolerance of 0 keeps every point. Returns an (n, 2) int32 array.
+    """
+    points = np.asarray(contour, dtype=np.int32).reshape(-1, 1, 2)
+    if tolerance > 0 and len(points) > 2:
+        points = cv2.approxPolyDP(points, tolerance, True)
+    return points.reshape(-1, 2)
+
+
+def _encode_varints(values):
+    """LEB128 unsigned varints of a uint64 array, as bytes."""
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0:
+        return b""
+
+    nbytes = np.ones(len(values), dtype=np.intp)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        nbytes += rest > 0
+        rest >>= np.uint64(7)
+
+    offsets = np.zeros(len(values), dtype=np.intp)
+    np.cumsum(nbytes[:-1], out=offsets[1:])
+    out = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(int(nbytes.max())):
+        sel = nbytes > k
+        chunk = (values[sel] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (nbytes[sel] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[offsets[sel] + k] = chunk | more
+    return out.tobytes()
+
+
+def _decode_varints(data):
+    """Inverse of _encode_varints, returns a uint64 array."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if len(raw) == 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    ends = np.flatnonzero(raw < 0x80)
+    if len(ends) == 0 or ends[-1] != len(raw) - 1:
+        raise ValueError("Truncated varint stream.")
+
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    position = np.arange(len(raw)) - np.repeat(starts, ends - starts + 1)
+    shifted = (raw & 0x7F).astype(np.uint64) << (np.uint64(7) * position.astype(np.uint64))
+    return np.add.reduceat(shifted, starts)
+
+
+def encode_contours(contours, tolerance=0.0):
+    """
+    Pack contours into compact bytes.
+
+    Each contour is simplified with `tolerance` (pixels, 0 = lossless), then
+    all points are written as one polyline of zigzag-encoded deltas from the
+    previous point, preceded by the contour count and point counts, every
+    number as a varint. Typical colony outlines take 2-3 bytes per point.
+    """
+    simplified = [simplify_contour(c, tolerance) for c in contours]
+    lengths = [len(points) for points in simplified]
+
+    header = np.array([len(simplified)] + lengths, dtype=np.uint64)
+    if not any(lengths):
+        return _encode_varints(header)
+
+    points = np.concatenate(simplified).astype(np.int64)
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+    return _encode_varints(np.concatenate((header, zigzag)))
+
+
+def decode_contours(data):
+    """Inverse of encode_contours: a list of (n, 2) int32 point arrays."""
+    values = _decode_varints(bytes(data))
+    if len(values) == 0:
+        return []
+
+    count = int(values[0])
+    lengths = values[1:count + 1].astype(np.intp)
+    zigzag = values[count + 1:]
+    if len(lengths) != count or len(zigzag) != 2 * int(lengths.sum()):
+        raise ValueError("Contour data does not match its header.")
+
+    deltas = (zigzag >> np.uint64(1)).astype(np.int64) ^ -(zigzag & np.uint64(1)).astype(np.int64)
+    points = np.cumsum(deltas.reshape(-1, 2), axis=0).astype(np.int32)
+    return np.split(points, np.cumsum(lengths)[:-1]) if count else []
@@ -2,32 +2,66 @@
 
 import os
 import sys
-import re
-from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageDraw, ImageFont
 
+from image_processing.frame_archive import open_frame_image
+from image_processing.frame_manifest import get_frame_manifest
 
-def extract_datetime(filename):
-    # Format: 2025-12-07T09_14_14Z or 2025-12-11T20:47:52Z
-    m = re.search(r"(\d{4}-\d{2}-\d{2}T\d{2}[_:]\d{2}[_:]\d{2})Z?", filename)
-    if m:
-        ts = m.group(1).replace("_", ":")
-        try:
-            return datetime.strptime(ts, "%Y-%m-%dT%H:%M:%S")
-        except:
-            pass
 
-    # Format: 2025-12-07T091414
-    m2 = re.search(r"(\d{4}-\d{2}-\d{2}T)(\d{6})", filename)
-    if m2:
-        base, raw = m2.group(1), m2.group(2)
-        ts = f"{base}{raw[:2]}:{raw[2:4]}:{raw[4:]}"
+FONT_PATHS = [
+    "Roboto-Regular.ttf",
+    "C:/Windows/Fonts/Roboto-Regular.ttf",
+    "DejaVuSans.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+    "C:/Windows/Fonts/calibri.ttf"
+]
+
+_font = None
+
+
+def load_font():
+    # Loaded once per process, the same font is reused for every frame label
+    global _font
+    if _font is not None:
+        return _font
+
+    for font_path in FONT_PATHS:
         try:
-            return datetime.strptime(ts, "%Y-%m-%dT%H:%M:%S")
+            _font = ImageFont.truetype(font_path, 22)
+            print(f"Using font: {font_path}")
+            return _font
         except:
-            pass
+            continue
+
+    print("Warning: All fonts failed, using default (small) font")
+    _font = ImageFont.load_default()
+    return _font
+
+
+def list_timestamped_images(input_folder):
+    """Return [(filename, datetime)] for every image in the folder, oldest first."""
+    return [(os.path.basename(entry.path), entry.timestamp)
+            for entry in get_frame_manifest(input_folder).query()]
+
+
+def render_frame(path, width, hours, font, size=None):
+    """Load one image, resize it to `width` (or exactly `size`) and draw the hours label."""
+    img = open_frame_image(path).convert("RGBA")
+
+    if size is None:
+        size = (width, int(img.height * (width / img.width)))
+    img = img.resize(size)
+
+    draw = ImageDraw.Draw(img)
+    label = f"hours: {hours}"
+    draw.text((10, 10), label, fill=(128, 128, 128), font=font)
+    return img
+
 
-    return None
+def gif_output_path(input_folder, output_gif):
+    out_folder = os.path.join(os.path.dirname(input_folder), "output_gif")
+    os.makedirs(out_folder, exist_ok=True)
+    return os.path.join(out_folder, output_gif)
 
 
 def create_gif_from_images(input_folder, output_gif, width, duration, skip):
@@ -35,73 +69,36 @@ def create_gif_from_images(input_folder, output_gif, width, duration, skip):
         print(f"GIF not created: folder does not exist → {input_folder}")
         return None
 
-    files = [f for f in os.listdir(input_folder)
-             if f.lower().endswith((".png", ".jpg", ".jpeg"))]
-
-    if not files:
-        print("GIF not created: no images found.")
-        return None
-
-    items = [(f, extract_datetime(f)) for f in files]
-    items = [(f, dt) for f, dt in items if dt]
+    items = list_timestamped_images(input_folder)
 
     if not items:
-        print("GIF not created: no valid timestamps in filenames.")
+        print("GIF not created: no images with valid timestamps found.")
         return None
 
-    items.sort(key=lambda x: x[1])
     items = items[::max(int(skip), 1)]
 
     start_dt = items[0][1]
+    font = load_font()
     frames = []
 
-    font = None
-    font_paths = [
-        "Roboto-Regular.ttf",
-        "C:/Windows/Fonts/Roboto-Regular.ttf",
-        "DejaVuSans.ttf",
-        "C:/Windows/Fonts/arial.ttf",
-        "C:/Windows/Fonts/calibri.ttf"
-    ]
-    
-    for font_path in font_paths:
-        try:
-            font = ImageFont.truetype(font_path, 22)
-            print(f"Using font: {font_path}")
-            break
-        except:
-            continue
-    
-    if font is None:
-        print("Warning: All fonts failed, using default (small) font")
-        font = ImageFont.load_default()
-
     for fname, dt in items:
         path = os.path.join(input_folder, fname)
-        img = Image.open(path).convert("RGBA")
-
-        h = int(img.height * (width / img.width))
-        img = img.resize((width, h))
-
-        draw = ImageDraw.Draw(img)
         hours = round((dt - start_dt).total_seconds() / 3600)
-        label = f"hours: {hours}"
+        frames.append(render_frame(path, width, hours, font))
 
-        draw.text((10, 10), label, fill=(128, 128, 128), font=font)
-
-        frames.append(img)
-
-    out_folder = os.path.join(os.path.dirname(input_folder), "output_gif")
-    os.makedirs(out_folder, exist_ok=True)
-    out_path = os.path.join(out_folder, output_gif)
+    out_path = gif_output_path(input_folder, output_gif)
 
+    # Written next to the GIF and swapped in, so a reader never sees half of it
+    tmp_path = f"{out_path}.tmp"
     frames[0].save(
-        out_path,
+        tmp_path,
+        format="GIF",
         save_all=True,
         append_images=frames[1:],
         duration=int(duration * 1000),
         loop=0
     )
+    os.replace(tmp_path, out_path)
 
     print(f"GIF created: {out_path}")
     return out_path
@@ -1,54 +1,73 @@
 import cv2
 import os
-import numpy as np
 
-def cut_and_save_circle_snippets(image_path, circle_coords_list, plates, chamber):
+from core.image_writer import write_image_async, wait_for_image
+from image_processing.load_image import load_image
+from image_processing.plate_geometry import get_plate_geometry
+
+
+def cut_circle_snippets(image, circle_coords_list):
     """
-    image_path: path to image file
+    image: image path or decoded array
     circle_coords_list: list of (cx, cy, r)
-    plates: list of plate IDs (same length as circle_coords_list)
-    chamber: chamber ID
+
+    Returns a list of BGRA arrays (one per circle, transparent outside the circle),
+    or None if the image cannot be loaded. The arrays are reused buffers of the
+    shared PlateGeometry and are overwritten two calls later.
     """
-    try:
-        if len(circle_coords_list) != len(plates):
-            raise ValueError("circle_coords_list and plates must have the same length.")
+    image = load_image(image, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        return None
 
-        # Load image
-        image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
-        if image is None:
-            raise FileNotFoundError("Image not found or could not be opened.")
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
 
-        # Ensure image has 4 channels (RGBA/BGRA)
-        if image.shape[2] == 3:
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+    # Masks and output buffers are built once per layout; only each ROI is touched
+    return get_plate_geometry(circle_coords_list, image.shape).extract(image)
 
-        filename = os.path.basename(image_path)  # ⬅️ Use original filename (same behavior)
-        saved_paths = []
 
-        # Loop plate-by-plate (each plate has matching circle)
-        for plate, (cx, cy, r) in zip(plates, circle_coords_list):
-            output_directory = os.path.join("captured_images", chamber, plate)
-            os.makedirs(output_directory, exist_ok=True)
+def save_circle_snippets(snippets, plates, chamber, filename):
+    """
+    Queue each snippet for writing to captured_images/<chamber>/<plate>/<filename>.
+    Writes happen in the background; returns the output paths immediately.
+    """
+    saved_paths = []
+    for plate, snippet in zip(plates, snippets):
+        output_directory = os.path.join("captured_images", chamber, plate)
+        os.makedirs(output_directory, exist_ok=True)
+
+        output_path = os.path.join(output_directory, filename)
+        write_image_async(output_path, snippet)
+        saved_paths.append(output_path)
 
-            # Create mask
-            mask = np.zeros(image.shape[:2], dtype=np.uint8)
-            cv2.circle(mask, (cx, cy), r, 255, -1)
+        print(f"Saving cropped circular snippet for plate {plate}: {output_path}")
 
-            # Apply mask for transparent cutout
-            result = np.zeros_like(image)
-            result[mask == 255] = image[mask == 255]
+    return saved_paths
 
-            # Crop to bounding square
-            x1, y1 = cx - r, cy - r
-            x2, y2 = cx + r, cy + r
-            cropped = result[y1:y2, x1:x2]
 
-            # Save using original filename (same as rectangle version)
-            output_path = os.path.join(output_directory, filename)
-            cv2.imwrite(output_path, cropped)
-            saved_paths.append(output_path)
+def cut_and_save_circle_snippets(image_path, circle_coords_list, plates, chamber, filename=None):
+    """
+    image_path: path to image file (or decoded array, then `filename` is required)
+    circle_coords_list: list of (cx, cy, r)
+    plates: list of plate IDs (same length as circle_coords_list)
+    chamber: chamber ID
+    """
+    try:
+        if len(circle_coords_list) != len(plates):
+            raise ValueError("circle_coords_list and plates must have the same length.")
+
+        if filename is None:
+            filename = os.path.basename(image_path)  # ⬅️ Use original filename (same behavior)
+
+        snippets = cut_circle_snippets(image_path, circle_coords_list)
+        if snippets is None:
+            raise FileNotFoundError("Image not found or could not be opened.")
+
+        saved_paths = save_circle_snippets(snippets, plates, chamber, filename)
 
-            print(f"Saved cropped circular snippet for plate {plate}: {output_path}")
+        # Callers of this function read the files straight back
+        for path in saved_paths:
+            wait_for_image(path)
 
         return saved_paths
 
@@ -0,0 +1,211 @@
+import io
+import json
+import os
+import threading
+import uuid
+import zlib
+from collections import namedtuple
+from datetime import datetime
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from image_processing.extract_datetime import extract_datetime
+
+ARCHIVE_DIR = "archive"
+ARCHIVE_VERSION = 1
+
+# One frame inside a pack: its original file name and capture time, where its
+# bytes sit in the pack and their crc32
+ArchivedFrame = namedtuple("ArchivedFrame", ["filename", "timestamp", "offset", "length", "crc32"])
+
+ArchiveIndex = namedtuple("ArchiveIndex", ["pack_path", "frames"])
+
+
+def archive_folder(folder):
+    return os.path.join(folder, ARCHIVE_DIR)
+
+
+def index_path(folder, day):
+    """captured_images/<chamber>/<plate>/archive/<YYYY-MM-DD>.idx"""
+    return os.path.join(archive_folder(folder), f"{day.isoformat()}.idx")
+
+
+# index path -> (mtime_ns, ArchiveIndex)
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def load_index(path):
+    """
+    ArchiveIndex of one day (frames by file name), or None if the day is not
+    archived. Cached until the index file changes.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _indexes_lock:
+        cached = _indexes.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    frames = {}
+    with open(path) as f:
+        header = json.loads(f.readline())
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                frames[record["file"]] = ArchivedFrame(
+                    record["file"], datetime.fromisoformat(record["timestamp"]),
+                    record["offset"], record["length"], record["crc32"],
+                )
+    index = ArchiveIndex(os.path.join(os.path.dirname(path), header["pack"]), frames)
+    with _indexes_lock:
+        _indexes[path] = (mtime, index)
+    return index
+
+
+def archived_frames(folder):
+    """Every ArchivedFrame of a folder, all days."""
+    directory = archive_folder(folder)
+    if not os.path.isdir(directory):
+        return []
+    frames = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".idx"):
+            frames.extend(load_index(os.path.join(directory, name)).frames.values())
+    return frames
+
+
+def write_archive(folder, day, frames):
+    """
+    Pack the frames of one day. `frames` is a list of (filename, timestamp,
+    data) in capture order; the bytes are stored as they are (the PNGs are
+    already compressed losslessly), so a frame read back is identical to the
+    file it came from.
+
+    The pack gets a new name every time and the index, which names its
+    pack, is swapped in atomically: a reader sees either the old or the new
+    archive, never a mix. The previous pack is removed afterwards.
+    Returns the ArchiveIndex.
+    """
+    directory = archive_folder(folder)
+    os.makedirs(directory, exist_ok=True)
+    path = index_path(folder, day)
+    previous = load_index(path)
+
+    pack_name = f"{day.isoformat()}-{uuid.uuid4().hex[:8]}.pack"
+    pack_path = os.path.join(directory, pack_name)
+    records = []
+    offset = 0
+    with open(pack_path, "wb") as f:
+        for filename, timestamp, data in frames:
+            f.write(data)
+            records.append(ArchivedFrame(filename, timestamp, offset, len(data), zlib.crc32(data)))
+            offset += len(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(json.dumps({"version": ARCHIVE_VERSION, "pack": pack_name, "day": day.isoformat()}) + "\n")
+        for frame in records:
+            f.write(json.dumps({
+                "file": frame.filename,
+                "timestamp": frame.timestamp.isoformat(),
+                "offset": frame.offset,
+                "length": frame.length,
+                "crc32": frame.crc32,
+            }) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    if previous is not None and previous.pack_path != pack_path and os.path.exists(previous.pack_path):
+        os.remove(previous.pack_path)
+    return load_index(path)
+
+
+def remove_orphan_packs(folder):
+    """Delete packs no index points to (left by a compaction that was cut short)."""
+    directory = archive_folder(folder)
+    if not os.path.isdir(directory):
+        return 0
+    referenced = {
+        os.path.basename(load_index(os.path.join(directory, name)).pack_path)
+        for name in os.listdir(directory) if name.endswith(".idx")
+    }
+    removed = 0
+    for name in os.listdir(directory):
+        if (name.endswith(".pack") and name not in referenced) or name.endswith(".idx.tmp"):
+            os.remove(os.path.join(directory, name))
+            removed += 1
+    return removed
+
+
+def _locate(path, timestamp):
+    folder, filename = os.path.split(path)
+    index = load_index(index_path(folder, timestamp.date()))
+    if index is None:
+        return None, None
+    return index.pack_path, index.frames.get(filename)
+
+
+def read_archived_bytes(path, timestamp):
+    """Bytes of an archived frame, or None if it is not in the archive of its day."""
+    for _ in range(2):
+        pack_path, frame = _locate(path, timestamp)
+        if frame is None:
+            return None
+        try:
+            with open(pack_path, "rb") as f:
+                f.seek(frame.offset)
+                data = f.read(frame.length)
+        except FileNotFoundError:
+            # The day was compacted again while we held its old index; reload it
+            continue
+        if zlib.crc32(data) != frame.crc32:
+            print(f"Archived frame {path} is corrupt (crc mismatch)")
+            return None
+        return data
+    return None
+
+
+def read_frame_bytes(path):
+    """
+    Encoded bytes of a capture, from its file or, once the file has been
+    compacted, from the archive of its day. None if neither has it.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    timestamp = extract_datetime(os.path.basename(path))
+    if timestamp is None:
+        return None
+    return read_archived_bytes(path, timestamp)
+
+
+def load_frame(path, flags=cv2.IMREAD_COLOR):
+    """cv2.imread() that also finds archived captures. None if the frame cannot be loaded."""
+    if os.path.exists(path):
+        return cv2.imread(path, flags)
+    data = read_frame_bytes(path)
+    if data is None:
+        return None
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+
+
+def open_frame_image(path):
+    """PIL Image.open() that also finds archived captures."""
+    if os.path.exists(path):
+        return Image.open(path)
+    data = read_frame_bytes(path)
+    if data is None:
+        raise FileNotFoundError(f"Frame not found on disk or in the archive: {path}")
+    return Image.open(io.BytesIO(data))
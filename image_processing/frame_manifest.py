@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+
+import json
+import os
+import sys
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import datetime
+
+from image_processing.extract_datetime import extract_datetime
+from image_processing.frame_archive import archived_frames
+
+MANIFEST_NAME = "manifest.jsonl"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# timestamp: naive UTC datetime of the capture, path: absolute/relative file path
+FrameEntry = namedtuple("FrameEntry", ["timestamp", "path", "size", "crc32", "metrics"])
+
+
+def _file_crc32(path):
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+class FrameManifest:
+    """
+    Append-only index of the frames in one plate folder
+    (captured_images/<chamber>/<plate>/manifest.jsonl).
+
+    Each line records one frame: timestamp, filename, size, crc32 and a few
+    metrics. Later lines for the same filename replace earlier ones. The
+    entries are kept sorted by timestamp in memory, so time range queries are
+    a bisect instead of a listdir + filename parse.
+
+    If the manifest is missing it is rebuilt from the files on disk and the
+    day archives of the folder (frames compacted by retention keep their
+    entries, read them with frame_archive.read_frame_bytes/load_frame). If
+    files were added behind its back (the folder mtime moved), the next
+    query appends them; only a loose file that disappeared without sync()
+    makes it rebuild the whole manifest.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, MANIFEST_NAME)
+        self._times = []
+        self._files = []
+        self._entries = {}
+        self._folder_mtime = None
+        # Image file names in the folder at the last look, to tell new files and deletions apart
+        self._loose_files = set()
+        self._torn_tail = False
+
+        if os.path.exists(self.path):
+            self._load()
+            if self._stat_folder() > os.stat(self.path).st_mtime_ns:
+                self.sync()
+            else:
+                self._loose_files = self._list_images()
+        else:
+            self.rebuild()
+
+    def __len__(self):
+        self._check_folder()
+        return len(self._files)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def append(self, timestamp, path, size=None, crc32=None, metrics=None):
+        """
+        Record a frame. `timestamp` is a datetime or capture timestamp string,
+        size/crc32 are computed from the file when not given.
+        """
+        if isinstance(timestamp, str):
+            timestamp = extract_datetime(timestamp)
+        if timestamp is None:
+            raise ValueError(f"No valid timestamp for {path}")
+
+        filename = os.path.basename(path)
+        full_path = os.path.join(self.folder, filename)
+        if size is None:
+            size = os.path.getsize(full_path)
+        if crc32 is None:
+            crc32 = _file_crc32(full_path)
+
+        os.makedirs(self.folder, exist_ok=True)
+        self._add(timestamp, filename, size, crc32, metrics)
+        self._append_records([filename])
+        if os.path.exists(full_path):
+            self._loose_files.add(filename)
+        self._folder_mtime = self._stat_folder()
+
+    def rebuild(self):
+        """Rewrite the manifest from the image files and archives of the folder (metrics are kept where known)."""
+        old_entries = dict(self._entries)
+        self._times, self._files, self._entries = [], [], {}
+        self._loose_files = self._list_images()
+
+        if os.path.isdir(self.folder):
+            for filename in self._loose_files:
+                timestamp = extract_datetime(filename)
+                if timestamp is None:
+                    continue
+                full_path = os.path.join(self.folder, filename)
+                old = old_entries.get(filename)
+                if old is not None and old.size == os.path.getsize(full_path):
+                    self._add(old.timestamp, filename, old.size, old.crc32, old.metrics)
+                else:
+                    self._add(timestamp, filename, os.path.getsize(full_path),
+                              _file_crc32(full_path), None)
+
+            for frame in archived_frames(self.folder):
+                if frame.filename in self._entries:
+                    continue  # the loose file wins while both exist
+                old = old_entries.get(frame.filename)
+                metrics = old.metrics if old is not None and old.crc32 == frame.crc32 else None
+                self._add(frame.timestamp, frame.filename, frame.length, frame.crc32, metrics)
+
+            self._rewrite()
+
+        self._folder_mtime = self._stat_folder()
+        print(f"Manifest rebuilt with {len(self._files)} frame(s): {self.path}")
+
+    def sync(self):
+        """Pick up frames added or removed without going through append(), e.g. after archiving."""
+        self.rebuild()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def query(self, start=None, end=None):
+        """Entries with start <= timestamp < end, oldest first (either bound may be None)."""
+        self._check_folder()
+        lo = 0 if start is None else bisect_left(self._times, start)
+        hi = len(self._times) if end is None else bisect_left(self._times, end)
+        return [self._entry(i) for i in range(lo, hi)]
+
+    def after(self, timestamp):
+        """Entries strictly newer than `timestamp`, oldest first."""
+        self._check_folder()
+        lo = bisect_right(self._times, timestamp)
+        return [self._entry(i) for i in range(lo, len(self._times))]
+
+    def count_until(self, timestamp):
+        """Number of entries with timestamp <= `timestamp`."""
+        self._check_folder()
+        return bisect_right(self._times, timestamp)
+
+    def first(self):
+        self._check_folder()
+        return self._entry(0) if self._files else None
+
+    def latest(self):
+        self._check_folder()
+        return self._entry(len(self._files) - 1) if self._files else None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _entry(self, index):
+        return self._entries[self._files[index]]._replace(
+            path=os.path.join(self.folder, self._files[index])
+        )
+
+    def _add(self, timestamp, filename, size, crc32, metrics):
+        if filename in self._entries:
+            self._remove(filename)
+        # Captures normally arrive in order, so this is an append at the end
+        i = bisect_right(self._times, timestamp)
+        self._times.insert(i, timestamp)
+        self._files.insert(i, filename)
+        self._entries[filename] = FrameEntry(timestamp, filename, size, crc32, metrics)
+
+    def _remove(self, filename):
+        entry = self._entries.pop(filename)
+        lo = bisect_left(self._times, entry.timestamp)
+        i = self._files.index(filename, lo)
+        del self._times[i]
+        del self._files[i]
+
+    def _load(self):
+        with open(self.path) as f:
+            lines = f.read().split("\n")
+            # Anything after the last newline is a record torn by a crash
+            self._torn_tail = lines[-1] != ""
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    timestamp = datetime.fromisoformat(record["timestamp"])
+                except (ValueError, KeyError):
+                    # Torn or hand-edited line, skip it
+                    continue
+                self._add(timestamp, record["file"], record.get("size"),
+                          record.get("crc32"), record.get("metrics"))
+        self._folder_mtime = self._stat_folder()
+
+    def _record_line(self, filename):
+        entry = self._entries[filename]
+        record = {
+            "timestamp": entry.timestamp.isoformat(),
+            "file": filename,
+            "size": entry.size,
+            "crc32": entry.crc32,
+        }
+        if entry.metrics:
+            record["metrics"] = entry.metrics
+        return json.dumps(record) + "\n"
+
+    def _append_records(self, filenames):
+        with open(self.path, "a") as f:
+            if self._torn_tail:
+                f.write("\n")
+                self._torn_tail = False
+            f.writelines(self._record_line(filename) for filename in filenames)
+
+    def _rewrite(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(self._record_line(filename) for filename in self._files)
+        os.replace(tmp_path, self.path)
+        self._torn_tail = False
+
+    def _list_images(self):
+        try:
+            names = os.listdir(self.folder)
+        except FileNotFoundError:
+            return set()
+        return {name for name in names if name.lower().endswith(IMAGE_EXTENSIONS)}
+
+    def _stat_folder(self):
+        try:
+            return os.stat(self.folder).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _check_folder(self):
+        mtime = self._stat_folder()
+        if mtime == self._folder_mtime:
+            return
+
+        loose = self._list_images()
+        if self._loose_files - loose:
+            # A frame was deleted behind the manifest's back
+            self.rebuild()
+            return
+
+        new = []
+        for filename in sorted(loose - self._loose_files):
+            timestamp = extract_datetime(filename)
+            if timestamp is None or filename in self._entries:
+                continue
+            full_path = os.path.join(self.folder, filename)
+            self._add(timestamp, filename, os.path.getsize(full_path), _file_crc32(full_path), None)
+            new.append(filename)
+        if new:
+            self._append_records(new)
+        self._loose_files = loose
+        self._folder_mtime = mtime
+
+
+_manifests = {}
+
+
+def get_frame_manifest(folder):
+    """One shared FrameManifest per plate folder for the whole process."""
+    key = os.path.abspath(folder)
+    manifest = _manifests.get(key)
+    if manifest is None:
+        manifest = FrameManifest(folder)
+        _manifests[key] = manifest
+    return manifest
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3, 4) or sys.argv[1] in ("-h", "--help"):
+        print("Usage: frame_manifest.py plate_folder [start] [end]   (ISO timestamps)")
+        sys.exit(1)
+
+    manifest = get_frame_manifest(sys.argv[1])
+    start = datetime.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+    end = datetime.fromisoformat(sys.argv[3]) if len(sys.argv) > 3 else None
+    for entry in manifest.query(start, end):
+        print(f"{entry.timestamp.isoformat()}  {entry.size:>9}  {entry.crc32:08x}  {entry.path}")
@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+
+from image_processing.frame_archive import load_frame
+
+
+def load_image(image, flags=cv2.IMREAD_COLOR):
+    """
+    Accepts either an image path or an already decoded numpy array.
+    Arrays are passed through without copying, converted only where needed
+    so the result looks like what cv2.imread(path, flags) would return.
+    Paths of captures compacted by retention are read from their archive.
+    Returns None if the path cannot be loaded.
+    """
+    if not isinstance(image, np.ndarray):
+        return load_frame(image, flags)
+
+    if flags == cv2.IMREAD_UNCHANGED:
+        return image
+
+    if flags == cv2.IMREAD_GRAYSCALE:
+        if image.ndim == 2:
+            return image
+        code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(image, code)
+
+    # IMREAD_COLOR: always 3-channel BGR
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.shape[2] == 4:
+        return image[:, :, :3]
+    return image
+
+
+def describe_image(image):
+    """Short label for log messages: the path, or the array shape."""
+    if isinstance(image, np.ndarray):
+        return f"<array {image.shape}>"
+    return str(image)
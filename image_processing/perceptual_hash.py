@@ -0,0 +1,23 @@
+import cv2
+import numpy as np
+
+from image_processing.load_image import load_image
+
+
+def perceptual_hash(image, hash_size=8):
+    """
+    Difference hash (dHash) of an image path or array, as an int of hash_size² bits.
+    Visually similar images give hashes with a small Hamming distance.
+    Returns None if the image cannot be loaded.
+    """
+    gray = load_image(image, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
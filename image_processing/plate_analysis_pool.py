@@ -0,0 +1,117 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from image_processing.calculate_contour import detect_colonies
+from image_processing.plate_geometry import get_plate_geometry
+
+# Workers are started from a clean forkserver (spawn where there is none),
+# never forked from the capture process: by the time the first plate is
+# analyzed it runs the upload worker, gRPC and image writer threads, whose
+# held locks a forked child would inherit
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Worker-side: shared memory name -> attached block, kept open across cycles
+_attached = {}
+
+
+def _init_worker():
+    # Parallelism comes from the pool; OpenCV threads on top would oversubscribe the cores
+    cv2.setNumThreads(1)
+
+
+def _analyze_plate(shm_name, shape, dtype, circle_coords, index):
+    block = _attached.get(shm_name)
+    if block is None:
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        block = _attached[shm_name] = shared_memory.SharedMemory(name=shm_name)
+
+    frame = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    roi = get_plate_geometry(circle_coords, shape)[index]
+    return detect_colonies(roi.extract(frame), geometry=roi)
+
+
+class PlateAnalysisPool:
+    """
+    Long-lived process pool running colony detection for several plates in
+    parallel.
+
+    Each cycle the frame is copied once into a shared memory block that the
+    workers map, so only the plate index goes over the pipe and only the
+    ColonySet comes back. The block is reused while the frame size stays
+    the same. With workers=0 everything runs in the calling process.
+    Safe to share between chambers: calls take turns on the shared block.
+    """
+
+    def __init__(self, workers=3):
+        self.workers = workers
+        self._executor = None
+        self._block = None
+        self._lock = threading.Lock()
+        if workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(START_METHOD),
+                initializer=_init_worker,
+            )
+            atexit.register(self.close)
+
+    def _shared_frame(self, frame):
+        if self._block is None or self._block.size < frame.nbytes:
+            self._release_block()
+            self._block = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+        shared = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._block.buf)
+        np.copyto(shared, frame)
+        return shared
+
+    def analyze(self, frame, circle_coords, indices=None):
+        """
+        ColonySets for the plates at `indices` (default all) of `circle_coords`,
+        in the order of `indices`.
+        """
+        circle_coords = [tuple(int(v) for v in c) for c in circle_coords]
+        if indices is None:
+            indices = range(len(circle_coords))
+        indices = list(indices)
+        if not indices:
+            return []
+
+        with self._lock:
+            if self._executor is None:
+                # The shared geometry's snippet buffers are reused, one caller at a time
+                geometry = get_plate_geometry(circle_coords, frame.shape)
+                return [detect_colonies(geometry[i].extract(frame), geometry=geometry[i]) for i in indices]
+
+            shared = self._shared_frame(frame)
+            futures = [
+                self._executor.submit(
+                    _analyze_plate, self._block.name, shared.shape, shared.dtype.str, circle_coords, i
+                )
+                for i in indices
+            ]
+            # Wait for every plate, even if one fails: the next call overwrites the block
+            wait(futures)
+        return [future.result() for future in futures]
+
+    def _release_block(self):
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._release_block()
@@ -0,0 +1,73 @@
+import time
+
+import cv2
+import numpy as np
+
+from image_processing.load_image import load_image
+
+
+class PlateChangeDetector:
+    """
+    Cheap per-plate "did anything visibly change?" gate.
+
+    Each snippet is reduced to a small blurred grayscale thumbnail and
+    compared with the thumbnail of the last *accepted* snippet of the same
+    plate (mean absolute difference over the opaque pixels, in gray levels).
+    Comparing with the last accepted frame rather than the previous one means
+    slow growth still adds up and trips the threshold eventually.
+
+    A plate counts as changed when the difference reaches `threshold`, when
+    it has no reference yet, or when `refresh_interval` seconds have passed
+    since it was last accepted.
+    """
+
+    def __init__(self, threshold=3.0, refresh_interval=6 * 3600, size=64):
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+        self.size = size
+        self._reference = {}
+        self.last_scores = {}
+
+    def _thumbnail(self, snippet):
+        image = load_image(snippet, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            return None, None
+
+        if image.ndim == 3 and image.shape[2] == 4:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+            valid = image[:, :, 3] > 0
+        else:
+            gray = load_image(image, cv2.IMREAD_GRAYSCALE)
+            valid = np.ones(gray.shape, dtype=bool)
+
+        size = (self.size, self.size)
+        thumb = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        thumb = cv2.GaussianBlur(thumb, (3, 3), 0).astype(np.int16)
+        mask = cv2.resize(valid.astype(np.uint8), size, interpolation=cv2.INTER_NEAREST) > 0
+        return thumb, mask
+
+    def check(self, plate, snippet, now=None):
+        """
+        True if the plate should go through the expensive stages this cycle.
+        A changed snippet becomes the new reference for the plate.
+        """
+        now = time.time() if now is None else now
+        thumb, mask = self._thumbnail(snippet)
+        if thumb is None:
+            return True
+
+        reference = self._reference.get(plate)
+        changed = True
+        score = None
+        if reference is not None:
+            ref_thumb, ref_mask, accepted_at = reference
+            both = mask & ref_mask
+            if both.any():
+                score = float(np.abs(thumb[both] - ref_thumb[both]).mean())
+                changed = (score >= self.threshold
+                           or now - accepted_at >= self.refresh_interval)
+
+        self.last_scores[plate] = score
+        if changed:
+            self._reference[plate] = (thumb, mask, now)
+        return changed
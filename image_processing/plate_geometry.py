@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+
+class PlateROI:
+    """
+    One circular plate in frame coordinates, with everything that depends
+    only on (cx, cy, r) precomputed: the bounds clipped to the frame, the
+    ROI-local circle mask and each pixel's distance from the plate center.
+    """
+
+    def __init__(self, cx, cy, r, frame_shape, buffers=2):
+        frame_h, frame_w = frame_shape[:2]
+        self.cx, self.cy, self.r = int(cx), int(cy), int(r)
+
+        # Same square as the old full-frame crop, clipped to the frame
+        self.x1 = max(self.cx - self.r, 0)
+        self.y1 = max(self.cy - self.r, 0)
+        self.x2 = min(self.cx + self.r, frame_w)
+        self.y2 = min(self.cy + self.r, frame_h)
+        h, w = self.y2 - self.y1, self.x2 - self.x1
+
+        # Plate center in ROI coordinates
+        self.center = (self.cx - self.x1, self.cy - self.y1)
+
+        # 0/255 for OpenCV mask arguments, bool for numpy indexing
+        self.mask_u8 = np.zeros((h, w), dtype=np.uint8)
+        cv2.circle(self.mask_u8, self.center, self.r, 255, -1)
+        self.mask = self.mask_u8 > 0
+        self.outside = ~self.mask
+
+        ys, xs = np.indices((h, w))
+        self.distance = np.sqrt((xs - self.center[0]) ** 2 + (ys - self.center[1]) ** 2)
+
+        # Output buffers are reused round-robin: a snippet stays valid until
+        # `buffers` more extractions of this plate
+        self._buffers = [np.zeros((h, w, 4), dtype=np.uint8) for _ in range(max(1, buffers))]
+        self._next = 0
+
+    @property
+    def shape(self):
+        return self.mask.shape
+
+    def extract(self, frame):
+        """BGRA snippet of this plate from a BGR/BGRA frame, transparent outside the circle."""
+        roi = frame[self.y1:self.y2, self.x1:self.x2]
+        out = self._buffers[self._next]
+        self._next = (self._next + 1) % len(self._buffers)
+
+        if roi.shape[2] == 4:
+            np.copyto(out, roi)
+        else:
+            cv2.cvtColor(roi, cv2.COLOR_BGR2BGRA, dst=out)
+        out[self.outside] = 0
+        return out
+
+
+class PlateGeometry:
+    """All plates of CIRCLE_COORDS for one frame size."""
+
+    def __init__(self, circle_coords, frame_shape, buffers=2):
+        self.frame_shape = tuple(frame_shape[:2])
+        self.plates = [PlateROI(cx, cy, r, frame_shape, buffers) for (cx, cy, r) in circle_coords]
+
+    def __len__(self):
+        return len(self.plates)
+
+    def __getitem__(self, index):
+        return self.plates[index]
+
+    def extract(self, frame):
+        return [plate.extract(frame) for plate in self.plates]
+
+
+# (frame shape, circles) -> PlateGeometry
+_geometries = {}
+
+
+def get_plate_geometry(circle_coords, frame_shape):
+    """Shared PlateGeometry, built once per circle layout and frame size."""
+    key = (tuple(frame_shape[:2]), tuple(tuple(int(v) for v in c) for c in circle_coords))
+    geometry = _geometries.get(key)
+    if geometry is None:
+        geometry = _geometries[key] = PlateGeometry(circle_coords, frame_shape)
+    return geometry
@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+
+from image_processing.load_image import load_image
+from image_processing.plate_geometry import get_plate_geometry
+
+# Same HSV range as calculate_green_object_area
+GREEN_LOWER = np.array([35, 100, 100])
+GREEN_UPPER = np.array([85, 255, 255])
+
+HUE_BINS = 18  # OpenCV hue is 0..179, 10 degrees per bin
+
+
+def plate_metrics_dtype(hist_bins=HUE_BINS):
+    return np.dtype([
+        ("mean_red", np.float64),
+        ("mean_green", np.float64),
+        ("mean_blue", np.float64),
+        ("pixel_count", np.int64),
+        ("green_pixels", np.int64),
+        ("green_fraction", np.float64),
+        ("hue_hist", np.int64, (hist_bins,)),
+    ])
+
+
+PLATE_METRICS_DTYPE = plate_metrics_dtype()
+
+
+def compute_plate_metrics(frame, circle_coords, hist_bins=HUE_BINS):
+    """
+    Per-plate metrics for every circle of CIRCLE_COORDS from the rotated
+    frame (path or BGR/BGRA array).
+
+    Only pixels inside each circle count, so the means are not pulled down by
+    the transparent corners of a snippet. This is not a single pass over the
+    frame: each plate's square ROI is converted to HSV and reduced on its
+    own with OpenCV, masked by the cached circle of the shared PlateGeometry.
+    Pixels outside every ROI are never read.
+
+    Returns a structured array (PLATE_METRICS_DTYPE), one record per circle:
+    mean_red/green/blue, pixel_count, green_pixels (pixels in the green HSV
+    range), green_fraction and hue_hist (hue histogram of the plate).
+    Returns None if the frame cannot be loaded.
+    """
+    frame = load_image(frame)
+    if frame is None:
+        return None
+
+    geometry = get_plate_geometry(circle_coords, frame.shape)
+
+    metrics = np.zeros(len(geometry), dtype=plate_metrics_dtype(hist_bins))
+    for record, roi in zip(metrics, geometry):
+        bgr_roi = frame[roi.y1:roi.y2, roi.x1:roi.x2]
+        hsv_roi = cv2.cvtColor(bgr_roi, cv2.COLOR_BGR2HSV)
+
+        blue, green, red, _ = cv2.mean(bgr_roi, mask=roi.mask_u8)
+        in_range = cv2.inRange(hsv_roi, GREEN_LOWER, GREEN_UPPER)
+        count = cv2.countNonZero(roi.mask_u8)
+
+        record["mean_red"], record["mean_green"], record["mean_blue"] = red, green, blue
+        record["pixel_count"] = count
+        record["green_pixels"] = cv2.countNonZero(cv2.bitwise_and(in_range, roi.mask_u8))
+        record["green_fraction"] = record["green_pixels"] / count if count else 0.0
+        record["hue_hist"] = cv2.calcHist([hsv_roi], [0], roi.mask_u8, [hist_bins], [0, 180]).ravel()
+
+    return metrics
+
+
+def mean_rgb_tuples(metrics):
+    """(r, g, b) tuples rounded like calculate_mean_intensities, for the upload payload."""
+    return [
+        (round(float(m["mean_red"]), 2), round(float(m["mean_green"]), 2), round(float(m["mean_blue"]), 2))
+        for m in metrics
+    ]
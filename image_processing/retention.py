@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+import argparse
+import os
+from collections import namedtuple
+from datetime import datetime, time, timedelta, timezone
+
+from image_processing.frame_archive import index_path, load_index, read_frame_bytes, remove_orphan_packs, write_archive
+from image_processing.frame_manifest import get_frame_manifest
+
+EPOCH = datetime(1970, 1, 1)
+
+# Outcome of one folder: days (re)packed, loose files moved into archives,
+# frames dropped by thinning, the bytes they took before and after, and the
+# days still to pack when the pass stopped at its `max_days`
+RetentionStats = namedtuple("RetentionStats", [
+    "folder",
+    "days_archived",
+    "frames_archived",
+    "frames_thinned",
+    "bytes_before",
+    "bytes_after",
+    "days_pending",
+])
+
+
+def thin_frames(entries, interval_hours):
+    """The first entry of every `interval_hours` slot of the clock, oldest first."""
+    interval = interval_hours * 3600
+    kept, last_slot = [], None
+    for entry in entries:
+        slot = int((entry.timestamp - EPOCH).total_seconds() // interval)
+        if slot != last_slot:
+            kept.append(entry)
+            last_slot = slot
+    return kept
+
+
+def _pack_size(index):
+    if index is None or not os.path.exists(index.pack_path):
+        return 0
+    return os.path.getsize(index.pack_path)
+
+
+def compact_folder(folder, keep_before, thin_before=None, thin_interval_hours=None, dry_run=False, max_days=None):
+    """
+    Move the captures of one image folder taken before the day of
+    `keep_before` into day archives (frame_archive), and keep only one frame
+    per `thin_interval_hours` for the days before `thin_before`.
+
+    Only whole days are packed, so a day is archived once and rewritten only
+    when it is thinned. The manifest keeps an entry for every archived
+    frame; loose files are deleted once their archive is on disk. Running it
+    again with the same settings changes nothing. At most `max_days` days
+    are packed, oldest first; the rest are counted in days_pending and left
+    to the next run. Returns RetentionStats.
+    """
+    manifest = get_frame_manifest(folder)
+    days = {}
+    for entry in manifest.query(end=datetime.combine(keep_before.date(), time())):
+        days.setdefault(entry.timestamp.date(), []).append(entry)
+
+    days_archived = frames_archived = frames_thinned = bytes_before = bytes_after = days_pending = 0
+    for day, entries in sorted(days.items()):
+        kept = entries
+        if thin_before is not None and thin_interval_hours and day < thin_before.date():
+            kept = thin_frames(entries, thin_interval_hours)
+
+        loose = [entry for entry in entries if os.path.exists(entry.path)]
+        index = load_index(index_path(folder, day))
+        archived = set(index.frames) if index is not None else set()
+        if not loose and {os.path.basename(entry.path) for entry in kept} == archived:
+            continue
+        if max_days is not None and days_archived >= max_days:
+            days_pending += 1
+            continue
+
+        frames = []
+        for entry in kept:
+            data = read_frame_bytes(entry.path)
+            if data is None:
+                print(f"Retention: {entry.path} is neither on disk nor archived, dropping its entry")
+                continue
+            frames.append((os.path.basename(entry.path), entry.timestamp, data))
+
+        before = sum(os.path.getsize(entry.path) for entry in loose) + _pack_size(index)
+        after = sum(len(data) for _, _, data in frames)
+        if not dry_run:
+            write_archive(folder, day, frames)
+            for entry in loose:
+                os.remove(entry.path)
+
+        days_archived += 1
+        frames_archived += len(loose)
+        frames_thinned += len(entries) - len(kept)
+        bytes_before += before
+        bytes_after += after
+
+    if not dry_run and days_archived:
+        remove_orphan_packs(folder)
+        manifest.sync()
+
+    return RetentionStats(
+        folder, days_archived, frames_archived, frames_thinned, bytes_before, bytes_after, days_pending
+    )
+
+
+def apply_retention(folders, now, keep_days, thin_after_days=None, thin_interval_hours=None, not_after=None,
+                    dry_run=False, max_days=None):
+    """
+    Run compact_folder over `folders` with the cutoffs measured back from
+    `now` (naive UTC, like the capture timestamps). Nothing at or after
+    `not_after` is archived, e.g. captures still waiting in the upload
+    spool. `max_days` caps the days packed over all folders together, so a
+    long backlog is worked off over several calls. Returns the
+    RetentionStats of every folder that exists.
+    """
+    keep_before = now - timedelta(days=keep_days)
+    if not_after is not None:
+        keep_before = min(keep_before, not_after)
+    thin_before = now - timedelta(days=thin_after_days) if thin_after_days else None
+
+    results = []
+    for folder in folders:
+        if not os.path.isdir(folder):
+            continue
+        budget = None if max_days is None else max(0, max_days - sum(r.days_archived for r in results))
+        stats = compact_folder(folder, keep_before, thin_before, thin_interval_hours, dry_run, budget)
+        if stats.days_archived:
+            print(
+                f"Retention {'(dry run) ' if dry_run else ''}{folder}: {stats.days_archived} day(s), "
+                f"{stats.frames_archived} file(s) archived, {stats.frames_thinned} thinned, "
+                f"{stats.bytes_before / 1e6:.1f} MB -> {stats.bytes_after / 1e6:.1f} MB"
+                + (f", {stats.days_pending} day(s) left for the next pass" if stats.days_pending else "")
+            )
+        elif stats.days_pending:
+            print(f"Retention {folder}: {stats.days_pending} day(s) left for the next pass")
+        results.append(stats)
+    return results
+
+
+if __name__ == "__main__":
+    import config
+
+    parser = argparse.ArgumentParser(description="Archive and thin old captures of image folders.")
+    parser.add_argument("folders", nargs="+", help="plate or chamber folders, e.g. captured_images/CHAMBER/PLATE")
+    parser.add_argument("--keep-days", type=float, default=config.RETENTION_KEEP_DAYS)
+    parser.add_argument("--thin-after-days", type=float, default=config.RETENTION_THIN_AFTER_DAYS)
+    parser.add_argument("--thin-hours", type=float, default=config.RETENTION_THIN_INTERVAL_HOURS)
+    parser.add_argument("--max-days", type=int, default=None, help="pack at most this many days, oldest first")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be archived, change nothing")
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    apply_retention(
+        args.folders, now, args.keep_days, args.thin_after_days, args.thin_hours, dry_run=args.dry_run,
+        max_days=args.max_days,
+    )
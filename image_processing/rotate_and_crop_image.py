@@ -1,22 +1,94 @@
 import cv2
+import numpy as np
 
-def rotate_and_crop_image(input_path, angle, raw_coordinates=None):
+from core.image_writer import write_image_async
+from image_processing.load_image import load_image, describe_image
+
+# (frame size, angle, crop) -> (affine matrix, output size)
+_transforms = {}
+
+
+def crop_transform(width, height, angle, raw_coordinates=None):
+    """
+    Affine matrix that rotates a width x height frame by `angle` degrees
+    (clockwise, about its center) and maps the crop window to the origin,
+    plus the output size. Cached until the angle or crop changes.
+    """
+    crop = tuple(raw_coordinates) if raw_coordinates else None
+    key = (width, height, angle, crop)
+    transform = _transforms.get(key)
+    if transform is not None:
+        return transform
+
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1)
+    size = (width, height)
+    if crop:
+        x, y, w, h = crop
+        # Same window as slicing the rotated frame, i.e. clipped to it
+        x, y = min(max(x, 0), width), min(max(y, 0), height)
+        size = (max(min(w, width - x), 0), max(min(h, height - y), 0))
+        matrix[0, 2] -= x
+        matrix[1, 2] -= y
+
+    transform = _transforms[key] = (matrix, size)
+    return transform
+
+
+def crop_fits(frame_shape, raw_coordinates):
+    """
+    True if a frame of `frame_shape` holds the whole [x, y, w, h] crop window,
+    i.e. rotating and cropping it gives a full-size crop. Rotation keeps the
+    frame size, so the raw frame can be checked before it is warped.
+    """
+    if not raw_coordinates:
+        return True
+    height, width = frame_shape[:2]
+    x, y, w, h = raw_coordinates
+    return x >= 0 and y >= 0 and x + w <= width and y + h <= height
+
+
+def rotate_and_crop_image(image, angle, raw_coordinates=None, output_path=None, roi_only=True):
+    """
+    image: image path or decoded BGR array
+    angle: rotation in degrees (clockwise)
+    raw_coordinates: optional [x, y, w, h] crop applied after rotating
+    output_path: where to write the result; defaults to the input path
+                 (same in-place behaviour as before). The PNG is written in
+                 the background, use core.image_writer.wait_for_image before
+                 reading it back.
+    roi_only: warp straight into the crop-sized output instead of rotating
+              the whole frame and slicing it
+
+    Returns the rotated/cropped array, or None on error.
+    """
     try:
-        image = cv2.imread(input_path)
-        if image is None:
-            print("Error: Unable to load image at {}".format(input_path))
-            return
+        if output_path is None and not isinstance(image, np.ndarray):
+            output_path = image
+
+        source = load_image(image)
+        if source is None:
+            print("Error: Unable to load image at {}".format(describe_image(image)))
+            return None
+
+        height, width = source.shape[:2]
+        if roi_only:
+            # Only the pixels inside the crop window are interpolated
+            matrix, size = crop_transform(width, height, angle, raw_coordinates)
+            rotated = cv2.warpAffine(source, matrix, size)
+        else:
+            rotation_matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1)
+            rotated = cv2.warpAffine(source, rotation_matrix, (width, height))
 
-        height, width = image.shape[:2]
-        rotation_matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1)
-        rotated = cv2.warpAffine(image, rotation_matrix, (width, height))
+            if raw_coordinates:
+                x, y, w, h = raw_coordinates
+                rotated = rotated[y:y + h, x:x + w]
 
-        if raw_coordinates:
-            x, y, w, h = raw_coordinates
-            rotated = rotated[y:y + h, x:x + w]
+        if output_path:
+            write_image_async(output_path, rotated)
+            print("Processed, saving: {}".format(output_path))
 
-        cv2.imwrite(input_path, rotated)
-        print("Processed and saved: {}".format(input_path))
+        return rotated
 
     except Exception as e:
         print("Error: {}".format(e))
+        return None
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+
+import atexit
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from image_processing.frame_archive import load_frame
+from image_processing.frame_manifest import get_frame_manifest
+
+STATE_VERSION = 1
+PLAYLIST_HEADER = "ffconcat version 1.0\n"
+
+
+def video_output_folder(input_folder):
+    """Next to the plate folders, like the GIFs: captured_images/<chamber>/output_video."""
+    return os.path.join(os.path.dirname(os.path.abspath(input_folder)), "output_video")
+
+
+def _even(value):
+    # Most codecs want even frame dimensions
+    return max(2, int(value) // 2 * 2)
+
+
+def fit_frame(frame, size):
+    """
+    `frame` scaled to fit `size` (width, height) keeping its aspect ratio,
+    centred on a black canvas. Frames of the stream size are returned as is.
+    """
+    width, height = size
+    h, w = frame.shape[:2]
+    if (w, h) == (width, height):
+        return frame
+
+    scale = min(width / w, height / h)
+    new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=interpolation)
+
+    canvas = np.zeros((height, width, 3), dtype=np.uint8)
+    x, y = (width - new_w) // 2, (height - new_h) // 2
+    canvas[y:y + new_h, x:x + new_w] = resized
+    return canvas
+
+
+def read_frame(path):
+    """BGR frame of a capture (loose or archived), or None if it is missing or unreadable."""
+    frame = load_frame(path, cv2.IMREAD_COLOR)
+    if frame is None:
+        print(f"Skipping unreadable frame: {path}")
+    return frame
+
+
+class SegmentedVideo:
+    """
+    Timelapse of one image folder, encoded as new captures arrive.
+
+    Frames go to fixed-length segments (<name>_00000.avi, ...), written
+    through one VideoWriter that stays open across captures, so each frame
+    is encoded exactly once. The segment being filled is a .part file; when
+    it holds `segment_frames` frames it is closed, renamed and added to the
+    <name>.ffconcat playlist, which ffmpeg joins without re-encoding:
+
+        ffmpeg -f concat -safe 0 -i <name>.ffconcat -c copy timelapse.avi
+
+    The stream size comes from the first frame scaled to `width` (even
+    dimensions); frames of another size are letterboxed to it and
+    unreadable frames are skipped, and a capture older than the last
+    encoded one is left out. A <name>.json state file records the
+    closed segments: after a restart only the frames of the unfinished
+    segment are encoded again. Changed settings start the stream over.
+    """
+
+    def __init__(self, input_folder, name, width=None, fps=10, segment_frames=48, fourcc="XVID",
+                 output_folder=None):
+        self.input_folder = input_folder
+        self.name = name
+        self.width = width
+        self.fps = fps
+        self.segment_frames = max(int(segment_frames), 1)
+        self.fourcc = fourcc
+        self.output_folder = output_folder or video_output_folder(input_folder)
+        self.state_path = os.path.join(self.output_folder, f"{name}.json")
+        self.playlist_path = os.path.join(self.output_folder, f"{name}.ffconcat")
+
+        self._lock = threading.Lock()
+        self._writer = None
+        self._part_path = None
+        self._part_frames = 0
+        self._part_first = None
+        self._last = None
+        self.state = self._load_state()
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+    def _settings(self):
+        return {"width": self.width, "fps": self.fps, "segment_frames": self.segment_frames, "fourcc": self.fourcc}
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        if state is not None and state.get("version") == STATE_VERSION and state.get("settings") == self._settings():
+            # Resume after the last closed segment; a leftover .part is re-encoded
+            self._last = datetime.fromisoformat(state["last"]) if state.get("last") else None
+            return state
+
+        if state is not None:
+            print(f"Video settings changed, starting {self.name} over")
+            self._remove_segments(state)
+        return {
+            "version": STATE_VERSION,
+            "settings": self._settings(),
+            "frame_size": None,
+            "segments": [],
+            "last": None,
+            "skipped": 0,
+        }
+
+    def _save_state(self):
+        os.makedirs(self.output_folder, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _remove_segments(self, state):
+        for segment in state.get("segments", []):
+            path = os.path.join(self.output_folder, segment["file"])
+            if os.path.exists(path):
+                os.remove(path)
+        if os.path.exists(self.playlist_path):
+            os.remove(self.playlist_path)
+
+    def _write_playlist(self):
+        tmp_path = f"{self.playlist_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(PLAYLIST_HEADER)
+            for segment in self.state["segments"]:
+                f.write(f"file '{segment['file']}'\n")
+        os.replace(tmp_path, self.playlist_path)
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+    def _segment_file(self, index):
+        return f"{self.name}_{index:05d}.avi"
+
+    def _open_segment(self, first):
+        os.makedirs(self.output_folder, exist_ok=True)
+        index = len(self.state["segments"])
+        # The container follows the extension, so the .part marker goes before it
+        self._part_path = os.path.join(self.output_folder, self._segment_file(index).replace(".avi", ".part.avi"))
+        self._writer = cv2.VideoWriter(
+            self._part_path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, tuple(self.state["frame_size"])
+        )
+        if not self._writer.isOpened():
+            self._writer = None
+            raise RuntimeError(f"Cannot open video writer for {self._part_path} ({self.fourcc})")
+        self._part_frames = 0
+        self._part_first = first
+
+    def _close_segment(self):
+        if self._writer is None:
+            return
+        self._writer.release()
+        self._writer = None
+
+        index = len(self.state["segments"])
+        final_name = self._segment_file(index)
+        os.replace(self._part_path, os.path.join(self.output_folder, final_name))
+        self.state["segments"].append({
+            "file": final_name,
+            "frames": self._part_frames,
+            "first": self._part_first.isoformat(),
+            "last": self._last.isoformat(),
+        })
+        self.state["last"] = self._last.isoformat()
+        self._save_state()
+        self._write_playlist()
+        self._part_path = None
+
+    def _stream_size(self, frame):
+        h, w = frame.shape[:2]
+        if self.width:
+            w, h = self.width, h * self.width / w
+        return [_even(w), _even(h)]
+
+    def update(self):
+        """Encode the captures newer than the last encoded one. Returns the number of frames added."""
+        with self._lock:
+            manifest = get_frame_manifest(self.input_folder)
+            entries = manifest.query() if self._last is None else manifest.after(self._last)
+
+            added = 0
+            for entry in entries:
+                frame = read_frame(entry.path)
+                self._last = entry.timestamp
+                if frame is None:
+                    self.state["skipped"] += 1
+                    continue
+
+                if self.state["frame_size"] is None:
+                    self.state["frame_size"] = self._stream_size(frame)
+                if self._writer is None:
+                    self._open_segment(entry.timestamp)
+
+                self._writer.write(fit_frame(frame, self.state["frame_size"]))
+                self._part_frames += 1
+                added += 1
+                if self._part_frames >= self.segment_frames:
+                    self._close_segment()
+
+            if added:
+                print(f"Video {self.name}: {added} new frame(s), "
+                      f"{len(self.state['segments'])} closed segment(s) in {self.output_folder}")
+            return added
+
+    def close(self):
+        """Close the open segment early (e.g. at shutdown), so it is listed in the playlist."""
+        with self._lock:
+            self._close_segment()
+
+
+_videos = {}
+_videos_lock = threading.Lock()
+
+
+def get_segmented_video(input_folder, name, **settings):
+    """One shared SegmentedVideo per (folder, name) for the whole process."""
+    key = (os.path.abspath(input_folder), name)
+    with _videos_lock:
+        video = _videos.get(key)
+        if video is None:
+            video = _videos[key] = SegmentedVideo(input_folder, name, **settings)
+    return video
+
+
+def update_segmented_video(input_folder, name, **settings):
+    """Append the new captures of `input_folder` to its timelapse; returns the playlist path or None."""
+    if not os.path.exists(input_folder):
+        print(f"Video not updated: folder does not exist → {input_folder}")
+        return None
+    video = get_segmented_video(input_folder, name, **settings)
+    video.update()
+    return video.playlist_path
+
+
+@atexit.register
+def close_segmented_videos():
+    with _videos_lock:
+        videos = list(_videos.values())
+    for video in videos:
+        video.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4) or sys.argv[1] in ("-h", "--help"):
+        print("Usage: python -m image_processing.segmented_video image_folder name [width]")
+        sys.exit(1)
+
+    update_segmented_video(sys.argv[1], sys.argv[2], width=int(sys.argv[3]) if len(sys.argv) > 3 else None)
@@ -0,0 +1,218 @@
+import io
+import json
+import os
+import shutil
+from datetime import datetime
+
+from image_processing.create_gif_from_images import (
+    create_gif_from_images,
+    load_font,
+    render_frame,
+    gif_output_path,
+)
+from image_processing.frame_manifest import get_frame_manifest
+
+STATE_VERSION = 1
+
+
+def _skip_sub_blocks(data, pos):
+    # GIF data sub-blocks: <size><bytes>... terminated by a zero-size block
+    while True:
+        size = data[pos]
+        pos += 1
+        if size == 0:
+            return pos
+        pos += size
+
+
+def _encode_frame_blocks(frame, duration_ms):
+    """
+    Encode one frame on its own and return the GIF blocks (graphic control
+    extension + image) ready to be appended to another GIF. The frame's palette
+    is moved into a local color table so it does not depend on the target file.
+    """
+    buf = io.BytesIO()
+    frame.save(buf, format="GIF", duration=duration_ms)
+    data = buf.getvalue()
+
+    packed = data[10]
+    pos = 13
+    global_table = b""
+    table_bits = 0
+    if packed & 0x80:
+        table_bits = packed & 0x07
+        size = 3 * 2 ** (table_bits + 1)
+        global_table = data[pos:pos + size]
+        pos += size
+
+    control = None
+    while True:
+        block = data[pos]
+        if block == 0x21:
+            end = _skip_sub_blocks(data, pos + 2)
+            if data[pos + 1] == 0xF9:
+                control = bytearray(data[pos:end])
+            pos = end
+        elif block == 0x2C:
+            descriptor = bytearray(data[pos:pos + 10])
+            local_table = b""
+            image_start = pos + 10
+            if descriptor[9] & 0x80:
+                image_start += 3 * 2 ** ((descriptor[9] & 0x07) + 1)
+            elif global_table:
+                descriptor[9] = (descriptor[9] & 0x40) | 0x80 | table_bits
+                local_table = global_table
+            # LZW minimum code size byte, then the image data sub-blocks
+            end = _skip_sub_blocks(data, image_start + 1)
+            image = bytes(descriptor) + local_table + data[pos + 10:end]
+            break
+        else:
+            raise ValueError("Unexpected block in single frame GIF")
+
+    delay = max(int(round(duration_ms / 10)), 0)
+    if control is None:
+        control = bytearray(b"\x21\xF9\x04\x00\x00\x00\x00\x00")
+    control[4:6] = delay.to_bytes(2, "little")
+    if control[3] & 0x01:
+        # Transparent frames are cleared before the next one is drawn
+        control[3] = (control[3] & ~0x1C) | (2 << 2)
+
+    return bytes(control) + image
+
+
+def _load_state(state_path):
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def _save_state(state_path, state):
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def _rebuild(input_folder, output_gif, width, duration, skip, manifest, state_path):
+    out_path = create_gif_from_images(input_folder, output_gif, width, duration, skip)
+    if not out_path:
+        return None
+
+    first = manifest.first()
+    latest = manifest.latest()
+    frame = render_frame(first.path, width, 0, load_font())
+
+    _save_state(state_path, {
+        "version": STATE_VERSION,
+        "width": width,
+        "duration": duration,
+        "skip": skip,
+        "start": first.timestamp.isoformat(),
+        "last": latest.timestamp.isoformat(),
+        "seen": len(manifest),
+        "indexed": len(manifest),
+        "frame_size": list(frame.size),
+        "gif_size": os.path.getsize(out_path),
+    })
+    return out_path
+
+
+def update_gif_incrementally(input_folder, output_gif, width, duration, skip):
+    """
+    Same output as create_gif_from_images, but only new captures are decoded.
+
+    The GIF itself is the cache of already resized and labelled frames: new
+    frames are encoded on their own and appended before the GIF trailer, and a
+    small JSON state file next to the GIF remembers how far the timelapse got.
+    Falls back to a full rebuild when the state is missing, the settings
+    changed, the GIF was modified elsewhere or a capture older than the last
+    appended one shows up.
+
+    Frames removed from the manifest once they are in the GIF (retention
+    thinning) do not trigger a rebuild: the GIF keeps them, and new frames
+    are still appended after the last one. "seen" counts the frames the GIF
+    went through (for `skip`), "indexed" the manifest entries up to the last
+    one, so only an entry inserted before it is taken as a change.
+    """
+    if not os.path.exists(input_folder):
+        print(f"GIF not created: folder does not exist → {input_folder}")
+        return None
+
+    skip = max(int(skip), 1)
+    manifest = get_frame_manifest(input_folder)
+    first = manifest.first()
+    if first is None:
+        print("GIF not created: no images with valid timestamps found.")
+        return None
+
+    out_path = gif_output_path(input_folder, output_gif)
+    state_path = f"{out_path}.json"
+    state = _load_state(state_path)
+    rebuild_args = (input_folder, output_gif, width, duration, skip, manifest, state_path)
+
+    if (
+        state is None
+        or not os.path.exists(out_path)
+        or os.path.getsize(out_path) != state["gif_size"]
+        or (state["width"], state["duration"], state["skip"]) != (width, duration, skip)
+        or datetime.fromisoformat(state["start"]) != first.timestamp
+    ):
+        return _rebuild(*rebuild_args)
+
+    last_dt = datetime.fromisoformat(state["last"])
+    indexed = manifest.count_until(last_dt)
+    if indexed > state.get("indexed", state["seen"]):
+        # A capture older than the last appended frame was added
+        return _rebuild(*rebuild_args)
+
+    new_entries = manifest.after(last_dt)
+    if not new_entries:
+        if indexed != state.get("indexed"):
+            state["indexed"] = indexed
+            _save_state(state_path, state)
+        print(f"GIF up to date: {out_path}")
+        return out_path
+
+    start_dt = datetime.fromisoformat(state["start"])
+    frame_size = tuple(state["frame_size"])
+    duration_ms = int(duration * 1000)
+    font = load_font()
+
+    blocks = []
+    for index, entry in enumerate(new_entries, start=state["seen"]):
+        if index % skip:
+            continue
+        hours = round((entry.timestamp - start_dt).total_seconds() / 3600)
+        frame = render_frame(entry.path, width, hours, font, size=frame_size)
+        blocks.append(_encode_frame_blocks(frame, duration_ms))
+
+    if blocks:
+        # Appended on a copy that replaces the GIF at once: the upload worker
+        # may be reading the previous one meanwhile
+        tmp_path = f"{out_path}.tmp"
+        shutil.copyfile(out_path, tmp_path)
+        with open(tmp_path, "r+b") as f:
+            # The state already matched the file size, so the trailer is the last byte
+            f.seek(-1, os.SEEK_END)
+            intact = f.read(1) == b"\x3B"
+            if intact:
+                f.seek(-1, os.SEEK_END)
+                f.write(b"".join(blocks) + b"\x3B")
+        if not intact:
+            os.remove(tmp_path)
+            return _rebuild(*rebuild_args)
+        os.replace(tmp_path, out_path)
+
+    state["last"] = new_entries[-1].timestamp.isoformat()
+    state["seen"] += len(new_entries)
+    state["indexed"] = indexed + len(new_entries)
+    state["gif_size"] = os.path.getsize(out_path)
+    _save_state(state_path, state)
+
+    print(f"GIF updated with {len(blocks)} new frame(s): {out_path}")
+    return out_path
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Check the GPT analysis cache: an unchanged plate reuses its own answer,
+but a different plate that looks the same (near-empty plates hash alike)
+is never served it, and evicted or expired entries are no longer found.
+
+Run from repo root:
+    python tests/analysis_cache_test.py
+
+No network, OpenAI or Firebase needed.
+"""
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from ai_integration.analysis_cache import AnalysisCache
+from ai_integration.analyze_plates_concurrently import analyze_plates_concurrently
+
+CYCLE_DATA = "Culture: Golden Teacher Cubensis\nElapsed time: 14.5 hours"
+
+
+def empty_plate(seed):
+    rng = np.random.default_rng(seed)
+    snippet = np.zeros((500, 500, 3), dtype=np.uint8)
+    cv2.circle(snippet, (250, 250), 250, (195, 200, 190), -1)
+    return cv2.add(snippet, rng.integers(0, 4, snippet.shape, dtype=np.uint8))
+
+
+def main():
+    calls = []
+
+    def analyze(image, cycle_data, timeout=None):
+        calls.append(cycle_data)
+        return f"answer {len(calls)}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AnalysisCache(os.path.join(tmp, "cache.json"))
+        plates = ["CHA-1/P4", "CHA-1/P5"]
+        images = [empty_plate(0), empty_plate(1)]
+
+        first = analyze_plates_concurrently(images[:1], [CYCLE_DATA], analyze=analyze, cache=cache, plates=plates[:1])
+        # P5 looks like P4 and has the same context, it still gets its own answer
+        second = analyze_plates_concurrently(images[1:], [CYCLE_DATA], analyze=analyze, cache=cache, plates=plates[1:])
+        if len(calls) != 2 or first == second:
+            print(f"FAIL: another plate's answer was served ({first} / {second})")
+            return 2
+
+        # The same plates again, unchanged: both answers come from the cache, also after a reload
+        reloaded = AnalysisCache(os.path.join(tmp, "cache.json"))
+        again = analyze_plates_concurrently(images, [CYCLE_DATA] * 2, analyze=analyze, cache=reloaded, plates=plates)
+        if len(calls) != 2 or again != first + second:
+            print(f"FAIL: unchanged plates should reuse their own answers, got {again}")
+            return 2
+
+        # The least recently used plate is evicted beyond max_entries
+        small = AnalysisCache(os.path.join(tmp, "small.json"), max_entries=2)
+        keys = [small.key_for(images[0], CYCLE_DATA, f"CHA-2/P{i}") for i in range(3)]
+        for i, key in enumerate(keys):
+            small.put(key, f"answer P{i}")
+        if small.get(keys[0]) is not None or small.get(keys[2]) != "answer P2" or small.stats()["entries"] != 2:
+            print(f"FAIL: eviction beyond max_entries went wrong: {small.stats()}")
+            return 2
+
+        expired = AnalysisCache(os.path.join(tmp, "expired.json"), ttl_seconds=-1)
+        expired.put(keys[0], "stale")
+        if expired.get(keys[0]) is not None or expired.stats()["entries"] != 0:
+            print("FAIL: an expired answer was served")
+            return 2
+
+    print(f"OK: {len(calls)} requests for 4 analyses, answers kept per plate")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Check that the vectorized contour filter keeps exactly the contours the
+original per-contour loop kept.
+
+Run from repo root:
+    python tests/calculate_contour_test.py
+
+No network or Firebase needed.
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from image_processing.calculate_contour import calculate_contour
+from image_processing.plate_geometry import PlateGeometry
+
+
+def reference_filter(contours, h, w, min_area=300, safe_radius_ratio=0.87, bbox_margin=10):
+    """The original loop from calculate_contour."""
+    cx, cy = w // 2, h // 2
+    safe_radius = int(min(cx, cy) * safe_radius_ratio)
+
+    filtered = []
+    for c in contours:
+        area = cv2.contourArea(c)
+        if area < min_area or area > 0.25 * h * w:
+            continue
+        M = cv2.moments(c)
+        if M["m00"] == 0:
+            continue
+        cx_c = int(M["m10"] / M["m00"])
+        cy_c = int(M["m01"] / M["m00"])
+        if np.sqrt((cx_c - cx) ** 2 + (cy_c - cy) ** 2) > safe_radius:
+            continue
+        pts = c.reshape(-1, 2)
+        if np.any(np.sqrt((pts[:, 0] - cx) ** 2 + (pts[:, 1] - cy) ** 2) > safe_radius):
+            continue
+        x, y, bw, bh = cv2.boundingRect(c)
+        if x < bbox_margin or y < bbox_margin or x + bw > w - bbox_margin or y + bh > h - bbox_margin:
+            continue
+        filtered.append(c)
+    return filtered
+
+
+def reference_contours(snippet):
+    """Same preprocessing as calculate_contour, up to findContours."""
+    bgr, valid = snippet[:, :, :3], snippet[:, :, 3] > 0
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    gray[~valid] = 255
+    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    binary = cv2.adaptiveThreshold(blur, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 41, 5)
+    binary[~valid] = 0
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    clean = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, iterations=2)
+    contours, _ = cv2.findContours(clean, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return contours
+
+
+def synthetic_frame(rng, blobs):
+    frame = np.full((600, 1100, 3), 205, dtype=np.uint8)
+    frame += rng.integers(0, 30, frame.shape, dtype=np.uint8)
+    for _ in range(blobs):
+        center = (int(rng.integers(0, 1100)), int(rng.integers(0, 600)))
+        axes = (int(rng.integers(4, 45)), int(rng.integers(4, 45)))
+        shade = int(rng.integers(20, 120))
+        cv2.ellipse(frame, center, axes, float(rng.uniform(0, 180)), 0, 360, (shade, shade + 10, shade), -1)
+    return frame
+
+
+def main():
+    rng = np.random.default_rng(7)
+    geometry = PlateGeometry([(270, 300, 250), (820, 300, 250)], (600, 1100))
+    checked = 0
+
+    for trial in range(20):
+        frame = synthetic_frame(rng, blobs=int(rng.integers(20, 400)))
+        for index, snippet in enumerate(geometry.extract(frame)):
+            h, w = snippet.shape[:2]
+            expected = reference_filter(reference_contours(snippet), h, w)
+
+            for plate in (None, geometry[index]):
+                got = calculate_contour(snippet, geometry=plate)
+                same = len(got) == len(expected) and all(
+                    np.array_equal(a, b) for a, b in zip(got, expected)
+                )
+                if not same:
+                    print(f"FAIL: trial {trial}, plate {index}, geometry={plate is not None}: "
+                          f"{len(got)} contours vs {len(expected)} expected")
+                    return 2
+            checked += len(expected)
+
+    print(f"OK: {checked} contours identical to the reference filter")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Check the picamera2 backend against a fake Picamera2: it captures at the
+sensor's resolution unless told otherwise, exposure stays on auto unless
+asked, a lock is re-taken every relock_every captures, and a failed
+capture closes the session so the next one reopens it. Also check that
+the synthetic backend gives sensor-sized frames whose crop holds the
+plates.
+
+Run from repo root:
+    python tests/camera_test.py
+
+No camera or picamera2 package needed.
+"""
+import os
+import sys
+import types
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.camera import Picamera2Camera, create_camera
+from image_processing.rotate_and_crop_image import rotate_and_crop_image
+
+
+class FakePicamera2:
+    opened = []
+    sensor_resolution = (2028, 1520)
+
+    def __init__(self, camera_num=0):
+        self.size = None
+        self.controls = []
+        self.fail_next = False
+        self.closed = False
+        FakePicamera2.opened.append(self)
+
+    def create_still_configuration(self, main):
+        self.size = main["size"]
+        return main
+
+    def configure(self, config):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def set_controls(self, controls):
+        self.controls.append(controls)
+
+    def capture_metadata(self):
+        return {"ExposureTime": 1000, "AnalogueGain": 1.0, "ColourGains": (1.5, 1.5)}
+
+    def capture_array(self, stream):
+        if self.fail_next:
+            raise RuntimeError("camera timed out")
+        return np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def locks(camera):
+    return sum(1 for c in camera.controls if c.get("AeEnable") is False)
+
+
+def main():
+    sys.modules["picamera2"] = types.SimpleNamespace(Picamera2=FakePicamera2)
+
+    default = Picamera2Camera(warmup_seconds=0)
+    default.capture()
+    if locks(FakePicamera2.opened[-1]):
+        print("FAIL: exposure was locked without lock_exposure")
+        return 2
+    if FakePicamera2.opened[-1].size != FakePicamera2.sensor_resolution:
+        print(f"FAIL: captured at {FakePicamera2.opened[-1].size}, not the sensor's full resolution")
+        return 2
+    Picamera2Camera(resolution=(640, 480), warmup_seconds=0).open()
+    if FakePicamera2.opened[-1].size != (640, 480):
+        print("FAIL: the configured resolution was not used")
+        return 2
+
+    locked = Picamera2Camera(warmup_seconds=0, lock_exposure=True, relock_every=3)
+    for _ in range(7):
+        locked.capture()
+    session = FakePicamera2.opened[-1]
+    # Locked on open, re-locked before captures 4 and 7
+    if locks(session) != 3:
+        print(f"FAIL: expected 3 exposure locks over 7 captures, got {locks(session)}")
+        return 2
+
+    session.fail_next = True
+    if locked.capture() is not None or not session.closed:
+        print("FAIL: a failed capture should return None and close the session")
+        return 2
+    if locked.capture() is None or FakePicamera2.opened[-1] is session:
+        print("FAIL: the capture after a failure did not reopen the camera")
+        return 2
+
+    circles = [(300, 250, 200), (750, 250, 200)]
+    synthetic = create_camera("synthetic", circle_coords=circles, rotation_angle=1,
+                              raw_coordinates=[100, 80, 1000, 500], sensor_size=(1400, 900))
+    frames = [synthetic.capture(), synthetic.capture()]
+    crop = rotate_and_crop_image(frames[1], 1, [100, 80, 1000, 500], output_path="")
+    # Agar inside the plates, dark background outside
+    if frames[0].shape != (900, 1400, 3) or np.median(crop[150:350, 200:400]) < 150 or crop[20, 20].mean() > 80:
+        print("FAIL: synthetic frames are not sensor-sized captures of the plate layout")
+        return 2
+    if np.array_equal(frames[0], frames[1]):
+        print("FAIL: synthetic colonies did not grow between captures")
+        return 2
+
+    print(f"OK: {len(FakePicamera2.opened)} sessions opened at the sensor size, re-lock, reopen and synthetic frames work")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
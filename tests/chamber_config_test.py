@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Check the multi-chamber config: JSON entries inherit config.py defaults,
+bad entries are rejected and chambers are staggered so that no two capture
+at the same moment, also with different intervals.
+
+Run from repo root:
+    python tests/chamber_config_test.py
+
+No camera, network or Firebase needed.
+"""
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import config
+from core.chambers import chamber_path, load_chamber_configs, stagger_offsets
+
+
+def load(entries):
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(entries, f)
+    try:
+        return load_chamber_configs(path)
+    finally:
+        os.remove(path)
+
+
+def rejected(entries):
+    try:
+        load(entries)
+    except ValueError:
+        return True
+    return False
+
+
+def main():
+    chambers = load([
+        {"chamber": "CHA-1", "camera_options": {"camera_num": 0}},
+        {"chamber": "CHA-2", "camera_options": {"camera_num": 1},
+         "plate_ids": ["P1", "P2"], "circle_coords": [[505, 455, 250], [1065, 450, 250]], "cultures": ["Control"],
+         "plate_start_times": ["2025-12-01T11:20:15Z"]},
+        {"chamber": "CHA-3", "interval_seconds": 600},
+    ])
+
+    first, second, third = chambers
+    if first.plate_ids != list(config.PLATE_ID) or first.circle_coords != [tuple(c) for c in config.CIRCLE_COORDS]:
+        print("FAIL: a chamber without plates should take the config.py layout")
+        return 2
+    if second.camera_options.get("camera_num") != 1 or second.circle_coords[1] != (1065, 450, 250):
+        print(f"FAIL: chamber overrides not applied: {second}")
+        return 2
+    if third.contour_storage != config.CONTOUR_STORAGE or len(second.contour_tolerance_px) not in (1, 2):
+        print(f"FAIL: contour settings should default to config.py: {third}")
+        return 2
+    if config.CAMERA_BACKEND == "picamera2" and second.camera_options.get("resolution") != config.CAMERA_RESOLUTION:
+        print("FAIL: camera_num alone should keep the configured camera options")
+        return 2
+
+    for bad in (
+        [{"chamber": "CHA-1"}, {"chamber": "CHA-1"}],
+        [{"chamber": "CHA-1", "plate_ids": ["P1"]}],
+        [{"chamber": "CHA-1", "lens": "wide"}],
+        [{"chamber": "CHA-1", "plate_ids": ["P1", "P2"], "circle_coords": [[1, 1, 1], [2, 2, 2]],
+          "cultures": ["Control"], "plate_start_times": ["2025-12-01T11:20:15Z"], "contour_tolerance_px": [0, 1, 2]}],
+        [{"chamber": "CHA-1", "contour_storage": "svg"}],
+        [],
+    ):
+        if not rejected(bad):
+            print(f"FAIL: config should have been rejected: {bad}")
+            return 2
+
+    # Mixed intervals: no two chambers may ever share a capture time
+    offsets = stagger_offsets(chambers)
+    day = 24 * 3600
+    captures = [
+        {offsets[c.chamber] + k * c.interval_seconds for k in range(int(day // c.interval_seconds))}
+        for c in chambers
+    ]
+    if len(set(offsets.values())) != len(chambers) or any(
+        captures[i] & captures[j] for i in range(len(chambers)) for j in range(i + 1, len(chambers))
+    ):
+        print(f"FAIL: chambers with stagger offsets {offsets} capture at the same moment")
+        return 2
+    if stagger_offsets(chambers[:2]) != {"CHA-1": 0.0, "CHA-2": config.INTERVAL_SECONDS / 2}:
+        print("FAIL: two chambers on one interval should be half an interval apart")
+        return 2
+
+    if chamber_path("metrics/cycles.jsonl", "CHA-2") != os.path.join("metrics", "cycles_CHA-2.jsonl"):
+        print("FAIL: chamber_path should suffix the file name")
+        return 2
+
+    print(f"OK: {len(chambers)} chambers loaded, offsets {offsets}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Check that a capture smaller than the crop window skips the cycle: it
+is counted as a capture failure, nothing is written or queued, and
+process() does not raise.
+
+Run from repo root:
+    python tests/chamber_pipeline_test.py
+
+Needs the app's dependencies (firebase_admin is imported by app.py), but
+no camera, network or credentials.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import ChamberPipeline
+from core.chambers import default_chamber_config
+from core.plate_store import PlateMetricsStore
+from core.scheduler import Cycle
+from firebase_io.upload_spool import UploadSpool
+from image_processing.plate_analysis_pool import PlateAnalysisPool
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="spore_pipeline_")
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    try:
+        # The replay camera only has to open, frames are handed to process() directly
+        os.makedirs("replay")
+        open(os.path.join("replay", "frame.png"), "wb").close()
+        chamber_config = default_chamber_config()._replace(
+            camera_backend="replay", camera_options={"folder": "replay"}
+        )
+
+        queued = []
+        spool = UploadSpool(os.path.join(tmp, "spool.sqlite3"))
+        store = PlateMetricsStore(os.path.join(tmp, "plates.sqlite3"))
+        pipeline = ChamberPipeline(
+            chamber_config, lambda kind, payload, coalesce_key=None: queued.append(kind), spool, PlateAnalysisPool(0), store
+        )
+
+        cycle = Cycle(0, 0.0, "2025-12-01T08:00:00Z", 0.0, False)
+        for frame in (np.zeros((10, 10, 3), dtype=np.uint8), np.zeros((10, 10), dtype=np.uint8)):
+            pipeline.metrics.start_cycle(cycle.timestamp)
+            pipeline.process(cycle, frame)
+
+        failures = pipeline.metrics.snapshot()["counters"].get("capture_failures")
+        written = os.path.isdir(os.path.join("captured_images", chamber_config.chamber))
+        if failures != 2 or queued or written:
+            print(f"FAIL: undersized frames gave {failures} capture failure(s), queued {queued}, wrote files: {written}")
+            return 2
+
+        pipeline.close()
+        store.close()
+        spool.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print("OK: undersized captures are counted as failures and skipped")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
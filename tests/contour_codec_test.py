@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Check the contour codec: tolerance 0 round-trips every point exactly,
+a simplified contour stays within its tolerance of the original outline,
+and empty or one-point contours survive encoding.
+
+Run from repo root:
+    python tests/contour_codec_test.py
+
+No network or Firebase needed.
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic_plates import synthetic_frame
+from image_processing.calculate_contour import calculate_contour
+from image_processing.contour_codec import decode_contours, encode_contours
+
+
+def colony_contours():
+    """Real colony outlines: the detected contours of a synthetic plate."""
+    frame = synthetic_frame(500, 500, circles=[(250, 250, 250)], colonies=30, seed=3)
+    return calculate_contour(frame, min_area=50)
+
+
+def same_points(decoded, contours):
+    return len(decoded) == len(contours) and all(
+        np.array_equal(d, np.asarray(c, dtype=np.int32).reshape(-1, 2)) for d, c in zip(decoded, contours)
+    )
+
+
+def main():
+    contours = colony_contours()
+    if not contours:
+        print("FAIL: no contours detected on the synthetic plate")
+        return 2
+    points = sum(len(c) for c in contours)
+
+    lossless = encode_contours(contours, tolerance=0)
+    if not same_points(decode_contours(lossless), contours):
+        print("FAIL: tolerance 0 did not round-trip every point")
+        return 2
+
+    # Large coordinates take multi-byte varints, negative deltas zigzag
+    far = [np.array([[0, 0], [70000, 3], [5, 90000], [1, 1]], dtype=np.int32)]
+    if not same_points(decode_contours(encode_contours(far)), far):
+        print("FAIL: large coordinates did not round-trip")
+        return 2
+
+    tolerance = 1.5
+    simplified = encode_contours(contours, tolerance)
+    decoded = decode_contours(simplified)
+    if len(decoded) != len(contours) or len(simplified) >= len(lossless):
+        print(f"FAIL: simplification kept {len(simplified)} of {len(lossless)} bytes")
+        return 2
+    for original, approx in zip(contours, decoded):
+        polygon = approx.reshape(-1, 1, 2).astype(np.float32)
+        worst = max(
+            abs(cv2.pointPolygonTest(polygon, (float(x), float(y)), True)) for x, y in original.reshape(-1, 2)
+        )
+        if worst > tolerance + 1e-6:
+            print(f"FAIL: a simplified contour strays {worst:.2f} px from the original (tolerance {tolerance})")
+            return 2
+
+    for edge_case in ([], [[[5, 7]]], [[], [[1, 2]]], [[[3, 4], [3, 4]]]):
+        arrays = [np.asarray(c, dtype=np.int32).reshape(-1, 2) for c in edge_case]
+        for tol in (0, tolerance):
+            if not same_points(decode_contours(encode_contours(arrays, tol)), arrays):
+                print(f"FAIL: {edge_case} did not round-trip at tolerance {tol}")
+                return 2
+
+    print(f"OK: {len(contours)} contours, {points} points: {len(lossless)} bytes lossless, "
+          f"{len(simplified)} bytes at {tolerance} px, edge cases round-trip")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Check the capture scheduler: slots stay on the wall-clock grid, slow
+cycles cause skipped slots and degraded follow-ups instead of drift.
+
+Run from repo root:
+    python tests/cycle_scheduler_test.py
+
+No camera, network or Firebase needed; takes a few seconds.
+"""
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.scheduler import CycleScheduler
+
+INTERVAL = 0.25
+
+
+def run(process_seconds, cycles):
+    scheduler = CycleScheduler(INTERVAL, late_tolerance=0.1, degrade_ratio=0.8)
+    captured = []
+    processed = []
+    lock = threading.Lock()
+
+    def capture(cycle):
+        captured.append((cycle, time.time()))
+        return cycle.index
+
+    def process(cycle, data):
+        time.sleep(process_seconds)
+        with lock:
+            processed.append(cycle)
+
+    scheduler.run(capture, process, max_cycles=cycles)
+    return scheduler, captured, processed
+
+
+def main():
+    # Fast cycles: one capture per slot, each right on its grid time
+    scheduler, captured, processed = run(0.05, 6)
+    if scheduler.overruns or len(captured) != 6 or len(processed) != 6:
+        print(f"FAIL: fast cycles gave {scheduler.overruns} overruns, {len(captured)} captures")
+        return 2
+    for cycle, started in captured:
+        offset = cycle.slot / INTERVAL - round(cycle.slot / INTERVAL)
+        if abs(offset) > 1e-6 or started - cycle.slot > 0.05:
+            print(f"FAIL: cycle {cycle.index} off the grid (slot {cycle.slot}, started {started})")
+            return 2
+    if any(cycle.degraded for cycle, _ in captured):
+        print("FAIL: fast cycles should not be degraded")
+        return 2
+
+    # Slow cycles (1.5 intervals): every other slot is skipped, never queued up
+    scheduler, captured, processed = run(INTERVAL * 1.5, 8)
+    if scheduler.skipped_slots == 0 or len(captured) + scheduler.skipped_slots != 8:
+        print(f"FAIL: slow cycles gave {scheduler.skipped_slots} skipped slots, {len(captured)} captures")
+        return 2
+    if len(processed) != len(captured):
+        print("FAIL: not every captured cycle was processed")
+        return 2
+    if not any(cycle.degraded for cycle, _ in captured[1:]):
+        print("FAIL: cycles after an overrun should be degraded")
+        return 2
+
+    print(f"OK: on-grid fast cycles; slow cycles skipped {scheduler.skipped_slots} of 8 slots")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
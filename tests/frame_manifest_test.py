@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Check that the frame manifest picks up files written behind its back
+by appending their entries, keeping the metrics already recorded, and only
+rebuilds when a file was deleted behind its back.
+
+Run from repo root:
+    python tests/frame_manifest_test.py
+
+No camera, network or Firebase needed.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from image_processing.frame_manifest import FrameManifest
+
+START = datetime(2025, 12, 1, 8, 0, 0)
+
+
+def write_frame(folder, i):
+    timestamp = START + timedelta(hours=i)
+    path = os.path.join(folder, f"captured_image_{timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')}.png")
+    with open(path, "wb") as f:
+        f.write(bytes([i]) * 64)
+    return timestamp, path
+
+
+def touch_folder(folder):
+    """Directory mtimes can be coarse; make sure every change moves it."""
+    stamp = time.time_ns() + 10 ** 9
+    os.utime(folder, ns=(stamp, stamp))
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="spore_manifest_")
+    try:
+        folder = os.path.join(tmp, "captured_images", "TEST-CHAMBER", "TEST-P1")
+        os.makedirs(folder)
+        manifest = FrameManifest(folder)
+        for i in range(3):
+            timestamp, path = write_frame(folder, i)
+            manifest.append(timestamp, path, metrics={"colony_count": i})
+
+        rebuilds = []
+        rebuild = FrameManifest.rebuild
+        FrameManifest.rebuild = lambda self: rebuilds.append(self) or rebuild(self)
+        try:
+            # Two frames written without append(): picked up on the next query
+            write_frame(folder, 3)
+            write_frame(folder, 4)
+            touch_folder(folder)
+            entries = manifest.query()
+            if len(entries) != 5 or rebuilds:
+                print(f"FAIL: new files gave {len(entries)} entries and {len(rebuilds)} rebuild(s)")
+                return 2
+            if entries[0].metrics != {"colony_count": 0}:
+                print(f"FAIL: recorded metrics were lost: {entries[0].metrics}")
+                return 2
+
+            # The new entries were appended to the file, not rewritten
+            with open(manifest.path) as f:
+                records = [json.loads(line) for line in f]
+            if [record["file"] for record in records] != [os.path.basename(e.path) for e in entries]:
+                print(f"FAIL: the manifest file holds {len(records)} records")
+                return 2
+
+            # A file deleted behind the manifest's back makes it rebuild
+            os.remove(entries[1].path)
+            touch_folder(folder)
+            if len(manifest) != 4 or len(rebuilds) != 1:
+                print(f"FAIL: a deleted file gave {len(manifest)} entries and {len(rebuilds)} rebuild(s)")
+                return 2
+        finally:
+            FrameManifest.rebuild = rebuild
+
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print("OK: new files appended without a rebuild, deletions rebuild the manifest")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Check the growth analytics: sample-by-sample updates match the
+vectorized recompute, a known growth curve gives back its growth rate,
+lag phase and time to coverage, and snippets of a plate growing until
+it is full, measured by detect_colonies, do reach coverage.
+
+Run from repo root:
+    python tests/growth_analytics_test.py
+
+No camera, network or Firebase needed.
+"""
+import math
+import os
+import sys
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.growth_analytics import GrowthSnapshot, PlateGrowth, recompute_growth
+from image_processing.calculate_contour import detect_colonies, measurable_area_mm2
+
+PLATE_AREA = math.pi * 29 ** 2
+RATE = 0.12   # per hour, doubling every ~5.8 h
+LAG = 20.0    # hours before the colonies start growing
+
+
+def growth_curve(hours, seed=0):
+    """Flat for LAG hours, then logistic growth up to the whole plate, with noise."""
+    rng = np.random.default_rng(seed)
+    area = 2.0 * np.exp(RATE * np.maximum(hours - LAG, 0))
+    area = area / (1 + area / PLATE_AREA)
+    return area * (1 + rng.normal(0, 0.02, len(hours)))
+
+
+def plate_snippet(covered_fraction, seed=0):
+    """500 px BGRA snippet of a 58 mm plate with mycelium spread from the centre over `covered_fraction` of it."""
+    rng = np.random.default_rng(seed)
+    snippet = np.zeros((500, 500, 4), dtype=np.uint8)
+    cv2.circle(snippet, (250, 250), 250, (195, 200, 190, 255), -1)
+    if covered_fraction > 0:
+        cv2.circle(snippet, (250, 250), int(250 * math.sqrt(covered_fraction)), (70, 78, 70, 255), -1)
+    noise = rng.integers(0, 8, (500, 500, 3), dtype=np.uint8)
+    snippet[:, :, :3] = cv2.add(snippet[:, :, :3], noise)
+    return snippet
+
+
+def check_full_plate():
+    """Coverage measured through detect_colonies reaches the target on a plate that fills up."""
+    measurable = measurable_area_mm2(58)
+    full = detect_colonies(plate_snippet(0.97))
+    if full.covered_area_mm2() < 0.99 * measurable:
+        print(f"FAIL: a 97% covered plate reports {full.covered_area_mm2()} of {measurable:.1f} mm2")
+        return None
+
+    growth = PlateGrowth(window=6, area_floor=1.0, min_rate=0.01, measurable_area_mm2=measurable,
+                         coverage_fraction=0.95)
+    hours = np.arange(0, 120, 2.0)
+    # Logistic spread from 0.5% of the plate to all of it
+    fractions = 1 / (1 + 200 * np.exp(-0.12 * hours))
+    last_area = 0.0
+    for x, fraction in zip(hours, fractions):
+        area = detect_colonies(plate_snippet(fraction, seed=int(x))).covered_area_mm2()
+        if area < last_area - 1.0:
+            print(f"FAIL: covered area dropped from {last_area} to {area} mm2 at {x} h")
+            return None
+        last_area = area
+        snapshot = growth.update(x, area)
+    if snapshot.time_to_coverage_hours is None:
+        print(f"FAIL: a full plate never reached coverage (last {snapshot.coverage_fraction:.2f})")
+        return None
+    return snapshot
+
+
+def main():
+    settings = dict(window=6, area_floor=0.1, min_rate=0.01, measurable_area_mm2=PLATE_AREA, coverage_fraction=0.95)
+    hours = np.arange(0, 160, 0.5)
+    areas = growth_curve(hours)
+    areas[40] = np.nan  # a cycle without a measurement
+
+    growth = PlateGrowth(**settings)
+    incremental = []
+    for x, area in zip(hours, areas):
+        snapshot = growth.update(x, None if np.isnan(area) else area)
+        if snapshot is not None and snapshot.elapsed_hours == x:
+            incremental.append(snapshot)
+    # A late, out-of-order sample is ignored
+    if growth.update(10.0, 500.0) is not incremental[-1]:
+        print("FAIL: an older sample changed the state")
+        return 2
+
+    vectorized = recompute_growth(hours, areas, **settings)
+    if len(vectorized) != len(incremental):
+        print(f"FAIL: {len(vectorized)} recomputed samples vs {len(incremental)} incremental")
+        return 2
+    for name in GrowthSnapshot._fields:
+        expected = np.array([np.nan if getattr(s, name) is None else getattr(s, name) for s in incremental])
+        if not np.allclose(vectorized[name], expected, rtol=1e-9, atol=1e-9, equal_nan=True):
+            print(f"FAIL: {name} differs between update() and recompute_growth()")
+            return 2
+
+    last = incremental[-1]
+    peak_rate = np.nanmax(vectorized["growth_rate_per_hour"])
+    if abs(peak_rate - RATE) > 0.02:
+        print(f"FAIL: peak growth rate {peak_rate:.3f}/h, expected about {RATE}/h")
+        return 2
+    if last.lag_hours is None or abs(last.lag_hours - LAG) > 3:
+        print(f"FAIL: lag {last.lag_hours} h, expected about {LAG} h")
+        return 2
+    if last.time_to_coverage_hours is None or not 60 < last.time_to_coverage_hours < 160:
+        print(f"FAIL: time to coverage {last.time_to_coverage_hours}")
+        return 2
+
+    flat = PlateGrowth(**settings)
+    for x in hours[:40]:
+        snapshot = flat.update(x, 2.0)
+    if snapshot.lag_hours is not None or snapshot.doubling_time_hours is not None or snapshot.growth_rate_per_hour:
+        print("FAIL: no growth rate, lag or doubling time should be reported for a flat plate")
+        return 2
+
+    full = check_full_plate()
+    if full is None:
+        return 2
+
+    print(f"OK: rate {peak_rate:.3f}/h, lag {last.lag_hours:.1f} h, "
+          f"coverage at {last.time_to_coverage_hours:.1f} h, update() == recompute_growth(), "
+          f"detected plate covered at {full.time_to_coverage_hours:.1f} h")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
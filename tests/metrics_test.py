@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Check the Prometheus export: the per-chamber and process-wide files use
+the same label names for every stage series, and concurrent writers never
+leave a broken file behind.
+
+Run from repo root:
+    python tests/metrics_test.py
+
+No network or Firebase needed.
+"""
+import os
+import re
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.metrics import Metrics
+
+SERIES = re.compile(r"^(\w+)\{(.*)\} \S+$")
+
+
+def label_names(text):
+    """metric name -> set of label-name tuples used by its series."""
+    names = {}
+    for line in text.splitlines():
+        match = SERIES.match(line)
+        if match:
+            labels = tuple(sorted(pair.split("=")[0] for pair in match.group(2).split(",")))
+            names.setdefault(match.group(1), set()).add(labels)
+    return names
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = Metrics(True, None, os.path.join(tmp, "metrics.prom"), labels={"chamber": "shared"})
+        chamber = Metrics(True, None, os.path.join(tmp, "metrics_CHA-1.prom"), labels={"chamber": "CHA-1"})
+
+        with shared.span("upload", kind="gif", chamber="CHA-1"):
+            pass
+        with shared.span("gpt_request"):
+            pass
+        with chamber.span("rotate"):
+            pass
+        with chamber.span("gif", plate="P1"):
+            pass
+
+        combined = {}
+        for metrics in (shared, chamber):
+            for name, label_sets in label_names(metrics.prometheus_text()).items():
+                combined.setdefault(name, set()).update(label_sets)
+        inconsistent = {name: sets for name, sets in combined.items() if len(sets) != 1}
+        if inconsistent:
+            print(f"FAIL: series with different label names: {inconsistent}")
+            return 2
+
+        errors = []
+
+        def write(n):
+            try:
+                for _ in range(n):
+                    shared.incr("uploads", kind="gif")
+                    shared.write_prometheus()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(50,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open(shared.prometheus_path) as f:
+            written = f.read()
+        if errors or 'sporescope_uploads_total{chamber="shared",kind="gif"} 200' not in written:
+            print(f"FAIL: concurrent writes failed or lost counts: {errors}")
+            return 2
+
+    print(f"OK: {len(combined)} metrics with consistent labels, 200 concurrent writes")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
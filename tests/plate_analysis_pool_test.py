@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Check that the process pool returns the same colonies, in plate order,
+as detecting them serially in this process.
+
+Run from repo root:
+    python tests/plate_analysis_pool_test.py
+
+No network or Firebase needed.
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from image_processing.plate_analysis_pool import PlateAnalysisPool
+
+
+CIRCLES = [(260, 260, 250), (780, 260, 250), (1300, 260, 250),
+           (260, 780, 250), (780, 780, 250), (1300, 780, 250)]
+
+
+def synthetic_frame(seed):
+    rng = np.random.default_rng(seed)
+    frame = np.full((1040, 1560, 3), 210, dtype=np.uint8)
+    for _ in range(150):
+        center = (int(rng.integers(0, 1560)), int(rng.integers(0, 1040)))
+        radius = int(rng.integers(8, 40))
+        shade = int(rng.integers(20, 110))
+        cv2.circle(frame, center, radius, (shade, shade + 15, shade), -1)
+    return frame
+
+
+def same_colonies(a, b):
+    return (len(a) == len(b)
+            and np.array_equal(a.records, b.records)
+            and all(np.array_equal(x, y) for x, y in zip(a.contours, b.contours)))
+
+
+def main():
+    serial = PlateAnalysisPool(workers=0)
+    pool = PlateAnalysisPool(workers=3)
+    try:
+        for seed in range(3):
+            frame = synthetic_frame(seed)
+            # Reversed subset: results must follow the requested order
+            indices = [5, 3, 0, 1]
+            expected = serial.analyze(frame, CIRCLES, indices)
+            got = pool.analyze(frame, CIRCLES, indices)
+            for index, a, b in zip(indices, got, expected):
+                if not same_colonies(a, b):
+                    print(f"FAIL: frame {seed}, plate {index}: {len(a)} colonies vs {len(b)} expected")
+                    return 2
+
+        print("OK: pool results identical to serial detection")
+        return 0
+    finally:
+        pool.close()
+        serial.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
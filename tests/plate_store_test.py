@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Check the local plate metrics store: cycles are appended once, range
+queries come back in time order, GPT answers attach later and the CSV
+export holds every matching row.
+
+Run from repo root:
+    python tests/plate_store_test.py
+
+No camera, network or Firebase needed.
+"""
+import csv
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.plate_store import PlateMetricsStore, PlateSample
+
+
+def sample(chamber, plate, hour, area):
+    return PlateSample(
+        chamber=chamber, plate=plate, ts=None, timestamp=f"2025-12-01T{hour:02d}:00:00Z",
+        elapsed_hours=float(hour), mean_red=10.0, mean_green=20.0, mean_blue=30.0,
+        green_object_area=5, green_fraction=0.01, total_shape_area_mm2=area, covered_area_mm2=area * 1.2,
+        colony_count=3, changed=True, culture="Control", substrate="Agar", snippet_path=f"{plate}_{hour}.png",
+        hue_hist=np.arange(18), gpt_result=None,
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PlateMetricsStore(os.path.join(tmp, "store.sqlite3"))
+        # Written out of order, and the 05:00 cycle twice (a replay)
+        for hour in (5, 1, 3, 5, 2, 4):
+            store.append([sample("CHA-1", "P1", hour, hour * 1.5), sample("CHA-1", "P2", hour, hour * 2.0)])
+        store.append([sample("CHA-2", "P1", 1, 99.0)])
+
+        rows = store.query("CHA-1", "P1")
+        if [r.elapsed_hours for r in rows] != [1.0, 2.0, 3.0, 4.0, 5.0]:
+            print(f"FAIL: expected 5 samples in time order, got {[r.elapsed_hours for r in rows]}")
+            return 2
+        if not np.array_equal(rows[0].hue_hist, np.arange(18)):
+            print("FAIL: hue histogram did not round trip")
+            return 2
+
+        ts, area = store.series("CHA-1", "P2", start="2025-12-01T02:00:00Z", end="2025-12-01T05:00:00Z")
+        if area.tolist() != [4.0, 6.0, 8.0] or not np.all(np.diff(ts) == 3600):
+            print(f"FAIL: range query returned {area.tolist()}")
+            return 2
+
+        store.set_gpt_results("CHA-1", "2025-12-01T03:00:00Z", ["P1", "P2"], ["grows", "stalled"])
+        store.append([sample("CHA-1", "P1", 3, 4.5)])
+        if store.query("CHA-1", "P1", start="2025-12-01T03:00:00Z", end="2025-12-01T03:00:01Z")[0].gpt_result != "grows":
+            print("FAIL: GPT answer not kept across a replayed cycle")
+            return 2
+
+        if store.plates() != [("CHA-1", "P1"), ("CHA-1", "P2"), ("CHA-2", "P1")]:
+            print(f"FAIL: unexpected plates {store.plates()}")
+            return 2
+
+        csv_path = os.path.join(tmp, "export.csv")
+        count = store.export_csv(csv_path, chamber="CHA-1")
+        with open(csv_path, newline="") as f:
+            exported = list(csv.DictReader(f))
+        if count != 10 or len(exported) != 10 or exported[0]["plate"] != "P1":
+            print(f"FAIL: export wrote {count} rows")
+            return 2
+        store.close()
+
+    print(f"OK: {len(rows)} samples per plate, range query and export consistent")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
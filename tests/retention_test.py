@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Check retention: old days are packed into archives and very old ones
+thinned, a capped pass leaves the rest to the next one, archived frames
+read back byte for byte and keep their manifest entries, the GIF/video
+builders and replay still see them, and a further run changes nothing.
+
+Run from repo root:
+    python tests/retention_test.py
+
+No camera, network or Firebase needed.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.camera import FileReplayCamera
+from image_processing.create_gif_from_images import create_gif_from_images
+from image_processing.frame_archive import load_frame, read_frame_bytes
+from image_processing.frame_manifest import FrameManifest, get_frame_manifest
+from image_processing.retention import apply_retention
+from image_processing.segmented_video import SegmentedVideo
+
+START = datetime(2025, 12, 1, 0, 0, 0)
+DAYS = 5
+FRAMES_PER_DAY = 8  # every 3 hours
+
+
+def create_frames(folder):
+    os.makedirs(folder, exist_ok=True)
+    manifest = get_frame_manifest(folder)
+    originals = {}
+    for i in range(DAYS * FRAMES_PER_DAY):
+        timestamp = START + timedelta(hours=3 * i)
+        path = os.path.join(folder, f"captured_image_{timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')}.png")
+        rng = np.random.default_rng(i)
+        cv2.imwrite(path, rng.integers(0, 255, (60, 80, 3), dtype=np.uint8))
+        manifest.append(timestamp, path, metrics={"colony_count": i})
+        with open(path, "rb") as f:
+            originals[path] = f.read()
+    return originals
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="spore_retention_")
+    try:
+        folder = os.path.join(tmp, "captured_images", "TEST-CHAMBER", "TEST-P1")
+        originals = create_frames(folder)
+        now = START + timedelta(days=DAYS)
+
+        # Days 0-1 thinned to one frame per 12 h, days 2-3 archived, day 4 kept;
+        # at most 3 days per pass, so the backlog takes two passes
+        first = apply_retention([folder], now, keep_days=1, thin_after_days=3, thin_interval_hours=12, max_days=3)[0]
+        second = apply_retention([folder], now, keep_days=1, thin_after_days=3, thin_interval_hours=12, max_days=3)[0]
+        if (first.days_archived, first.days_pending, second.days_archived, second.days_pending) != (3, 1, 1, 0):
+            print(f"FAIL: the capped passes did not split the backlog 3 + 1: {first} / {second}")
+            return 2
+        stats = first._replace(**{
+            field: getattr(first, field) + getattr(second, field)
+            for field in ("days_archived", "frames_archived", "frames_thinned", "bytes_before", "bytes_after")
+        })
+        if stats.days_archived != 4 or stats.frames_archived != 32 or stats.frames_thinned != 12:
+            print(f"FAIL: unexpected retention result {stats}")
+            return 2
+
+        loose = [name for name in os.listdir(folder) if name.endswith(".png")]
+        if len(loose) != FRAMES_PER_DAY:
+            print(f"FAIL: {len(loose)} loose files left, expected the {FRAMES_PER_DAY} of the last day")
+            return 2
+
+        entries = get_frame_manifest(folder).query()
+        if len(entries) != DAYS * FRAMES_PER_DAY - 12:
+            print(f"FAIL: manifest holds {len(entries)} entries after thinning")
+            return 2
+        for entry in entries:
+            if read_frame_bytes(entry.path) != originals[entry.path]:
+                print(f"FAIL: {entry.path} does not read back identical")
+                return 2
+        if load_frame(entries[0].path) is None or entries[0].metrics != {"colony_count": 0}:
+            print("FAIL: an archived frame lost its image or its manifest metrics")
+            return 2
+
+        # A fresh manifest is rebuilt from the loose files and the archives
+        os.remove(os.path.join(folder, "manifest.jsonl"))
+        if len(FrameManifest(folder).query()) != len(entries):
+            print("FAIL: a rebuilt manifest misses archived frames")
+            return 2
+
+        again = apply_retention([folder], now, keep_days=1, thin_after_days=3, thin_interval_hours=12)[0]
+        if again.days_archived:
+            print(f"FAIL: a second run should change nothing, got {again}")
+            return 2
+
+        gif_path = create_gif_from_images(folder, "TEST-P1.gif", 40, 0.1, 1)
+        video = SegmentedVideo(folder, "TEST-P1", segment_frames=8)
+        if not gif_path or video.update() != len(entries) or video.state["skipped"]:
+            print("FAIL: the GIF/video builders did not read every archived frame")
+            return 2
+        video.close()
+
+        replay = FileReplayCamera(folder, loop=False)
+        replayed = 0
+        while replay.capture() is not None:
+            replayed += 1
+        if replayed != len(entries):
+            print(f"FAIL: replay saw {replayed} frames, expected {len(entries)}")
+            return 2
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"OK: {stats.frames_archived} files archived, {stats.frames_thinned} thinned, "
+          f"{stats.bytes_before} -> {stats.bytes_after} bytes, reads identical")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Check the segmented timelapse: new captures are appended without
+re-encoding closed segments, odd-sized and unreadable frames are handled
+and a restart only redoes the unfinished segment.
+
+Run from repo root:
+    python tests/segmented_video_test.py
+
+No network or Firebase needed.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from image_processing.segmented_video import SegmentedVideo
+
+START = datetime(2025, 12, 1, 8, 0, 0)
+SEGMENT_FRAMES = 4
+
+
+def frame_path(folder, i):
+    ts = (START + timedelta(minutes=30 * i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return os.path.join(folder, f"captured_image_{ts}.png")
+
+
+def create_frames(folder, first, count, size=(320, 240)):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(first, first + count):
+        width, height = size
+        cv2.imwrite(frame_path(folder, i), np.full((height, width, 3), (i * 30) % 255, dtype=np.uint8))
+
+
+def frame_count(path):
+    capture = cv2.VideoCapture(path)
+    count = 0
+    while capture.read()[0]:
+        count += 1
+    capture.release()
+    return count
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="spore_video_")
+    try:
+        folder = os.path.join(tmp, "captured_images", "TEST-CHAMBER", "TEST-P1")
+        out = os.path.join(tmp, "captured_images", "TEST-CHAMBER", "output_video")
+
+        create_frames(folder, 0, 6)
+        video = SegmentedVideo(folder, "TEST-P1", width=161, segment_frames=SEGMENT_FRAMES)
+        if video.update() != 6 or len(video.state["segments"]) != 1:
+            print(f"FAIL: expected 6 frames and 1 closed segment, got {video.state['segments']}")
+            return 2
+        first_segment = os.path.join(out, "TEST-P1_00000.avi")
+        closed_mtime = os.stat(first_segment).st_mtime_ns
+
+        # An odd-sized capture and an unreadable one, then normal captures again
+        create_frames(folder, 6, 1, size=(500, 333))
+        with open(frame_path(folder, 7), "wb") as f:
+            f.write(b"not a png")
+        create_frames(folder, 8, 3)
+        added = video.update()
+        if added != 4 or video.state["skipped"] != 1:
+            print(f"FAIL: expected 4 new frames and 1 skipped, got {added} and {video.state['skipped']}")
+            return 2
+        if os.stat(first_segment).st_mtime_ns != closed_mtime:
+            print("FAIL: a closed segment was rewritten")
+            return 2
+        if video.state["frame_size"] != [160, 120]:
+            print(f"FAIL: stream size should be even and scaled to the width, got {video.state['frame_size']}")
+            return 2
+
+        # Restart without close(): the unfinished segment is encoded again
+        create_frames(folder, 11, 1)
+        restarted = SegmentedVideo(folder, "TEST-P1", width=161, segment_frames=SEGMENT_FRAMES)
+        if restarted.update() != 3:
+            print("FAIL: a restart should only redo the frames after the last closed segment")
+            return 2
+        restarted.close()
+
+        with open(os.path.join(out, "TEST-P1.ffconcat")) as f:
+            playlist = [line.split("'")[1] for line in f if line.startswith("file ")]
+        counts = [frame_count(os.path.join(out, name)) for name in playlist]
+        if sum(counts) != 11 or counts[:2] != [SEGMENT_FRAMES, SEGMENT_FRAMES]:
+            print(f"FAIL: segments hold {counts} frames, expected 11 in total")
+            return 2
+        if any(name.endswith(".part.avi") for name in os.listdir(out)):
+            print("FAIL: an unfinished segment was left behind")
+            return 2
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"OK: {len(playlist)} segments, {sum(counts)} frames, closed segments never re-encoded")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
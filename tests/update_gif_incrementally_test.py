@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Check that the incremental GIF builder matches a full rebuild, that an
+append never changes the file under a reader that has it open, and that
+retention thinning old captures does not force a rebuild.
+
+Run from repo root:
+    python tests/update_gif_incrementally_test.py
+
+No network or Firebase needed.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from PIL import Image, ImageChops
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import image_processing.update_gif_incrementally as gif_updater
+from image_processing.create_gif_from_images import create_gif_from_images
+from image_processing.retention import apply_retention
+from image_processing.update_gif_incrementally import update_gif_incrementally
+
+
+START = datetime(2025, 12, 1, 8, 0, 0)
+
+
+def create_dummy_images(folder, first, count):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(first, first + count):
+        img = Image.new("RGBA", (320, 320), (i * 30 % 255, i * 50 % 255, i * 70 % 255, 255))
+        # transparent corner, like the circular snippets
+        for x in range(20):
+            for y in range(20):
+                img.putpixel((x, y), (0, 0, 0, 0))
+        ts = (START + timedelta(minutes=30 * i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        img.save(os.path.join(folder, f"captured_image_{ts}.png"))
+
+
+def read_frames(path):
+    frames = []
+    with Image.open(path) as gif:
+        for i in range(gif.n_frames):
+            gif.seek(i)
+            frames.append(gif.convert("RGBA"))
+    return frames
+
+
+def check_thinning(folder):
+    """Two days of captures thinned to one per 6 h after the GIF was built, then one more capture."""
+    create_dummy_images(folder, 0, 96)
+    out_path = update_gif_incrementally(folder, "TEST-P2.gif", 100, 0.1, 1)
+    before = len(read_frames(out_path))
+
+    now = START + timedelta(days=10)
+    stats = apply_retention([folder], now, keep_days=1, thin_after_days=1, thin_interval_hours=6)[0]
+    if not stats.frames_thinned:
+        print(f"FAIL: nothing was thinned: {stats}")
+        return False
+
+    rebuilds = []
+    rebuild = gif_updater._rebuild
+    gif_updater._rebuild = lambda *args: rebuilds.append(args) or rebuild(*args)
+    try:
+        create_dummy_images(folder, 96, 1)
+        update_gif_incrementally(folder, "TEST-P2.gif", 100, 0.1, 1)
+    finally:
+        gif_updater._rebuild = rebuild
+
+    after = len(read_frames(out_path))
+    if rebuilds or after != before + 1:
+        print(f"FAIL: after thinning {len(rebuilds)} rebuild(s), {before} -> {after} frames")
+        return False
+    return True
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="spore_gif_inc_")
+    try:
+        folder = os.path.join(tmp, "captured_images", "TEST-CHAMBER", "TEST-P1")
+        skip = 2
+
+        # First call has no state and does a full build
+        create_dummy_images(folder, 0, 5)
+        out_path = update_gif_incrementally(folder, "TEST-P1.gif", 200, 0.1, skip)
+
+        # Later calls only append the new captures
+        create_dummy_images(folder, 5, 4)
+        update_gif_incrementally(folder, "TEST-P1.gif", 200, 0.1, skip)
+        create_dummy_images(folder, 9, 3)
+        with open(out_path, "rb") as reader:
+            before = reader.read()
+            update_gif_incrementally(folder, "TEST-P1.gif", 200, 0.1, skip)
+            reader.seek(0)
+            if reader.read() != before:
+                print("FAIL: the GIF was rewritten in place while it was open")
+                return 2
+        incremental = read_frames(out_path)
+
+        full_path = create_gif_from_images(folder, "FULL.gif", 200, 0.1, skip)
+        full = read_frames(full_path)
+
+        if len(incremental) != len(full):
+            print(f"FAIL: {len(incremental)} incremental frames vs {len(full)} full frames")
+            return 2
+
+        for i, (a, b) in enumerate(zip(incremental, full)):
+            diff = ImageChops.difference(a, b).getbbox()
+            if diff is not None:
+                print(f"FAIL: frame {i} differs in {diff}")
+                return 2
+
+        if not check_thinning(os.path.join(tmp, "captured_images", "TEST-CHAMBER", "TEST-P2")):
+            return 2
+
+        print(f"OK: {len(full)} frames identical, thinning keeps appending")
+        return 0
+
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
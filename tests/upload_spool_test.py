@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Check that the upload spool survives a restart, replays jobs in order
+after failures and keeps only the newest pending job of a coalesce key.
+
+Run from repo root:
+    python tests/upload_spool_test.py
+
+No network or Firebase needed — the handlers are local functions.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from firebase_io.upload_spool import UploadSpool, UploadWorker
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="spore_spool_")
+    try:
+        path = os.path.join(tmp, "spool.sqlite3")
+
+        # Jobs queued before a "crash" are still there after reopening
+        spool = UploadSpool(path)
+        for i in range(5):
+            spool.enqueue("upload", {"n": i})
+        spool.close()
+
+        spool = UploadSpool(path)
+        if spool.pending_count() != 5:
+            print(f"FAIL: expected 5 pending jobs after reopen, got {spool.pending_count()}")
+            return 2
+
+        # Simulated outage: the first three attempts fail
+        done = []
+        failures = {"left": 3}
+
+        def handler(payload):
+            if failures["left"] > 0:
+                failures["left"] -= 1
+                payload["tries"] = payload.get("tries", 0) + 1
+                raise ConnectionError("uplink down")
+            done.append((payload["n"], payload.get("tries", 0)))
+
+        worker = UploadWorker(spool, {"upload": handler}, base_delay=0.01, max_delay=0.05,
+                              poll_interval=0.05)
+        worker.start()
+        deadline = time.time() + 10
+        while spool.pending_count() and time.time() < deadline:
+            time.sleep(0.02)
+        worker.stop(timeout=5)
+
+        order = [n for n, _ in done]
+        if order != [0, 1, 2, 3, 4]:
+            print(f"FAIL: jobs replayed out of order: {order}")
+            return 2
+
+        # Partial results stored by the handler come back on the retry
+        if done[0][1] != 3:
+            print(f"FAIL: payload changes were not kept between retries: {done[0]}")
+            return 2
+
+        # Unknown job kinds are parked instead of blocking the queue
+        spool.enqueue("mystery", {})
+        spool.enqueue("upload", {"n": 5})
+        worker = UploadWorker(spool, {"upload": handler}, base_delay=0.01, poll_interval=0.05)
+        worker.run_pending()
+        worker.run_pending()
+        if len(spool.dead_jobs()) != 1 or done[-1][0] != 5:
+            print("FAIL: unknown job kind blocked the queue")
+            return 2
+
+        # A permanent error (the file is gone) is parked on the first attempt
+        def missing_file(payload):
+            raise FileNotFoundError(payload["path"])
+
+        spool.enqueue("gone", {"path": "captured_images/nowhere.png"})
+        spool.enqueue("upload", {"n": 6})
+        worker = UploadWorker(spool, {"upload": handler, "gone": missing_file}, base_delay=60, poll_interval=0.05)
+        worker.run_pending()
+        worker.run_pending()
+        if len(spool.dead_jobs()) != 2 or done[-1][0] != 6 or spool.oldest_pending_time() is not None:
+            print("FAIL: a permanent error was retried instead of parked")
+            return 2
+
+        # A newer GIF of a plate replaces its upload still waiting, not other plates'
+        for n, plate in enumerate(["P1", "P2", "P1", "P1"]):
+            spool.enqueue("gif", {"n": n}, coalesce_key=plate)
+        pending = []
+        while spool.peek() is not None:
+            job = spool.peek()
+            pending.append(job.payload["n"])
+            spool.complete(job.id)
+        if pending != [1, 3]:
+            print(f"FAIL: expected the P2 job and the newest P1 job, got {pending}")
+            return 2
+
+        spool.close()
+        print("OK: spool persisted, retried, replayed in order and coalesced")
+        return 0
+
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())